@@ -0,0 +1,54 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from bot.history import timeframe_ms, to_epoch_ms
+
+
+class ChildBarIndex:
+    """Index from each parent bar (by open time) to its [start, end) range of finer child bars.
+
+    Built once per symbol; lookups are a binary search, so the child data is only touched for
+    the bars that actually need it. `finer` optionally chains a further index (e.g. 5m -> 1m -> 1s)
+    used when a child bar is itself ambiguous.
+    """
+
+    def __init__(self, child: pd.DataFrame, parent_tf: str, finer: Optional["ChildBarIndex"] = None):
+        self.parent_ms = timeframe_ms(parent_tf)
+        self.child_ts = to_epoch_ms(child["ts"]) if len(child) else np.empty(0, dtype="int64")
+        self.high = child["high"].to_numpy(dtype=float) if len(child) else np.empty(0)
+        self.low = child["low"].to_numpy(dtype=float) if len(child) else np.empty(0)
+        self.finer = finer
+
+    def child_range(self, parent_open_ms: int):
+        lo = int(np.searchsorted(self.child_ts, parent_open_ms, side="left"))
+        hi = int(np.searchsorted(self.child_ts, parent_open_ms + self.parent_ms, side="left"))
+        return lo, hi
+
+
+def first_touch(side: str, stop: float, targets: list, parent_open_ms: int, index: Optional[ChildBarIndex]) -> Optional[str]:
+    """Resolve a bar whose range spans both the stop and a target by walking its child bars in time order.
+    Returns "sl", "tp<i>", or None when no child data covers the bar (caller falls back to stop-first).
+    """
+    if index is None:
+        return None
+    lo, hi = index.child_range(parent_open_ms)
+    if hi <= lo:
+        return None
+    for j in range(lo, hi):
+        h, l = index.high[j], index.low[j]
+        stop_hit = (l <= stop) if side == "long" else (h >= stop)
+        tp_hit = None
+        for i, tp in enumerate(targets, start=1):
+            if (h >= tp) if side == "long" else (l <= tp):
+                tp_hit = f"tp{i}"
+                break
+        if stop_hit and tp_hit:
+            # Still ambiguous at this resolution: drill further if possible, else stop-first
+            return first_touch(side, stop, targets, int(index.child_ts[j]), index.finer) or "sl"
+        if stop_hit:
+            return "sl"
+        if tp_hit:
+            return tp_hit
+    return None
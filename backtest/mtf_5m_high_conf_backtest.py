@@ -5,8 +5,10 @@ from datetime import datetime, timezone
 import ccxt
 import pandas as pd
 
+from bot.history import load_history, to_epoch_ms
 from bot.strategies.mtf_5m_high_conf import Mtf5mHighConfStrategy
 from bot.strategies.registry import _file_cfg  # reuse loader for defaults
+from backtest.intrabar import ChildBarIndex, first_touch
 
 
 def exchange_from_env():
@@ -35,8 +37,11 @@ def fetch_ohlcv_df(ex, symbol: str, tf: str, limit: int) -> pd.DataFrame:
     return df
 
 
-def simulate_trade(entry: float, stop: float, targets: list, bars: pd.DataFrame) -> dict:
-    # Simple bar-by-bar sim: entry at next bar open, then check stop/targets intrabar
+def simulate_trade(entry: float, stop: float, targets: list, bars: pd.DataFrame,
+                   child_index: ChildBarIndex = None) -> dict:
+    # Simple bar-by-bar sim: entry at next bar open, then check stop/targets intrabar.
+    # Bars that span both the stop and a target are resolved from child bars when
+    # child_index is given; otherwise (or without child data) the stop is assumed first.
     if len(bars) < 2:
         return {"outcome": "none", "pnl_r": 0.0}
     side = "long" if entry < targets[-1] else "short"
@@ -46,29 +51,42 @@ def simulate_trade(entry: float, stop: float, targets: list, bars: pd.DataFrame)
     r = abs(fill - stop)
     if r <= 0:
         return {"outcome": "invalid", "pnl_r": 0.0}
-    for _, row in bars.iterrows():
+    bar_ms = to_epoch_ms(bars["ts"]) if child_index is not None else None
+    for n, (_, row) in enumerate(bars.iterrows()):
         hi = float(row["high"])
         lo = float(row["low"])
-        # check stop first (conservative)
-        if side == "long" and lo <= stop:
-            return {"outcome": "sl", "pnl_r": -1.0}
-        if side == "short" and hi >= stop:
-            return {"outcome": "sl", "pnl_r": -1.0}
-        # then check targets in order
+        stop_hit = (lo <= stop) if side == "long" else (hi >= stop)
+        tp_hit = None
         for i, tp in enumerate(targets, start=1):
-            hit = (hi >= tp) if side == "long" else (lo <= tp)
-            if hit:
-                return {"outcome": f"tp{i}", "pnl_r": float(abs(tp - fill) / r)}
+            if (hi >= tp) if side == "long" else (lo <= tp):
+                tp_hit = f"tp{i}"
+                break
+        outcome = None
+        if stop_hit and tp_hit:
+            resolved = first_touch(side, stop, targets, int(bar_ms[n]), child_index) if bar_ms is not None else None
+            outcome = resolved or "sl"  # conservative when unresolved
+            res = {"resolved": "sub_bar" if resolved else "stop_first"}
+        elif stop_hit or tp_hit:
+            outcome = "sl" if stop_hit else tp_hit
+            res = {}
+        if outcome == "sl":
+            return {"outcome": "sl", "pnl_r": -1.0, **res}
+        if outcome:
+            tp = targets[int(outcome[2:]) - 1]
+            return {"outcome": outcome, "pnl_r": float(abs(tp - fill) / r), **res}
     return {"outcome": "open", "pnl_r": 0.0}
 
 
-def backtest_symbols(symbols, base_limit=800, walk_forward=300):
+def backtest_symbols(symbols, base_limit=800, walk_forward=300, strategy_cls=Mtf5mHighConfStrategy, child_tf="1m"):
+    """Walk-forward backtest. Ambiguous bars are resolved from stored `child_tf` candles
+    (bot/history.py) when available; pass child_tf=None to keep the stop-first assumption."""
     ex = exchange_from_env()
     ex.load_markets()
-    sid = "mtf_5m_high_conf"
+    sid = strategy_cls.id
     cfg = _file_cfg(sid)
-    strat = Mtf5mHighConfStrategy(cfg)
+    strat = strategy_cls(cfg)
     tfs = strat.required_timeframes()
+    base_tf = str(cfg.get("BASE_TF", "5m"))
 
     results = []
     for sym in symbols:
@@ -77,6 +95,11 @@ def backtest_symbols(symbols, base_limit=800, walk_forward=300):
             data_by_tf = {}
             for tf, lb in tfs.items():
                 data_by_tf[tf] = fetch_ohlcv_df(ex, sym, tf, limit=max(base_limit, lb))
+            child_index = None
+            if child_tf and child_tf != base_tf:
+                child = load_history(sym, child_tf)
+                if len(child):
+                    child_index = ChildBarIndex(child, base_tf)
             # Walk-forward
             num_bars = min(*(len(df) for df in data_by_tf.values()))
             # For each step, slice last lb bars for each tf
@@ -84,6 +107,8 @@ def backtest_symbols(symbols, base_limit=800, walk_forward=300):
             losses = 0
             sum_r = 0.0
             tests = 0
+            sub_bar = 0
+            stop_first = 0
             for idx in range(num_bars - walk_forward, num_bars - 1):
                 window = {}
                 for tf, lb in tfs.items():
@@ -93,17 +118,19 @@ def backtest_symbols(symbols, base_limit=800, walk_forward=300):
                 if not d or d.side not in ("long", "short"):
                     continue
                 # simulate
-                base_tf = str(cfg.get("BASE_TF", "5m"))
                 future_bars = data_by_tf[base_tf].iloc[idx+1 : idx+1+30]  # look ahead 30 bars
-                sim = simulate_trade(d.entry_price, d.initial_stop or d.stop, (d.targets or [])[:3], future_bars)
+                sim = simulate_trade(d.entry_price, d.initial_stop or d.stop, (d.targets or [])[:3], future_bars, child_index)
                 tests += 1
+                sub_bar += sim.get("resolved") == "sub_bar"
+                stop_first += sim.get("resolved") == "stop_first"
                 sum_r += sim.get("pnl_r", 0.0)
                 if sim["outcome"].startswith("tp"):
                     wins += 1
                 elif sim["outcome"] == "sl":
                     losses += 1
             rate = (wins / max(1, wins + losses)) * 100.0
-            results.append({"symbol": sym, "tests": tests, "win_rate": round(rate,2), "avg_r": round(sum_r / max(1, tests), 3)})
+            results.append({"symbol": sym, "tests": tests, "win_rate": round(rate,2), "avg_r": round(sum_r / max(1, tests), 3),
+                            "ambiguous_sub_bar": sub_bar, "ambiguous_stop_first": stop_first})
         except Exception as e:
             results.append({"symbol": sym, "error": str(e)})
     return pd.DataFrame(results)
@@ -0,0 +1,249 @@
+import argparse
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from bot.config import SCALP1M_UNIVERSE_SIZE, SCALP1M_MAX_POSITIONS, SCALP1M_BLACKLIST_HOURS
+from bot.history import load_history, stored_symbols, download_history, to_epoch_ms
+from bot.strategies.scalp_1m_trail.strategy import Scalp1mTrailStrategy
+from bot.strategies.scalp_1m_trail import rules
+from bot.strategies.registry import _file_cfg  # same defaults the worker loads
+
+
+BAR_MS = 60_000
+VOLUME_WINDOW = 1440  # 24h of 1m bars ~ the quoteVolume ranking used by top_usdt_perps
+
+
+class Universe:
+    """1m candles of many symbols aligned on one time grid as (n_symbols, n_bars) arrays."""
+
+    def __init__(self, frames: dict):
+        frames = {s: df for s, df in frames.items() if df is not None and len(df)}
+        self.symbols = sorted(frames)
+        if not self.symbols:
+            raise ValueError("no 1m history to replay")
+        stamps = {s: to_epoch_ms(frames[s]["ts"]) for s in self.symbols}
+        t0 = min(int(x.min()) for x in stamps.values())
+        t1 = max(int(x.max()) for x in stamps.values())
+        self.ts = np.arange(t0, t1 + BAR_MS, BAR_MS, dtype="int64")
+        shape = (len(self.symbols), len(self.ts))
+        self.open, self.high, self.low, self.close, self.volume = (np.full(shape, np.nan) for _ in range(5))
+        for k, s in enumerate(self.symbols):
+            pos = (stamps[s] - t0) // BAR_MS
+            df = frames[s]
+            for name in ("open", "high", "low", "close", "volume"):
+                getattr(self, name)[k, pos] = df[name].to_numpy(dtype=float)
+        # Rolling 24h quote volume (up to and including each bar) for universe ranking
+        qv = np.nan_to_num(self.close * self.volume)
+        cum = np.cumsum(qv, axis=1)
+        lagged = np.zeros_like(cum)
+        lagged[:, VOLUME_WINDOW:] = cum[:, :-VOLUME_WINDOW]
+        self.quote_volume_24h = cum - lagged
+        self._frames = {}
+
+    @classmethod
+    def from_store(cls, symbols=None, start_ms=None, end_ms=None, root=None):
+        symbols = symbols or stored_symbols("1m", root)
+        return cls({s: load_history(s, "1m", root, start_ms, end_ms) for s in symbols})
+
+    @property
+    def n_bars(self) -> int:
+        return len(self.ts)
+
+    def frame(self, k: int) -> pd.DataFrame:
+        """Full-grid frame of symbol k in the fetch_ohlcv_df layout (gaps are NaN rows)."""
+        df = self._frames.get(k)
+        if df is None:
+            df = pd.DataFrame({
+                "ts": pd.to_datetime(self.ts, unit="ms"),
+                "open": self.open[k], "high": self.high[k], "low": self.low[k],
+                "close": self.close[k], "volume": self.volume[k],
+            })
+            self._frames[k] = df
+        return df
+
+    def ranked(self, t: int, n: int) -> list:
+        """Symbol indexes by 24h quote volume over bars closed before t, like top_usdt_perps(n)."""
+        qv = self.quote_volume_24h[:, t - 1]
+        order = np.argsort(-qv, kind="stable")
+        return [int(k) for k in order[:n] if qv[k] > 0]
+
+
+class Scalp1mReplay:
+    """Replays Scalp1mWorker over stored 1m history.
+
+    One worker poll per bar: at the open of bar t the worker sees bars < t as closed (the strategy
+    reads iloc[-2] of a frame ending with the forming bar t), fills entries at open[t], and then
+    evaluates TTL and the SL ladder on each bar close. Exchange stops are checked intrabar against
+    high/low. Rules come from scalp_1m_trail.rules so the replay cannot drift from the live worker.
+    """
+
+    def __init__(self, universe: Universe, cfg: dict = None, universe_size: int = SCALP1M_UNIVERSE_SIZE,
+                 max_positions: int = SCALP1M_MAX_POSITIONS, blacklist_hours: float = SCALP1M_BLACKLIST_HOURS,
+                 fee_pct: float = 0.05, horizon: int = 240):
+        self.u = universe
+        self.strategy = Scalp1mTrailStrategy(cfg if cfg is not None else _file_cfg("scalp_1m_trail"))
+        self.universe_size = int(universe_size)
+        self.max_positions = int(max_positions)
+        self.blacklist_ms = int(float(blacklist_hours) * 3600 * 1000)
+        self.fee_pct = float(fee_pct)
+        self.horizon = max(8, int(horizon))
+        self.lookback = max(300, int(self.strategy.cfg.get("LOOKBACK", 300)))
+
+    # --- exits (vectorized per trade) ---
+    def _first(self, mask: np.ndarray):
+        idx = np.flatnonzero(mask)
+        return int(idx[0]) if len(idx) else None
+
+    def _exit_for(self, k: int, t: int, side: str, entry: float, stop: float) -> dict:
+        cfg = self.strategy.cfg
+        levels = cfg.get("TRAIL_LEVELS", [])
+        ttl = int(cfg.get("TTL_SECONDS", 600))
+        min_pct = float(cfg.get("TTL_MIN_PROFIT_PCT", 1.0))
+        entry_ms = int(self.u.ts[t])
+        active = float(stop)
+        trailed = False
+        lo, n = t, self.u.n_bars
+        while lo < n:
+            hi = min(n, lo + self.horizon)
+            o, h, l, c = (a[k, lo:hi] for a in (self.u.open, self.u.high, self.u.low, self.u.close))
+            pnl = (c - entry) / entry * 100.0
+            ladder = rules.ladder_stop_price(side, entry, rules.ladder_sl_pct_vec(pnl, levels))
+            # Stop resting during each bar: the last ladder stop placed at a previous close
+            stops = pd.Series(np.concatenate(([active], ladder[:-1]))).ffill().to_numpy()
+            hit = (l <= stops) if side == "long" else (h >= stops)
+            elapsed = (self.u.ts[lo:hi] + BAR_MS - entry_ms) / 1000.0
+            ttl_hit = rules.ttl_expired(elapsed, pnl, ttl, min_pct)
+            i_stop, i_ttl = self._first(hit), self._first(ttl_hit)
+            if i_stop is not None and (i_ttl is None or i_stop <= i_ttl):
+                j = lo + i_stop
+                level = stops[i_stop]
+                price = min(o[i_stop], level) if side == "long" else max(o[i_stop], level)
+                moved = trailed or bool(np.any(~np.isnan(ladder[:i_stop])))
+                return {"exit_idx": j, "exit_price": float(level if np.isnan(price) else price),
+                        "reason": "trail_sl" if moved else "sl", "blacklist_at": None}
+            if i_ttl is not None:
+                j = lo + i_ttl
+                return {"exit_idx": j, "exit_price": float(c[i_ttl]), "reason": "ttl",
+                        "blacklist_at": int(self.u.ts[j]) + BAR_MS}
+            last = ladder[~np.isnan(ladder)]
+            if len(last):
+                active, trailed = float(last[-1]), True
+            lo = hi
+        j = n - 1
+        return {"exit_idx": j, "exit_price": float(self.u.close[k, j]), "reason": "end", "blacklist_at": None}
+
+    def _detect_close(self, k: int, entry: float, frm: int, to: int):
+        """First bar close in [frm, to) at which the worker's ladder check would notice the
+        position is gone (a ladder level is reached) and blacklist the symbol."""
+        if to <= frm:
+            return None
+        pnl = (self.u.close[k, frm:to] - entry) / entry * 100.0
+        i = self._first(~np.isnan(rules.ladder_sl_pct_vec(pnl, self.strategy.cfg.get("TRAIL_LEVELS", []))))
+        return None if i is None else frm + i
+
+    # --- main loop ---
+    def run(self, start_idx: int = None, end_idx: int = None) -> pd.DataFrame:
+        u = self.u
+        start = max(self.lookback, VOLUME_WINDOW if start_idx is None else int(start_idx), 1)
+        end = u.n_bars if end_idx is None else min(u.n_bars, int(end_idx))
+        open_pos = {}       # k -> trade dict (until its exit bar)
+        blacklist = {}      # k -> until_ms
+        pending = {}        # k -> (entry, from_idx): closed by stop, worker has not noticed yet
+        trades = []
+        for t in range(start, end):
+            now_ms = int(u.ts[t])
+            for k in [k for k, tr in open_pos.items() if tr["exit_idx"] < t]:
+                tr = open_pos.pop(k)
+                if tr["blacklist_at"] is not None:
+                    blacklist[k] = tr["blacklist_at"] + self.blacklist_ms
+                elif tr["reason"] != "end":
+                    pending[k] = (tr["entry_ref"], tr["exit_idx"])
+            if len(open_pos) >= self.max_positions:
+                continue
+            for k in u.ranked(t, self.universe_size):
+                if k in open_pos:
+                    continue
+                if k in pending:
+                    entry_ref, frm = pending[k]
+                    j = self._detect_close(k, entry_ref, frm, t)
+                    if j is not None:
+                        blacklist[k] = int(u.ts[j]) + BAR_MS + self.blacklist_ms
+                        pending.pop(k)
+                    else:
+                        pending[k] = (entry_ref, t)
+                if now_ms < blacklist.get(k, 0):
+                    continue
+                if np.isnan(u.close[k, t - 1]) or np.isnan(u.open[k, t]):
+                    continue
+                window = u.frame(k).iloc[t - self.lookback + 1: t + 1]
+                dec = self.strategy.decide(u.symbols[k], {"1m": window})
+                if not dec or dec.side not in ("long", "short") or dec.initial_stop is None or dec.entry_price is None:
+                    continue
+                pending.pop(k, None)
+                entry_ref, stop = float(dec.entry_price), float(dec.initial_stop)
+                tr = {"symbol": u.symbols[k], "side": dec.side, "entry_idx": t, "entry_ref": entry_ref,
+                      "fill": float(u.open[k, t]), "initial_stop": stop}
+                tr.update(self._exit_for(k, t, dec.side, entry_ref, stop))
+                open_pos[k] = tr
+                trades.append(tr)
+                if len(open_pos) >= self.max_positions:
+                    break
+        return self._frame(trades)
+
+    def _frame(self, trades: list) -> pd.DataFrame:
+        if not trades:
+            return pd.DataFrame(columns=["symbol", "side", "entry_time", "exit_time", "entry_ref", "fill",
+                                         "initial_stop", "exit_price", "reason", "pnl_pct"])
+        df = pd.DataFrame(trades)
+        sign = np.where(df["side"] == "long", 1.0, -1.0)
+        df["pnl_pct"] = sign * (df["exit_price"] - df["fill"]) / df["fill"] * 100.0 - 2 * self.fee_pct
+        df["entry_time"] = pd.to_datetime(self.u.ts[df["entry_idx"].to_numpy()], unit="ms", utc=True)
+        df["exit_time"] = pd.to_datetime(self.u.ts[df["exit_idx"].to_numpy()] + BAR_MS, unit="ms", utc=True)
+        return df[["symbol", "side", "entry_time", "exit_time", "entry_ref", "fill", "initial_stop",
+                   "exit_price", "reason", "pnl_pct"]]
+
+
+def summarize(trades: pd.DataFrame) -> dict:
+    if trades is None or trades.empty:
+        return {"trades": 0}
+    wins = int((trades["pnl_pct"] > 0).sum())
+    return {
+        "trades": int(len(trades)),
+        "win_rate": round(wins / len(trades) * 100.0, 2),
+        "avg_pnl_pct": round(float(trades["pnl_pct"].mean()), 4),
+        "sum_pnl_pct": round(float(trades["pnl_pct"].sum()), 4),
+        "by_reason": trades["reason"].value_counts().to_dict(),
+    }
+
+
+def _parse_date_ms(s: str) -> int:
+    return int(datetime.fromisoformat(s).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Replay scalp_1m_trail (entries, SL ladder, TTL, blacklist) over stored 1m history")
+    ap.add_argument("--start", required=True, help="UTC date, e.g. 2026-09-01")
+    ap.add_argument("--end", required=True, help="UTC date (exclusive)")
+    ap.add_argument("--symbols", default="", help="comma-separated; default: all stored 1m symbols")
+    ap.add_argument("--download", action="store_true", help="fetch missing 1m history from the exchange first")
+    ap.add_argument("--fee-pct", type=float, default=0.05, help="taker fee per side in percent")
+    args = ap.parse_args()
+
+    start_ms, end_ms = _parse_date_ms(args.start), _parse_date_ms(args.end)
+    # Warm-up so the first replayed bar has the 24h volume ranking and strategy lookback
+    load_from = start_ms - VOLUME_WINDOW * BAR_MS
+    syms = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    if args.download:
+        from bot.exchange_client import exchange
+        from bot.market_data import top_usdt_perps
+        ex = exchange()
+        syms = syms or top_usdt_perps(ex, SCALP1M_UNIVERSE_SIZE)
+        for s in syms:
+            download_history(ex, s, "1m", load_from, end_ms)
+    uni = Universe.from_store(syms or None, load_from, end_ms)
+    first = int(np.searchsorted(uni.ts, start_ms))
+    trades = Scalp1mReplay(uni, fee_pct=args.fee_pct).run(start_idx=first)
+    print(trades.to_string(index=False))
+    print(summarize(trades))
@@ -0,0 +1,156 @@
+import itertools
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Optional
+
+from . import clock
+from .config import ACCOUNT_EQUITY_USDT, ACCOUNT_TTL_SECONDS
+from .positions import POSITIONS
+from .state import STATE
+from .utils import log
+
+
+def _float(v, default: float = 0.0) -> float:
+    try:
+        return float(v)
+    except Exception:
+        return default
+
+
+def parse_balance(ex, b: dict) -> dict:
+    """USDT equity/free/used from a fetch_balance result, plus initial margin per position symbol."""
+    usdt = b.get("USDT") or {}
+    total = (b.get("total") or {}).get("USDT", usdt.get("total"))
+    free = (b.get("free") or {}).get("USDT", usdt.get("free"))
+    used = (b.get("used") or {}).get("USDT", usdt.get("used"))
+    positions = {}
+    for p in (b.get("info") or {}).get("positions") or []:
+        margin = _float(p.get("positionInitialMargin") or p.get("initialMargin"))
+        if margin <= 0 or not p.get("symbol"):
+            continue
+        try:
+            symbol = ex.safe_symbol(p["symbol"])
+        except Exception:
+            symbol = p["symbol"]
+        positions[symbol] = margin
+    return {
+        "equity": None if total is None else _float(total),
+        "free": _float(free),
+        "used": _float(used),
+        "positions": positions,
+    }
+
+
+class AccountState:
+    """Cached USDT equity, free margin and per-position margin, shared by every sizing path.
+
+    A view is reused for `ttl_seconds` and refetched as soon as the positions book has been invalidated,
+    i.e. after any order of ours that can fill. Margin held by in-flight entries is tracked through
+    reserve()/release() and taken off free margin until the post-fill view arrives.
+    """
+
+    def __init__(self, ttl_seconds: float = 10.0):
+        self.ttl_seconds = float(ttl_seconds)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._views = weakref.WeakKeyDictionary()       # ex -> (ts, positions generation, view)
+        self._reserved = weakref.WeakKeyDictionary()    # ex -> {token: margin}
+        self._tokens = itertools.count(1)
+        self.stats = {"hits": 0, "fetches": 0, "errors": 0, "reservations": 0}
+
+    def _fresh(self, ex, max_age: float):
+        with self._lock:
+            entry = self._views.get(ex)
+        if entry is None or max_age <= 0 or clock.now() - entry[0] > max_age:
+            return None
+        if entry[1] != POSITIONS.generation:
+            return None
+        return entry[2]
+
+    def snapshot(self, ex, max_age: Optional[float] = None) -> dict:
+        """{equity, free, used, positions, reserved, available}; raises if the fetch fails and nothing is cached."""
+        max_age = self.ttl_seconds if max_age is None else float(max_age)
+        view = self._fresh(ex, max_age)
+        if view is None:
+            with self._refresh_lock:
+                view = self._fresh(ex, max_age)
+                if view is None:
+                    t0, gen = clock.now(), POSITIONS.generation
+                    try:
+                        view = parse_balance(ex, ex.fetch_balance())
+                    except Exception:
+                        self.stats["errors"] += 1
+                        raise
+                    with self._lock:
+                        self._views[ex] = (t0, gen, view)
+                    self.stats["fetches"] += 1
+                else:
+                    self.stats["hits"] += 1
+        else:
+            self.stats["hits"] += 1
+        reserved = self.reserved(ex)
+        out = dict(view, positions=dict(view["positions"]), reserved=reserved,
+                   available=max(0.0, view["free"] - reserved))
+        self._publish(out)
+        return out
+
+    def equity(self, ex) -> float:
+        """Total USDT equity, or ACCOUNT_EQUITY_USDT when the balance is unavailable."""
+        try:
+            eq = self.snapshot(ex)["equity"]
+            if eq is not None:
+                return eq
+        except Exception as e:
+            log("fetch_balance failed:", str(e))
+        return ACCOUNT_EQUITY_USDT
+
+    def available_margin(self, ex, default: float = 0.0) -> float:
+        """Free margin less what in-flight entries have reserved."""
+        try:
+            return self.snapshot(ex)["available"]
+        except Exception as e:
+            log("fetch_balance failed:", str(e))
+            return default
+
+    # --- in-flight orders ---
+    def reserved(self, ex) -> float:
+        with self._lock:
+            return sum((self._reserved.get(ex) or {}).values())
+
+    def reserve(self, ex, margin: float) -> int:
+        token = next(self._tokens)
+        with self._lock:
+            self._reserved.setdefault(ex, {})[token] = max(0.0, float(margin))
+        self.stats["reservations"] += 1
+        return token
+
+    def release(self, ex, token: int):
+        with self._lock:
+            (self._reserved.get(ex) or {}).pop(token, None)
+
+    @contextmanager
+    def reserving(self, ex, margin: float):
+        """Hold `margin` against free margin while an entry is in flight."""
+        token = self.reserve(ex, margin)
+        try:
+            yield token
+        finally:
+            self.release(ex, token)
+
+    def invalidate(self, ex=None):
+        with self._lock:
+            if ex is None:
+                self._views.clear()
+            else:
+                self._views.pop(ex, None)
+
+    def _publish(self, view: dict):
+        try:
+            STATE.set_metrics("account", {**self.stats, "equity": view["equity"], "free": view["free"],
+                                          "reserved": view["reserved"]})
+        except Exception:
+            pass
+
+
+ACCOUNT = AccountState(ACCOUNT_TTL_SECONDS)
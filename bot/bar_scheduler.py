@@ -0,0 +1,89 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import ccxt
+
+from . import clock
+from .config import TIMEFRAME
+
+
+def tf_seconds(timeframe: str) -> int:
+    return int(ccxt.Exchange.parse_timeframe(timeframe))
+
+
+def server_offset(ex) -> float:
+    """Seconds our clock runs ahead of the exchange (ccxt's timeDifference, set by adjustForTimeDifference)."""
+    try:
+        diff = (getattr(ex, "options", None) or {}).get("timeDifference")
+        return float(diff) / 1000.0 if diff else 0.0
+    except Exception:
+        return 0.0
+
+
+def trigger_timeframe(strategy) -> str:
+    """The timeframe whose close a strategy acts on: its entry timeframe (TIMEFRAME or BASE_TF), else the
+    shortest one it reads, since higher timeframes only confirm."""
+    cfg = getattr(strategy, "cfg", None) or {}
+    tf = cfg.get("TIMEFRAME") or cfg.get("BASE_TF")
+    if tf:
+        return str(tf)
+    try:
+        tfs = list(strategy.required_timeframes())
+    except Exception:
+        tfs = []
+    return min(tfs, key=tf_seconds) if tfs else TIMEFRAME
+
+
+class BarScheduler:
+    """Tracks bar closes for a set of timeframes on the exchange's clock.
+
+    Bars close on multiples of their length in server time; a close counts as due `settle_seconds`
+    after it, giving the exchange time to publish the final candle. sleep() returns at the next due
+    close (or after `max_seconds`), and closed() reports which timeframes have closed since last asked.
+    """
+
+    def __init__(self, timeframes: Iterable[str], settle_seconds: float = 1.5,
+                 offset: Callable[[], float] = lambda: 0.0):
+        self.periods: Dict[str, int] = {tf: tf_seconds(tf) for tf in set(timeframes)}
+        self.settle_seconds = float(settle_seconds)
+        self._offset = offset
+        self._last: Dict[str, Optional[int]] = {tf: None for tf in self.periods}
+
+    def server_now(self) -> float:
+        return clock.now() - self._offset()
+
+    def _latest_close(self, tf: str, server_now: float) -> int:
+        period = self.periods[tf]
+        return int((server_now - self.settle_seconds) // period) * period
+
+    def next_closing(self) -> Tuple[Optional[float], List[str]]:
+        """Local clock time of the next due close and the timeframes closing then."""
+        if not self.periods:
+            return None, []
+        now = self.server_now()
+        nxt = {tf: self._latest_close(tf, now) + p for tf, p in self.periods.items()}
+        first = min(nxt.values())
+        tfs = sorted((tf for tf, t in nxt.items() if t == first), key=self.periods.get)
+        return first + self.settle_seconds + self._offset(), tfs
+
+    def next_due(self) -> Optional[float]:
+        """Local clock time of the next due close across all timeframes."""
+        return self.next_closing()[0]
+
+    def sleep(self, max_seconds: float):
+        due = self.next_due()
+        wait = max_seconds if due is None else min(max_seconds, due - clock.now())
+        clock.sleep(max(0.0, wait))
+
+    def closed(self) -> List[str]:
+        """Timeframes with a bar closed since the previous call (all of them on the first call)."""
+        now = self.server_now()
+        out = []
+        for tf in self.periods:
+            close = self._latest_close(tf, now)
+            if self._last[tf] != close:
+                self._last[tf] = close
+                out.append(tf)
+        return sorted(out, key=self.periods.get)
+
+    def last_close(self, tf: str) -> Optional[int]:
+        return self._last.get(tf)
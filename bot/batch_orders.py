@@ -0,0 +1,169 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import ccxt
+
+from . import clock
+from .config import BATCH_ORDERS_ENABLED
+from .open_orders import OPEN_ORDERS, order_kinds
+
+CREATE_BATCH_MAX = 5    # Binance USDⓈ-M batchOrders
+CANCEL_BATCH_MAX = 10   # Binance USDⓈ-M orderIdList
+
+# Legs of one bracket/cancel wave run side by side; more than this many in flight is never needed
+_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="order_leg")
+
+Result = Tuple[Optional[dict], Optional[Exception]]
+
+
+def uses_algo_orders(ex) -> bool:
+    # Binance USDⓈ-M only takes STOP/TAKE_PROFIT orders on the algo endpoints, which have no batch
+    # variant and need the trigger flag to cancel
+    return getattr(ex, "id", "") in ("binanceusdm", "binance")
+
+
+def _is_conditional_leg(leg: dict) -> bool:
+    t = str(leg.get("type") or "").upper()
+    params = leg.get("params") or {}
+    return "STOP" in t or "TAKE_PROFIT" in t or any(
+        k in params for k in ("stopPrice", "triggerPrice", "stopLossPrice", "takeProfitPrice"))
+
+
+def _is_conditional_order(o: dict) -> bool:
+    return bool(order_kinds(o) & {"sl", "tp"})
+
+
+def _has(ex, feature: str) -> bool:
+    return BATCH_ORDERS_ENABLED and bool((getattr(ex, "has", None) or {}).get(feature))
+
+
+def _rejection(ex, o: dict) -> Optional[Exception]:
+    """Batch endpoints report failures per item; turn one back into the ccxt error a single call raises."""
+    if o.get("status") != "rejected":
+        return None
+    info = o.get("info") or {}
+    code, msg = str(info.get("code", "")), info.get("msg") or "rejected"
+    table = getattr(ex, "exceptions", None) or {}
+    exact = (table.get("linear") or table).get("exact") or {}
+    cls = exact.get(code, ccxt.ExchangeError)
+    return cls(f"{getattr(ex, 'id', '')} {code} {msg}")
+
+
+def _run_all(calls: list) -> list:
+    """Run independent exchange calls concurrently: one round trip for the wave instead of one per call.
+    Under the simulated clock they run in order so replays stay deterministic. Returns (result, error) pairs.
+    """
+    def run(fn):
+        try:
+            return fn(), None
+        except Exception as e:
+            return None, e
+
+    if len(calls) <= 1 or not BATCH_ORDERS_ENABLED or isinstance(clock.get_clock(), clock.SimulatedClock):
+        return [run(fn) for fn in calls]
+    return [f.result() for f in [_POOL.submit(run, fn) for fn in calls]]
+
+
+def _chunks(items: list, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def place_orders(ex, legs: List[dict]) -> List[Result]:
+    """Place independent orders (dicts of symbol/type/side/amount[/price][/params]) in one wave.
+
+    Legs the exchange can batch go through create_orders (up to CREATE_BATCH_MAX each); the rest are sent
+    concurrently one by one. Returns one (order, error) pair per leg, in the order given.
+    """
+    results: List[Result] = [(None, None)] * len(legs)
+    batchable = []
+    if _has(ex, "createOrders"):
+        batchable = [i for i, leg in enumerate(legs) if not (uses_algo_orders(ex) and _is_conditional_leg(leg))]
+    singles = [i for i in range(len(legs)) if i not in batchable]
+    # A lone batchable leg gains nothing from the batch endpoint
+    if len(batchable) == 1:
+        singles, batchable = sorted(singles + batchable), []
+
+    def single(i):
+        leg = legs[i]
+        return lambda: ex.create_order(leg["symbol"], leg["type"], leg["side"], leg.get("amount"),
+                                       leg.get("price"), leg.get("params") or {})
+
+    def batch(idx):
+        return lambda: ex.create_orders([{"symbol": legs[i]["symbol"], "type": legs[i]["type"],
+                                          "side": legs[i]["side"], "amount": legs[i].get("amount"),
+                                          "price": legs[i].get("price"), "params": legs[i].get("params") or {}}
+                                         for i in idx])
+
+    groups = [[i] for i in singles] + _chunks(batchable, CREATE_BATCH_MAX)
+    outcomes = _run_all([single(g[0]) if g[0] in singles else batch(g) for g in groups])
+    for group, (res, err) in zip(groups, outcomes):
+        if group[0] in singles:
+            results[group[0]] = (res, err)
+            continue
+        for pos, i in enumerate(group):
+            if err is not None:
+                results[i] = (None, err)
+            else:
+                o = (res or [])[pos] if pos < len(res or []) else {}
+                rej = _rejection(ex, o)
+                results[i] = (None, rej) if rej else (o, None)
+    return results
+
+
+def cancel_orders(ex, symbol: str, orders: List[dict], all_open: bool = False) -> List[Result]:
+    """Cancel `orders` (open-order dicts) on one symbol in as few round trips as the exchange allows.
+
+    all_open=True promises that `orders` is every open order on the symbol, so the cancel-all endpoints
+    (one per order book on Binance) may be used. Otherwise plain orders go through cancel_orders in
+    batches and conditional ones are cancelled concurrently. Returns one (order, error) pair per order.
+    """
+    results: List[Result] = [(None, None)] * len(orders)
+    algo = uses_algo_orders(ex)
+    cond = [i for i, o in enumerate(orders) if algo and _is_conditional_order(o)]
+    plain = [i for i in range(len(orders)) if i not in cond]
+    calls, groups = [], []
+
+    def cancel_one(i):
+        if algo and _is_conditional_order(orders[i]):
+            return lambda: ex.cancel_order(orders[i]["id"], symbol, {"trigger": True})
+        return lambda: ex.cancel_order(orders[i]["id"], symbol)
+
+    if all_open and _has(ex, "cancelAllOrders") and len(orders) > 1:
+        for idx, params in ((plain, {}), (cond, {"trigger": True})):
+            if idx:
+                calls.append(lambda p=params: ex.cancel_all_orders(symbol, p))
+                groups.append(("all", idx))
+    else:
+        if _has(ex, "cancelOrders") and len(plain) > 1:
+            for idx in _chunks(plain, CANCEL_BATCH_MAX):
+                calls.append(lambda idx=idx: ex.cancel_orders([orders[i]["id"] for i in idx], symbol))
+                groups.append(("batch", idx))
+        else:
+            cond = sorted(cond + plain)
+        for i in cond:
+            calls.append(cancel_one(i))
+            groups.append(("one", [i]))
+
+    for (kind, idx), (res, err) in zip(groups, _run_all(calls)):
+        for pos, i in enumerate(idx):
+            if err is not None:
+                results[i] = (None, err)
+            elif kind == "batch":
+                o = (res or [])[pos] if pos < len(res or []) else {}
+                rej = _rejection(ex, o)
+                results[i] = (None, rej) if rej else (o or orders[i], None)
+            elif kind == "all":
+                results[i] = (orders[i], None)
+            else:
+                results[i] = (res, None)
+    return results
+
+
+def cancel_many(ex, symbol: str, orders: List[dict], all_open: bool = False) -> int:
+    """cancel_orders() that keeps the open-orders index in step; returns how many were cancelled."""
+    cancelled = 0
+    for o, (_, err) in zip(orders, cancel_orders(ex, symbol, orders, all_open=all_open)):
+        if err is None:
+            OPEN_ORDERS.note_cancelled(ex, symbol, o["id"])
+            cancelled += 1
+    return cancelled
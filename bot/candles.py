@@ -0,0 +1,85 @@
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Tuple
+
+import pandas as pd
+
+from . import clock
+from .market_data import fetch_ohlcv_df
+from .state import STATE
+
+# Bars refetched on top of a cached history: the bar that just closed, the new forming one and one spare
+TAIL_BARS = 3
+
+_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="candles")
+
+
+class CandleCache:
+    """OHLCV history per (symbol, timeframe) kept between scans.
+
+    The first request for a series fetches the full lookback; later ones fetch only the last TAIL_BARS
+    and splice them onto the cached frame, falling back to a full fetch when the tail no longer
+    overlaps it. Warming the cache shortly before a bar close leaves only the tail fetch inside the
+    latency-critical window.
+    """
+
+    def __init__(self, max_bars: int = 1500):
+        self.max_bars = int(max_bars)
+        self._lock = threading.Lock()
+        self._frames = weakref.WeakKeyDictionary()   # ex -> {(symbol, timeframe): frame}
+        self.stats = {"full": 0, "tail": 0, "errors": 0}
+
+    def frame(self, ex, symbol: str, timeframe: str, limit: int = 400) -> pd.DataFrame:
+        """The last `limit` bars (same shape as market_data.fetch_ohlcv_df), forming bar included."""
+        with self._lock:
+            cached = (self._frames.get(ex) or {}).get((symbol, timeframe))
+        df = None
+        if cached is not None and len(cached) >= limit:
+            tail = fetch_ohlcv_df(ex, symbol, timeframe, limit=TAIL_BARS)
+            if len(tail) and tail["ts"].iloc[0] <= cached["ts"].iloc[-1]:
+                df = pd.concat([cached[cached["ts"] < tail["ts"].iloc[0]], tail], ignore_index=True)
+                self.stats["tail"] += 1
+        if df is None:
+            df = fetch_ohlcv_df(ex, symbol, timeframe, limit=limit)
+            self.stats["full"] += 1
+        df = df.iloc[-self.max_bars:].reset_index(drop=True)
+        with self._lock:
+            self._frames.setdefault(ex, {})[(symbol, timeframe)] = df
+        return df.iloc[-limit:].reset_index(drop=True)
+
+    def frames(self, ex, requests: Iterable[Tuple[str, str, int]]) -> Dict[tuple, pd.DataFrame]:
+        """frame() for many (symbol, timeframe, limit) at once, concurrently; failed series map to None."""
+        requests = list(requests)
+
+        def one(req):
+            try:
+                return self.frame(ex, *req)
+            except Exception:
+                self.stats["errors"] += 1
+                return None
+
+        if isinstance(clock.get_clock(), clock.SimulatedClock):
+            out = [one(r) for r in requests]
+        else:
+            out = list(_POOL.map(one, requests))
+        self._publish()
+        return {(sym, tf): df for (sym, tf, _), df in zip(requests, out)}
+
+    def drop(self, ex=None):
+        with self._lock:
+            if ex is None:
+                self._frames.clear()
+            else:
+                self._frames.pop(ex, None)
+
+    def _publish(self):
+        try:
+            with self._lock:
+                series = sum(len(v) for v in self._frames.values())
+            STATE.set_metrics("candles", {**self.stats, "series": series})
+        except Exception:
+            pass
+
+
+CANDLES = CandleCache()
@@ -0,0 +1,183 @@
+import heapq
+import itertools
+import threading
+import time as _time
+from typing import Optional
+
+
+class ReplayFinished(SystemExit):
+    """Raised inside clock participants once a simulated clock reaches its end time.
+    Subclasses SystemExit so worker loops (which catch Exception) unwind and threads exit quietly.
+    """
+
+
+class RealClock:
+    """Wall clock: the default for live trading."""
+
+    def now(self) -> float:
+        return _time.time()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            _time.sleep(seconds)
+
+    def start_thread(self, target, args=(), name: Optional[str] = None) -> threading.Thread:
+        t = threading.Thread(target=target, args=args, name=name, daemon=True)
+        t.start()
+        return t
+
+
+class AcceleratedClock(RealClock):
+    """Wall clock running `speed` times faster from `origin` (epoch seconds). Threads still run
+    concurrently, so results depend on scheduling, but a day of replay takes 1/speed of a day.
+    """
+
+    def __init__(self, speed: float = 1.0, origin: Optional[float] = None):
+        self.speed = max(1e-9, float(speed))
+        self._wall0 = _time.time()
+        self._origin = float(origin if origin is not None else self._wall0)
+
+    def now(self) -> float:
+        return self._origin + (_time.time() - self._wall0) * self.speed
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            _time.sleep(seconds / self.speed)
+
+
+class SimulatedClock(RealClock):
+    """Discrete-event clock for deterministic replay.
+
+    Threads started through start_thread() take turns: exactly one participant runs at a time, and
+    sleep() hands control to whichever participant is due next (ties broken by sleep order), jumping
+    the clock straight to its wake time. Time never advances while a participant is working, so a
+    trading day replays as fast as the code runs and identically on every run. Threads outside the
+    scheme (e.g. the UI server) may read now() but must not sleep on it.
+    """
+
+    def __init__(self, start: float, end: Optional[float] = None):
+        self._now = float(start)
+        self._end = float(end) if end is not None else None
+        self._lock = threading.Lock()
+        self._heap = []   # (wake_time, seq, event)
+        self._seq = itertools.count()
+        self._local = threading.local()
+        self._running = False   # whether some participant currently holds the turn
+        self._finished = False
+
+    def now(self) -> float:
+        return self._now
+
+    def _event(self) -> threading.Event:
+        ev = getattr(self._local, "event", None)
+        if ev is None:
+            ev = self._local.event = threading.Event()
+        return ev
+
+    def _hand_over(self):
+        """Wake the next due participant (caller holds the lock and gives up its turn)."""
+        if not self._heap:
+            self._running = False
+            return
+        wake, _, ev = heapq.heappop(self._heap)
+        if self._end is not None and wake > self._end:
+            ev.set()
+            self._finish()
+            return
+        self._now = max(self._now, wake)
+        self._running = True
+        ev.set()
+
+    def _finish(self):
+        self._finished = True
+        self._running = False
+        for _, _, ev in self._heap:
+            ev.set()
+        self._heap.clear()
+
+    def _wait_turn(self, ev: threading.Event):
+        ev.wait()
+        ev.clear()
+        if self._finished:
+            raise ReplayFinished()
+
+    def sleep(self, seconds: float):
+        if self._finished:
+            raise ReplayFinished()
+        ev = self._event()
+        with self._lock:
+            heapq.heappush(self._heap, (self._now + max(0.0, float(seconds)), next(self._seq), ev))
+            # A thread that was not holding the turn (e.g. the main thread on first use) just joins the
+            # queue; only the holder, or anyone when nobody holds it, dispatches the next turn.
+            if getattr(self._local, "holder", False) or not self._running:
+                self._hand_over()
+        self._local.holder = False
+        self._wait_turn(ev)
+        self._local.holder = True
+
+    def start_thread(self, target, args=(), name: Optional[str] = None) -> threading.Thread:
+        ev = threading.Event()
+
+        def _run():
+            self._local.event = ev
+            try:
+                self._wait_turn(ev)
+                self._local.holder = True
+                target(*args)
+            except ReplayFinished:
+                pass
+            finally:
+                self._local.holder = False
+                with self._lock:
+                    if not self._finished:
+                        self._hand_over()
+
+        with self._lock:
+            heapq.heappush(self._heap, (self._now, next(self._seq), ev))
+        t = threading.Thread(target=_run, name=name, daemon=True)
+        t.start()
+        return t
+
+    def run(self, target, args=()):
+        """Run `target` as a participant from the calling thread until it returns or the replay ends."""
+        self._local.event = self._event()
+        with self._lock:
+            heapq.heappush(self._heap, (self._now, next(self._seq), self._local.event))
+            if not self._running:
+                self._hand_over()
+        try:
+            self._wait_turn(self._local.event)
+            self._local.holder = True
+            return target(*args)
+        except ReplayFinished:
+            return None
+        finally:
+            self._local.holder = False
+            with self._lock:
+                if not self._finished:
+                    self._hand_over()
+
+
+_CLOCK = RealClock()
+
+
+def get_clock():
+    return _CLOCK
+
+
+def set_clock(clock) -> None:
+    """Install the process-wide clock; call before workers start."""
+    global _CLOCK
+    _CLOCK = clock
+
+
+def now() -> float:
+    return _CLOCK.now()
+
+
+def sleep(seconds: float) -> None:
+    _CLOCK.sleep(seconds)
+
+
+def start_thread(target, args=(), name: Optional[str] = None) -> threading.Thread:
+    return _CLOCK.start_thread(target, args=args, name=name)
@@ -11,6 +11,24 @@ load_dotenv()
 # ==== Exchange / General ====
 EXCHANGE_ID        = os.getenv("EXCHANGE", "binanceusdm")
 USE_TESTNET        = os.getenv("USE_TESTNET", "true").lower() == "true"
+EXCHANGE_API_URL   = os.getenv("EXCHANGE_API_URL", "").strip()   # e.g. http://127.0.0.1:8765 for bot/mock_api.py
+
+# Weight-aware request scheduler shared by all threads (replaces ccxt's enableRateLimit)
+REQUEST_SCHEDULER_ENABLED = os.getenv("REQUEST_SCHEDULER_ENABLED", "true").lower() == "true"
+REQUEST_WEIGHT_LIMIT      = int(os.getenv("REQUEST_WEIGHT_LIMIT", "2400"))       # IP weight per minute
+REQUEST_WEIGHT_HEADROOM   = float(os.getenv("REQUEST_WEIGHT_HEADROOM", "0.9"))  # fraction of the limit we plan to use
+# Per-thread ccxt sessions (shared markets/time offset) so worker threads' requests overlap
+GATEWAY_ENABLED           = os.getenv("GATEWAY_ENABLED", "true").lower() == "true"
+# Retries for idempotent reads, per-endpoint circuit breakers and latency histograms around the exchange
+RESILIENCE_ENABLED        = os.getenv("RESILIENCE_ENABLED", "true").lower() == "true"
+RETRY_MAX_ATTEMPTS        = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))            # tries per read, including the first
+RETRY_BASE_SECONDS        = float(os.getenv("RETRY_BASE_SECONDS", "0.25"))      # jittered exponential backoff base
+RETRY_MAX_SECONDS         = float(os.getenv("RETRY_MAX_SECONDS", "2"))
+BREAKER_FAILURES          = int(os.getenv("BREAKER_FAILURES", "5"))              # consecutive failures/slow calls to open
+BREAKER_COOLDOWN_SECONDS  = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "30"))   # open time before a probe
+BREAKER_SLOW_MS           = float(os.getenv("BREAKER_SLOW_MS", "3000"))          # a call this slow counts as a failure
+# Group protective orders / cancels into batch endpoints and send independent legs concurrently
+BATCH_ORDERS_ENABLED      = os.getenv("BATCH_ORDERS_ENABLED", "true").lower() == "true"
 
 # Optional: Load API credentials from Google Secret Manager when enabled
 USE_GCP_SECRETS    = os.getenv("USE_GCP_SECRETS", "false").lower() == "true"
@@ -105,9 +123,21 @@ TP_R_MULT          = float(os.getenv("TP_R_MULT", "2.0"))
 BREAKEVEN_AFTER_R  = float(os.getenv("BREAKEVEN_AFTER_R", "1.0"))   # move SL to BE after +1R
 TRAIL_AFTER_R      = float(os.getenv("TRAIL_AFTER_R", "1.5"))       # start trailing after +1.5R
 TRAIL_ATR_MULT     = float(os.getenv("TRAIL_ATR_MULT", "1.0"))      # trailing stop distance = 1.0 * ATR
+STOP_MIN_MOVE_TICKS = float(os.getenv("STOP_MIN_MOVE_TICKS", "2"))  # skip stop moves smaller than this many price ticks
+# Client-side trailing stops: levels held locally, exits sent as reduce-only market orders on breach,
+# only a wide disaster stop rests on the exchange
+VIRTUAL_STOPS_ENABLED      = os.getenv("VIRTUAL_STOPS_ENABLED", "false").lower() == "true"
+VIRTUAL_STOPS_PATH         = os.getenv("VIRTUAL_STOPS_PATH", "data/virtual_stops.json")
+VIRTUAL_STOPS_POLL_SECONDS = float(os.getenv("VIRTUAL_STOPS_POLL_SECONDS", "1"))
+VIRTUAL_STOP_DISASTER_PCT  = float(os.getenv("VIRTUAL_STOP_DISASTER_PCT", "3.0"))  # disaster stop distance beyond the virtual level
+# Exit fills read from account trades since a per-symbol cursor (kept across restarts)
+FILLS_CURSOR_PATH          = os.getenv("FILLS_CURSOR_PATH", "data/fill_cursors.json")
+FILLS_MATCH_PCT            = float(os.getenv("FILLS_MATCH_PCT", "0.3"))  # fill price within this % of a target/stop counts as hitting it
 
 # Ops
 POLL_SECONDS       = int(os.getenv("POLL_SECONDS", "30"))
+BAR_SETTLE_SECONDS = float(os.getenv("BAR_SETTLE_SECONDS", "1.5"))  # wait after a bar close (server time) before scanning
+PRECLOSE_WARMUP_SECONDS = float(os.getenv("PRECLOSE_WARMUP_SECONDS", "5"))  # refresh histories this long before a close (0: off)
 TRADES_CSV         = os.getenv("LOG_TRADES_CSV", "trades_futures.csv")
 DRY_RUN            = os.getenv("DRY_RUN", "true").lower() == "true"
 ALLOW_SHORTS       = os.getenv("ALLOW_SHORTS", "true").lower() == "true"  # selling allowed (futures)
@@ -118,11 +148,44 @@ ORPHAN_PROTECT_SECONDS = int(os.getenv("ORPHAN_PROTECT_SECONDS", "45"))
 ORPHAN_MIN_AGE_SECONDS = int(os.getenv("ORPHAN_MIN_AGE_SECONDS", "60"))
 UNIVERSE_MONITOR_SECONDS = int(os.getenv("UNIVERSE_MONITOR_SECONDS", "2"))
 SCAN_WHEN_FLAT_SECONDS = int(os.getenv("SCAN_WHEN_FLAT_SECONDS", "10"))
+SCAN_BUDGET_SECONDS = float(os.getenv("SCAN_BUDGET_SECONDS", "20"))  # time allowed for one strategy scan pass
+SCAN_BATCH_SIZE    = int(os.getenv("SCAN_BATCH_SIZE", "8"))            # symbols fetched together within a scan
+SCAN_MIN_UNIVERSE  = int(os.getenv("SCAN_MIN_UNIVERSE", "5"))          # floor for the cost-adapted universe size
+POSITIONS_TTL_SECONDS  = float(os.getenv("POSITIONS_TTL_SECONDS", "2"))  # shared positions snapshot lifetime
+POSITION_CONFIRM_SECONDS = float(os.getenv("POSITION_CONFIRM_SECONDS", "10"))  # how long a filled entry shows before the exchange lists it
+OPEN_ORDERS_TTL_SECONDS = float(os.getenv("OPEN_ORDERS_TTL_SECONDS", "5"))  # account-wide open-orders index lifetime
+ACCOUNT_TTL_SECONDS = float(os.getenv("ACCOUNT_TTL_SECONDS", "10"))  # cached balance/margin view lifetime
+# Monitor/PnL/virtual-stop/scalp jobs on one scheduler sharing their data fetches (false: one thread each)
+JOBS_ENABLED       = os.getenv("JOBS_ENABLED", "true").lower() == "true"
+QUOTES_TTL_SECONDS = float(os.getenv("QUOTES_TTL_SECONDS", "1"))      # all-symbol book ticker shared by jobs
+UNIVERSE_TTL_SECONDS = float(os.getenv("UNIVERSE_TTL_SECONDS", "30"))  # 24h tickers / volume ranking shared by jobs
+# Adaptive job intervals: faster near stops / in fast markets, slower while flat and calm, stretched near the weight limit
+PACING_ENABLED     = os.getenv("PACING_ENABLED", "true").lower() == "true"
+PACING_FAST_FACTOR = float(os.getenv("PACING_FAST_FACTOR", "0.5"))    # x the configured interval when hot
+PACING_SLOW_FACTOR = float(os.getenv("PACING_SLOW_FACTOR", "3"))      # x the configured interval when idle
+PACING_NEAR_STOP_PCT = float(os.getenv("PACING_NEAR_STOP_PCT", "0.5"))  # stop this close to price (%) = hot
+PACING_HOT_MOVE_PCT = float(os.getenv("PACING_HOT_MOVE_PCT", "0.3"))  # % per sqrt-minute price movement = hot
+PACING_BUDGET_SHARE = float(os.getenv("PACING_BUDGET_SHARE", "0.7"))  # used weight share where intervals stretch
+PACING_MIN_SECONDS = float(os.getenv("PACING_MIN_SECONDS", "0.5"))
+
+# Stored candle history (backtests / replay)
+HISTORY_DIR        = os.getenv("HISTORY_DIR", "data/ohlcv")
+
+# Simulated exchange (EXCHANGE=sim): paper trading / load tests against stored 1m candles
+SIM_START          = os.getenv("SIM_START", "").strip()          # UTC ISO time; empty = 7 days into the history
+SIM_SPEED          = float(os.getenv("SIM_SPEED", "1"))          # replay speed vs wall clock (CLOCK=accelerated)
+SIM_END            = os.getenv("SIM_END", "").strip()            # UTC ISO time; CLOCK=simulated stops the replay here
+# Bot clock under EXCHANGE=sim: accelerated (wall clock * SIM_SPEED) or simulated (deterministic, as fast as possible)
+CLOCK              = os.getenv("CLOCK", "accelerated").strip().lower()
+SIM_BALANCE_USDT   = float(os.getenv("SIM_BALANCE_USDT", "1000"))
+SIM_FEE_PCT        = float(os.getenv("SIM_FEE_PCT", "0.04"))     # taker fee per fill, percent
+SIM_SYMBOLS        = [s.strip() for s in os.getenv("SIM_SYMBOLS", "").split(",") if s.strip()]
 
 # Scalp 1m dedicated worker
 SCALP1M_ENABLED = os.getenv("SCALP1M_ENABLED", "false").lower() == "true"
 SCALP1M_UNIVERSE_SIZE = int(os.getenv("SCALP1M_UNIVERSE_SIZE", "200"))
 SCALP1M_REFRESH_SECONDS = int(os.getenv("SCALP1M_REFRESH_SECONDS", "3"))
+SCALP1M_SCAN_BUDGET_SECONDS = float(os.getenv("SCALP1M_SCAN_BUDGET_SECONDS", "10"))  # per scan; the rest waits for the next tick
 SCALP1M_MAX_POSITIONS = int(os.getenv("SCALP1M_MAX_POSITIONS", "5"))
 SCALP1M_BLACKLIST_HOURS = float(os.getenv("SCALP1M_BLACKLIST_HOURS", "2"))
 SCALP1M_MARGIN_FRACTION = float(os.getenv("SCALP1M_MARGIN_FRACTION", "0.05"))  # 5% of available margin
@@ -1,10 +1,11 @@
 import ccxt
 
-from .config import EXCHANGE_ID, API_KEY, API_SECRET, USE_TESTNET, LEVERAGE, MARGIN_MODE
+from .config import EXCHANGE_ID, EXCHANGE_API_URL, REQUEST_SCHEDULER_ENABLED, GATEWAY_ENABLED, RESILIENCE_ENABLED, API_KEY, API_SECRET, USE_TESTNET, LEVERAGE, MARGIN_MODE
+from .leverage import LEVERAGES
 from .utils import log
 
 
-def exchange():
+def _ccxt_client():
     klass = getattr(ccxt, EXCHANGE_ID)
     ex = klass({
         "apiKey": API_KEY,
@@ -15,26 +16,42 @@ def exchange():
             "adjustForTimeDifference": True,
         },
     })
-    try:
-        ex.set_sandbox_mode(USE_TESTNET)
-        log("Sandbox mode:", USE_TESTNET)
-    except Exception:
-        pass
+    if EXCHANGE_API_URL:
+        # Local REST stand-in (bot/mock_api.py): real ccxt stack, simulated venue
+        from .mock_api import point_ccxt_at
+        point_ccxt_at(ex, EXCHANGE_API_URL)
+    else:
+        try:
+            ex.set_sandbox_mode(USE_TESTNET)
+        except Exception:
+            pass
     return ex
 
 
-def set_leverage_and_margin(ex, symbol: str):
-    try:
-        if hasattr(ex, "set_leverage"):
-            ex.set_leverage(LEVERAGE, symbol=symbol)
-            log("set_leverage ok", symbol, LEVERAGE)
-    except Exception as e:
-        log("set_leverage failed", symbol, str(e))
-    try:
-        if hasattr(ex, "set_margin_mode"):
-            ex.set_margin_mode(MARGIN_MODE, symbol=symbol)
-            log("set_margin_mode ok", symbol, MARGIN_MODE)
-    except Exception as e:
-        log("set_margin_mode failed", symbol, str(e))
+def exchange():
+    if EXCHANGE_ID == "sim":
+        from .sim_exchange import sim_from_env
+        return sim_from_env()
+    if EXCHANGE_API_URL:
+        log("Exchange API url:", EXCHANGE_API_URL)
+    else:
+        log("Sandbox mode:", USE_TESTNET)
+    if GATEWAY_ENABLED:
+        # One keep-alive ccxt session per worker thread, sharing markets and the time offset
+        from .gateway import ExchangeGateway
+        ex = ExchangeGateway(_ccxt_client)
+    else:
+        ex = _ccxt_client()
+    if REQUEST_SCHEDULER_ENABLED:
+        from .request_scheduler import scheduled_exchange
+        ex = scheduled_exchange(ex)
+    if RESILIENCE_ENABLED:
+        # Outermost, so every retry is admitted (and charged) by the scheduler again
+        from .resilience import resilient_exchange
+        ex = resilient_exchange(ex)
+    return ex
 
 
+def set_leverage_and_margin(ex, symbol: str):
+    # Only the settings that differ from the cached exchange state are sent
+    LEVERAGES.ensure(ex, symbol, LEVERAGE, MARGIN_MODE)
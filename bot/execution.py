@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from . import clock
+from .account import ACCOUNT
+from .leverage import LEVERAGES
+from .orders import cancel_reduce_only_orders, place_bracket_orders, place_multi_target_orders
+from .positions import POSITIONS
+from .state import STATE
+from .utils import log
+
+# Latest intents kept for metrics.execution
+RECENT = 20
+
+
+@dataclass
+class OrderIntent:
+    """An entry some strategy or worker wants on the exchange, placed by the ExecutionEngine.
+
+    The default placement is a bracket (stop + take_profit) or, with targets/splits, the multi-target
+    ladder. `place(ex, intent)` replaces it for custom legs; `on_done(intent, result, error)` runs after
+    placement on the engine thread for bookkeeping.
+    """
+    symbol: str
+    side: str                         # "buy" | "sell"
+    qty: float
+    entry_price: float
+    stop: Optional[float] = None
+    take_profit: Optional[float] = None
+    targets: Optional[list] = None
+    splits: Optional[list] = None
+    leverage: Optional[int] = None    # with margin_mode: settings ensured before placement
+    margin_mode: Optional[str] = None
+    cancel_exits: bool = True         # clear stale reduce-only exits on the symbol first
+    source: str = ""
+    place: Optional[Callable[[Any, "OrderIntent"], Any]] = None
+    on_done: Optional[Callable[["OrderIntent", Any, Optional[Exception]], None]] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def notional(self) -> float:
+        return float(self.qty) * float(self.entry_price)
+
+
+def entry_fill(order) -> Optional[tuple]:
+    """(filled qty, average price) from an entry order response; None when it carries no fill (ACK, dry run)."""
+    if not isinstance(order, dict):
+        return None
+    info = order.get("info") or {}
+    try:
+        filled = float(order.get("filled") or info.get("executedQty") or 0)
+        avg = float(order.get("average") or info.get("avgPrice") or 0)
+    except (TypeError, ValueError):
+        return None
+    return (filled, avg) if filled > 0 and avg > 0 else None
+
+
+def _place(ex, intent: OrderIntent):
+    if intent.place is not None:
+        return intent.place(ex, intent)
+    if intent.targets and intent.splits:
+        return place_multi_target_orders(ex, intent.symbol, intent.side, intent.qty, intent.entry_price,
+                                         intent.stop, intent.targets, intent.splits)
+    return place_bracket_orders(ex, intent.symbol, intent.side, intent.qty, intent.entry_price,
+                                intent.stop, intent.take_profit)
+
+
+class ExecutionEngine:
+    """Places order intents from every strategy and worker.
+
+    Intents for different symbols run concurrently on a small pool, so one slow symbol does not hold up
+    the rest; intents for the same symbol run one after another in submission order. Each intent
+    ensures its leverage/margin settings, optionally clears stale exits, and places its legs while its
+    margin is reserved in the account view. A filled entry is shown as a position straight away
+    (POSITIONS.assume) instead of polling until the exchange lists it. Queue and placement latency per intent are published as
+    metrics.execution. Under the simulated clock intents run inline so replays stay deterministic.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="execution")
+        self._lock = threading.Lock()
+        self._queues: Dict[str, deque] = {}
+        self._draining = set()
+        self._recent: deque = deque(maxlen=RECENT)
+        self.stats = {"submitted": 0, "placed": 0, "failed": 0, "max_queue_ms": 0.0, "max_place_ms": 0.0}
+
+    def submit(self, ex, intent: OrderIntent) -> Future:
+        fut: Future = Future()
+        item = (ex, intent, fut, time.perf_counter())
+        inline = isinstance(clock.get_clock(), clock.SimulatedClock)
+        start = False
+        with self._lock:
+            self.stats["submitted"] += 1
+            if not inline:
+                self._queues.setdefault(intent.symbol, deque()).append(item)
+                start = intent.symbol not in self._draining
+                self._draining.add(intent.symbol)
+        if inline:
+            self._execute(*item)
+        elif start:
+            self._pool.submit(self._drain, intent.symbol)
+        return fut
+
+    def execute(self, ex, intent: OrderIntent):
+        """submit() and wait: returns the placement result or raises its error."""
+        return self.submit(ex, intent).result()
+
+    def run(self, ex, intents: List[OrderIntent]) -> List[tuple]:
+        """Submit all intents at once and wait for every one; returns (intent, result, error) in order."""
+        futures = [(i, self.submit(ex, i)) for i in intents]
+        out = []
+        for intent, fut in futures:
+            try:
+                out.append((intent, fut.result(), None))
+            except Exception as e:
+                out.append((intent, None, e))
+        return out
+
+    def _drain(self, symbol: str):
+        while True:
+            with self._lock:
+                q = self._queues.get(symbol)
+                if not q:
+                    self._queues.pop(symbol, None)
+                    self._draining.discard(symbol)
+                    return
+                item = q.popleft()
+            self._execute(*item)
+
+    def _execute(self, ex, intent: OrderIntent, fut: Future, queued_at: float):
+        t0 = time.perf_counter()
+        result, error = None, None
+        try:
+            if intent.leverage:
+                LEVERAGES.ensure(ex, intent.symbol, intent.leverage, intent.margin_mode)
+            if intent.cancel_exits:
+                cancel_reduce_only_orders(ex, intent.symbol)
+            with ACCOUNT.reserving(ex, intent.notional / max(1.0, float(intent.leverage or 1))):
+                result = _place(ex, intent)
+            fill = entry_fill(result)
+            if fill is not None:
+                # The fill in the order response is the confirmation; the positions book verifies it in the background
+                POSITIONS.assume(ex, intent.symbol, {"side": "long" if intent.side == "buy" else "short",
+                                                     "size": fill[0], "entryPrice": fill[1]})
+        except Exception as e:
+            error = e
+        t1 = time.perf_counter()
+        self._record(intent, (t0 - queued_at) * 1000.0, (t1 - t0) * 1000.0, error)
+        if intent.on_done is not None:
+            try:
+                intent.on_done(intent, result, error)
+            except Exception as e:
+                log("[Execution] on_done failed", intent.symbol, str(e))
+        if error is None:
+            fut.set_result(result)
+        else:
+            fut.set_exception(error)
+
+    def _record(self, intent: OrderIntent, queue_ms: float, place_ms: float, error: Optional[Exception]):
+        with self._lock:
+            self.stats["failed" if error is not None else "placed"] += 1
+            self.stats["max_queue_ms"] = round(max(self.stats["max_queue_ms"], queue_ms), 2)
+            self.stats["max_place_ms"] = round(max(self.stats["max_place_ms"], place_ms), 2)
+            self._recent.append({"symbol": intent.symbol, "source": intent.source, "side": intent.side,
+                                 "queue_ms": round(queue_ms, 2), "place_ms": round(place_ms, 2),
+                                 "error": type(error).__name__ if error is not None else None})
+        self._publish()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "queued": sum(len(q) for q in self._queues.values()), "recent": list(self._recent)}
+
+    def _publish(self):
+        try:
+            STATE.set_metrics("execution", self.snapshot())
+        except Exception:
+            pass
+
+
+EXECUTION = ExecutionEngine()
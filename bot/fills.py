@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from . import clock
+from .config import FILLS_CURSOR_PATH, FILLS_MATCH_PCT
+from .open_orders import OPEN_ORDERS, order_kinds
+from .state import STATE
+from .stops import stop_price_of
+from .utils import log
+
+# Fill kinds emitted for trades that reduce a position
+TP1, TP2, TP3, SL, MANUAL = "TP1", "TP2", "TP3", "SL", "manual"
+_TPS = (TP1, TP2, TP3)
+
+# Latest events kept for metrics.fills
+RECENT = 20
+
+
+@dataclass
+class FillEvent:
+    symbol: str
+    kind: str            # TP1 | TP2 | TP3 | SL | manual
+    qty: float
+    price: float
+    realized_pnl: float
+    ts: int              # exchange trade time, ms
+    order_id: Optional[str] = None
+    trade_id: Optional[str] = None
+
+    @property
+    def tp_stage(self) -> int:
+        """1-3 for take-profit fills, else 0."""
+        return _TPS.index(self.kind) + 1 if self.kind in _TPS else 0
+
+
+def _near(a: float, b: float, pct: float) -> bool:
+    return b > 0 and abs(a - b) / b * 100.0 <= pct
+
+
+class FillTracker:
+    """Exit fills per held symbol, read from the account's trades since a persisted cursor.
+
+    Nothing is requested while a position is unchanged: a symbol's trades are pulled (fetch_my_trades
+    since its cursor, one request) only when its size in the shared positions view changes, when it
+    disappears, or once after a restart for cursors restored from `path`. Each reducing trade becomes a
+    typed FillEvent: the order id is looked up among the symbol's resting exits remembered from the open
+    orders index, falling back to the trade price against those exits, the strategy's targets and its
+    stop (within `match_pct`); TP legs are numbered by the strategy target they hit. Anything else is
+    "manual". Realized PnL is taken from the trade (Binance realizedPnl) or computed from the entry.
+    Totals and recent events are published as metrics.fills.
+    """
+
+    def __init__(self, path: str = FILLS_CURSOR_PATH, match_pct: float = FILLS_MATCH_PCT):
+        self.path = path
+        self.match_pct = float(match_pct)
+        self._lock = threading.RLock()
+        self._cursors: Dict[str, dict] = {}   # symbol -> {ts, ids, side, size, entry}
+        self._exits: Dict[str, Dict[str, tuple]] = {}   # symbol -> {order_id: (kind, stop price)}
+        self._catchup = set()
+        self._loaded = False
+        self._recent: deque = deque(maxlen=RECENT)
+        self.realized: Dict[str, float] = {}
+        self.stats = {"polls": 0, "fetches": 0, "events": 0, "errors": 0, TP1: 0, TP2: 0, TP3: 0, SL: 0, MANUAL: 0}
+
+    # --- persistence ---
+    def load(self):
+        with self._lock:
+            self._loaded = True
+            try:
+                with open(self.path) as f:
+                    self._cursors = {s: dict(v) for s, v in (json.load(f) or {}).items()}
+                # Fills may have happened while we were down
+                self._catchup = set(self._cursors)
+                log("[Fills] restored", len(self._cursors), "cursors from", self.path)
+            except FileNotFoundError:
+                self._cursors = {}
+            except Exception as e:
+                log("[Fills] could not read", self.path, str(e))
+                self._cursors = {}
+
+    def _save(self):
+        try:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._cursors, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log("[Fills] could not persist:", str(e))
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    # --- polling ---
+    def poll(self, ex, positions: dict) -> List[FillEvent]:
+        """New exit fills given the current positions view, oldest first."""
+        with self._lock:
+            self._ensure_loaded()
+            self.stats["polls"] += 1
+            due, changed = [], False
+            for sym, pos in positions.items():
+                size = float(pos.get("size") or 0)
+                cur = self._cursors.get(sym)
+                if cur is None:
+                    # Start at the entry so exits filled before the first look are still read
+                    since = STATE.snapshot().get("last_entry_ts", {}).get(sym) or clock.now()
+                    self._cursors[sym] = {"ts": int(min(since, clock.now()) * 1000), "ids": [],
+                                          "side": pos.get("side"), "size": size, "entry": pos.get("entryPrice")}
+                    changed = True
+                    continue
+                if sym in self._catchup or abs(size - float(cur.get("size") or 0)) > 1e-12:
+                    due.append(sym)
+                cur.update({"side": pos.get("side") or cur.get("side"), "size": size,
+                            "entry": pos.get("entryPrice") or cur.get("entry")})
+            gone = [s for s in self._cursors if s not in positions]
+            due += gone
+        self._remember_exits(ex, positions)
+        events: List[FillEvent] = []
+        for sym in due:
+            events += self._pull(ex, sym)
+        with self._lock:
+            for sym in gone:
+                self._cursors.pop(sym, None)
+                self._exits.pop(sym, None)
+            self._catchup.difference_update(due)
+            if due or changed:
+                self._save()
+        if events:
+            self._publish()
+        return sorted(events, key=lambda e: e.ts)
+
+    def _remember_exits(self, ex, positions: dict):
+        """Resting exits of held symbols, kept so a fill can still be matched once its order is gone."""
+        try:
+            # A stale index is fine here; the orphan sweep keeps it fresh
+            orders = OPEN_ORDERS.orders(ex, kind="reduce_only", max_age=60)
+        except Exception:
+            return
+        seen: Dict[str, Dict[str, tuple]] = {}
+        for o in orders:
+            sym = o.get("symbol")
+            if sym not in positions:
+                continue
+            kinds = order_kinds(o)
+            kind = "tp" if "tp" in kinds else "sl" if "sl" in kinds else None
+            if kind is not None:
+                seen.setdefault(sym, {})[str(o.get("id"))] = (kind, stop_price_of(o))
+        with self._lock:
+            for sym, exits in seen.items():
+                self._exits.setdefault(sym, {}).update(exits)
+
+    def _pull(self, ex, sym: str) -> List[FillEvent]:
+        with self._lock:
+            cur = dict(self._cursors.get(sym) or {})
+        if not cur:
+            return []
+        try:
+            trades = ex.fetch_my_trades(sym, since=int(cur["ts"]))
+            self.stats["fetches"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            log("[Fills] fetch failed", sym, str(e))
+            return []
+        seen = set(cur.get("ids") or [])
+        ts, ids = int(cur["ts"]), list(seen)
+        events = []
+        for t in sorted(trades or [], key=lambda t: int(t.get("timestamp") or 0)):
+            tid, t_ts = str(t.get("id")), int(t.get("timestamp") or 0)
+            if tid in seen or t_ts < ts:
+                continue
+            # `since` is inclusive: trades at the cursor time are told apart by id
+            if t_ts > ts:
+                ts, ids = t_ts, []
+            ids.append(tid)
+            ev = self._classify(sym, t, cur)
+            if ev is not None:
+                events.append(ev)
+                self._record(ev)
+        with self._lock:
+            if sym in self._cursors:
+                self._cursors[sym].update({"ts": ts, "ids": ids})
+        return events
+
+    def _classify(self, sym: str, trade: dict, cur: dict) -> Optional[FillEvent]:
+        side = cur.get("side")
+        if side not in ("long", "short"):
+            return None
+        # Trades on the opening side are the entry (or scale-ins), not exits
+        if trade.get("side") == ("buy" if side == "long" else "sell"):
+            return None
+        price = float(trade.get("price") or 0)
+        qty = float(trade.get("amount") or 0)
+        oid = str(trade.get("order") or (trade.get("info") or {}).get("orderId") or "")
+        with self._lock:
+            exits = dict(self._exits.get(sym) or {})
+        meta = STATE.get_strategy_meta(sym) or {}
+        hit = exits.get(oid)
+        if hit is None:
+            near = [e for e in exits.values() if e[1] and _near(price, e[1], self.match_pct)]
+            hit = min(near, key=lambda e: abs(price - e[1])) if near else None
+        targets = [float(x) for x in (meta.get("targets") or [])[:3]]
+        kind = MANUAL
+        if hit is None or hit[0] == "tp":
+            level = hit[1] if hit is not None and hit[1] else price
+            near = [i for i, t in enumerate(targets) if _near(level, t, self.match_pct)]
+            if near:
+                kind = _TPS[min(near, key=lambda i: abs(level - targets[i]))]
+            elif hit is not None:
+                kind = TP1
+        if hit is not None and hit[0] == "sl":
+            kind = SL
+        elif kind == MANUAL and meta.get("initial_stop") and _near(price, float(meta["initial_stop"]), self.match_pct):
+            kind = SL
+        return FillEvent(sym, kind, qty, price, self._realized(trade, cur, qty, price),
+                         int(trade.get("timestamp") or 0), oid or None, str(trade.get("id")))
+
+    @staticmethod
+    def _realized(trade: dict, cur: dict, qty: float, price: float) -> float:
+        raw = (trade.get("info") or {}).get("realizedPnl")
+        if raw is not None:
+            try:
+                return float(raw)
+            except (TypeError, ValueError):
+                pass
+        entry = float(cur.get("entry") or 0)
+        if not entry:
+            return 0.0
+        return (price - entry) * qty * (1 if cur.get("side") == "long" else -1)
+
+    def _record(self, ev: FillEvent):
+        with self._lock:
+            self.stats["events"] += 1
+            self.stats[ev.kind] += 1
+            self.realized[ev.symbol] = self.realized.get(ev.symbol, 0.0) + ev.realized_pnl
+            self._recent.append(asdict(ev))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "tracked": len(self._cursors),
+                    "realized_total": round(sum(self.realized.values()), 6),
+                    "realized": {s: round(v, 6) for s, v in self.realized.items()}, "recent": list(self._recent)}
+
+    def _publish(self):
+        try:
+            STATE.set_metrics("fills", self.snapshot())
+        except Exception:
+            pass
+
+
+FILLS = FillTracker()
@@ -0,0 +1,132 @@
+import threading
+import time
+from typing import Callable, Dict
+
+from .state import STATE
+
+# ccxt options every session should see as soon as any session (or the master) has loaded them
+SHARED_OPTIONS = ("timeDifference", "leverageBrackets")
+
+# Calls that mutate state all sessions share; one at a time, and only through the master session
+SERIALIZED = ("load_markets", "load_time_difference")
+
+_TIMED_PREFIXES = ("fetch_", "create_", "cancel_", "edit_", "set_", "load_")
+
+
+class ExchangeGateway:
+    """Hands each thread its own keep-alive ccxt session, so concurrent requests overlap instead of
+    queuing on one HTTP connection and racing on one client's per-request state.
+
+    Sessions are built by `factory` on first use and share the master's markets, time offset and
+    leverage brackets. Attribute writes reach every session. Calls are timed per method; counters
+    are published as metrics.gateway.
+    """
+
+    def __init__(self, factory: Callable[[], object]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_master", factory())
+        object.__setattr__(self, "_local", threading.local())
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_serial", threading.Lock())
+        object.__setattr__(self, "_sessions", [])
+        object.__setattr__(self, "_overrides", {})
+        object.__setattr__(self, "latency", {})   # method -> {calls, errors, total_ms, max_ms}
+
+    @property
+    def master(self):
+        return self._master
+
+    def _share(self, src, dst):
+        for key in SHARED_OPTIONS:
+            if key in src.options and dst.options.get(key) is None:
+                dst.options[key] = src.options[key]
+
+    def _ensure_markets(self):
+        if not self._master.markets:
+            with self._serial:
+                if not self._master.markets:
+                    self._master.load_markets()
+
+    def session(self):
+        """This thread's ccxt session (created on first use)."""
+        inst = getattr(self._local, "ex", None)
+        if inst is None:
+            self._ensure_markets()
+            inst = self._factory()
+            for k, v in self._overrides.items():
+                setattr(inst, k, v)
+            inst.set_markets(self._master.markets, self._master.currencies)
+            self._local.ex = inst
+            with self._lock:
+                self._sessions.append(inst)
+        # The master's offset is refreshed by load_markets(reload=True); keep sessions on it
+        if "timeDifference" in self._master.options:
+            inst.options["timeDifference"] = self._master.options["timeDifference"]
+        self._share(self._master, inst)
+        return inst
+
+    def _record(self, name: str, ms: float, ok: bool):
+        with self._lock:
+            s = self.latency.setdefault(name, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+            s["calls"] += 1
+            s["errors"] += 0 if ok else 1
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+        try:
+            STATE.set_metrics("gateway", self.snapshot())
+        except Exception:
+            pass
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            out = {name: {**s, "avg_ms": round(s["total_ms"] / max(1, s["calls"]), 2)} for name, s in self.latency.items()}
+            out["sessions"] = len(self._sessions)
+            return out
+
+    def __getattr__(self, name):
+        if name in SERIALIZED:
+            return self._serialized(name)
+        inst = self.session()
+        attr = getattr(inst, name)
+        if not callable(attr) or not name.startswith(_TIMED_PREFIXES):
+            return attr
+
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            ok = False
+            try:
+                out = attr(*args, **kwargs)
+                ok = True
+                return out
+            finally:
+                self._record(name, (time.perf_counter() - t0) * 1000.0, ok)
+                self._share(inst, self._master)
+
+        return timed
+
+    def _serialized(self, name):
+        def call(*args, **kwargs):
+            with self._serial:
+                t0 = time.perf_counter()
+                ok = False
+                try:
+                    out = getattr(self._master, name)(*args, **kwargs)
+                    ok = True
+                finally:
+                    self._record(name, (time.perf_counter() - t0) * 1000.0, ok)
+            # Hand fresh markets to every session
+            with self._lock:
+                sessions = list(self._sessions)
+            for inst in sessions:
+                inst.set_markets(self._master.markets, self._master.currencies)
+            return out
+
+        return call
+
+    def __setattr__(self, name, value):
+        self._overrides[name] = value
+        setattr(self._master, name, value)
+        with self._lock:
+            sessions = list(self._sessions)
+        for inst in sessions:
+            setattr(inst, name, value)
@@ -0,0 +1,101 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import HISTORY_DIR
+from .utils import log
+
+
+COLUMNS = ["ts", "open", "high", "low", "close", "volume"]
+
+_TF_MS = {"s": 1_000, "m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """'1m' -> 60000, '4h' -> 14400000."""
+    tf = str(timeframe).strip()
+    return int(tf[:-1]) * _TF_MS[tf[-1]]
+
+
+def to_epoch_ms(ts) -> np.ndarray:
+    """Datetime-like values (naive = UTC) -> int64 epoch milliseconds."""
+    ts = pd.to_datetime(pd.Series(ts), utc=True)
+    return ((ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)).to_numpy(dtype="int64")
+
+
+def _encode_symbol(symbol: str) -> str:
+    # BTC/USDT:USDT -> BTC-USDT+USDT (reversible, filesystem safe)
+    return symbol.replace("/", "-").replace(":", "+")
+
+
+def _decode_symbol(name: str) -> str:
+    return name.replace("-", "/").replace("+", ":")
+
+
+def history_path(symbol: str, timeframe: str, root: Optional[str] = None) -> str:
+    return os.path.join(root or HISTORY_DIR, timeframe, f"{_encode_symbol(symbol)}.csv")
+
+
+def stored_symbols(timeframe: str, root: Optional[str] = None) -> List[str]:
+    d = os.path.join(root or HISTORY_DIR, timeframe)
+    if not os.path.isdir(d):
+        return []
+    return sorted(_decode_symbol(f[:-4]) for f in os.listdir(d) if f.endswith(".csv"))
+
+
+def load_history(symbol: str, timeframe: str, root: Optional[str] = None,
+                 start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> pd.DataFrame:
+    """Load stored candles as a frame with the same columns as market_data.fetch_ohlcv_df.
+    `ts` is tz-aware UTC; rows are sorted and de-duplicated. Missing file -> empty frame.
+    """
+    p = history_path(symbol, timeframe, root)
+    if not os.path.exists(p):
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.read_csv(p)
+    if start_ms is not None:
+        df = df[df["ts"] >= int(start_ms)]
+    if end_ms is not None:
+        df = df[df["ts"] < int(end_ms)]
+    df = df.drop_duplicates("ts").sort_values("ts").reset_index(drop=True)
+    df["ts"] = pd.to_datetime(df["ts"], unit="ms", utc=True)
+    return df[COLUMNS]
+
+
+def save_history(symbol: str, timeframe: str, rows, root: Optional[str] = None) -> int:
+    """Merge raw ccxt OHLCV rows ([ts_ms, o, h, l, c, v]) into the store. Returns total stored rows."""
+    p = history_path(symbol, timeframe, root)
+    os.makedirs(os.path.dirname(p), exist_ok=True)
+    new = pd.DataFrame(list(rows), columns=COLUMNS)
+    if os.path.exists(p):
+        new = pd.concat([pd.read_csv(p), new], ignore_index=True)
+    new["ts"] = new["ts"].astype("int64")
+    new = new.drop_duplicates("ts", keep="last").sort_values("ts")
+    new.to_csv(p, index=False)
+    return len(new)
+
+
+def download_history(ex, symbol: str, timeframe: str, since_ms: int, until_ms: Optional[int] = None,
+                     root: Optional[str] = None, page_limit: int = 1000) -> int:
+    """Page through fetch_ohlcv from since_ms to until_ms (exclusive) and store the closed bars."""
+    step = timeframe_ms(timeframe)
+    cursor = int(since_ms)
+    rows = []
+    while until_ms is None or cursor < until_ms:
+        batch = ex.fetch_ohlcv(symbol, timeframe=timeframe, since=cursor, limit=page_limit)
+        if not batch:
+            break
+        rows.extend(r for r in batch if until_ms is None or r[0] < until_ms)
+        last_ts = int(batch[-1][0])
+        if last_ts < cursor:
+            break
+        cursor = last_ts + step
+        if len(batch) < page_limit:
+            break
+    # The newest bar from the exchange may still be forming; only keep closed bars
+    if rows and until_ms is None:
+        rows = rows[:-1]
+    total = save_history(symbol, timeframe, rows, root)
+    log("history stored", symbol, timeframe, f"+{len(rows)}", f"total={total}")
+    return total
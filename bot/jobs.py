@@ -0,0 +1,238 @@
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from . import clock
+from .config import QUOTES_TTL_SECONDS, UNIVERSE_TTL_SECONDS
+from .market_data import rank_usdt_perps, usdt_perp_symbols
+from .open_orders import OPEN_ORDERS
+from .positions import POSITIONS
+from .state import STATE
+from .utils import log
+
+
+def fetch_quotes(ex, symbols: Optional[list] = None) -> Dict[str, dict]:
+    """{symbol: {bid, ask, mid}} for every symbol (or just `symbols`) from one book-ticker request
+    (weight 5 on Binance, 2 for a single symbol)."""
+    has = getattr(ex, "has", None) or {}
+    raw = ex.fetch_bids_asks(symbols) if has.get("fetchBidsAsks") else ex.fetch_tickers(symbols)
+    out = {}
+    for sym, t in (raw or {}).items():
+        info = t.get("info") or {}
+        bid = t.get("bid") or info.get("bidPrice")
+        ask = t.get("ask") or info.get("askPrice")
+        try:
+            bid, ask = float(bid), float(ask)
+        except (TypeError, ValueError):
+            continue
+        if bid > 0 and ask > 0:
+            out[sym] = {"bid": bid, "ask": ask, "mid": (bid + ask) / 2.0}
+    return out
+
+
+class SharedData:
+    """Named data sources shared by every job: a value is fetched once per `max_age` window and handed
+    to all jobs (and threads) asking for it; concurrent askers of a stale value wait for one fetch.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, tuple] = {}   # name -> (fn(ex, shared), max_age)
+        self._lock = threading.Lock()
+        self._flights: Dict[str, threading.Lock] = {}
+        self._values = weakref.WeakKeyDictionary()   # ex -> {name: (ts, value)}
+        self.stats = {"hits": 0, "fetches": 0, "errors": 0}
+
+    def register(self, name: str, fn: Callable, max_age: float):
+        self._providers[name] = (fn, float(max_age))
+        self._flights[name] = threading.Lock()
+
+    def _fresh(self, ex, name: str, max_age: float):
+        with self._lock:
+            entry = (self._values.get(ex) or {}).get(name)
+        if entry is not None and clock.now() - entry[0] <= max_age:
+            return entry
+        return None
+
+    def get(self, ex, name: str, max_age: Optional[float] = None):
+        fn, default_age = self._providers[name]
+        max_age = default_age if max_age is None else float(max_age)
+        entry = self._fresh(ex, name, max_age)
+        if entry is None:
+            with self._flights[name]:
+                entry = self._fresh(ex, name, max_age)
+                if entry is None:
+                    t0 = clock.now()
+                    try:
+                        value = fn(ex, self)
+                    except Exception:
+                        self.stats["errors"] += 1
+                        raise
+                    entry = (t0, value)
+                    with self._lock:
+                        self._values.setdefault(ex, {})[name] = entry
+                    self.stats["fetches"] += 1
+                    return value
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def collect(self, ex, names: Iterable[str]) -> Dict[str, object]:
+        """The named values; a source that fails is left out (and logged) so other jobs still run."""
+        out = {}
+        for name in names:
+            try:
+                out[name] = self.get(ex, name)
+            except Exception as e:
+                log("[Jobs] data source", name, "failed:", str(e))
+        return out
+
+    def invalidate(self, ex=None, name: Optional[str] = None):
+        with self._lock:
+            books = [self._values.get(ex) or {}] if ex is not None else list(self._values.values())
+            for book in books:
+                if name is None:
+                    book.clear()
+                else:
+                    book.pop(name, None)
+
+
+SHARED = SharedData()
+# Positions and open orders have their own shared caches; these entries only make them declarable needs
+SHARED.register("positions", lambda ex, _: POSITIONS.snapshot(ex), 0)
+SHARED.register("open_orders", lambda ex, _: OPEN_ORDERS.orders(ex), 0)
+SHARED.register("quotes", lambda ex, _: fetch_quotes(ex), QUOTES_TTL_SECONDS)
+SHARED.register("tickers", lambda ex, _: ex.fetch_tickers(usdt_perp_symbols(ex)), UNIVERSE_TTL_SECONDS)
+# Every eligible symbol by volume; consumers take the head they need
+SHARED.register("universe", lambda ex, shared: rank_usdt_perps(shared.get(ex, "tickers")), UNIVERSE_TTL_SECONDS)
+
+
+class Job:
+    def __init__(self, name: str, fn: Callable, every: float, needs: Iterable[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.every = float(every)
+        self.needs = tuple(needs)
+        self.next_run = 0.0
+        self.last_start: Optional[float] = None
+        self.interval = self.every
+        self.running = False
+        self.stats = {"runs": 0, "errors": 0, "skipped_busy": 0, "last_ms": 0.0, "max_ms": 0.0}
+
+
+class JobScheduler:
+    """Runs periodic jobs on declared cadences from one thread instead of a sleep loop per worker.
+
+    Each cycle gathers the due jobs, fetches the union of their declared needs once through `shared`,
+    and runs them on a small pool, each with the values it asked for: fn(ex, data). A job never overlaps
+    itself; a run still in progress when it falls due again is skipped. Under the simulated clock jobs
+    run in order on the scheduler thread so replays stay deterministic. With a `pacer` (bot/pacing.py)
+    each cycle's shared data is shown to it and every job's next run follows pacer.interval(every).
+    """
+
+    # Data a pacer reads every cycle
+    PACER_NEEDS = ("positions", "quotes")
+
+    def __init__(self, shared: SharedData = SHARED, max_workers: int = 4, pacer=None):
+        self.shared = shared
+        self.pacer = pacer
+        self.jobs: Dict[str, Job] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+
+    def add(self, name: str, fn: Callable, every: float, needs: Iterable[str] = ()) -> Job:
+        job = Job(name, fn, every, needs)
+        self.jobs[name] = job
+        return job
+
+    def _run(self, ex, job: Job, data: dict):
+        t0 = time.perf_counter()
+        try:
+            job.fn(ex, data)
+        except Exception as e:
+            job.stats["errors"] += 1
+            log(f"[Jobs] {job.name} error:", str(e))
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            with self._lock:
+                job.running = False
+                job.stats["runs"] += 1
+                job.stats["last_ms"] = round(ms, 2)
+                job.stats["max_ms"] = round(max(job.stats["max_ms"], ms), 2)
+
+    def run_due(self, ex) -> list:
+        """Start every due job; returns their names."""
+        now = clock.now()
+        due = []
+        with self._lock:
+            for job in self.jobs.values():
+                if now < job.next_run:
+                    continue
+                job.next_run = now + job.interval
+                job.last_start = now
+                if job.running:
+                    job.stats["skipped_busy"] += 1
+                    continue
+                job.running = True
+                due.append(job)
+        if not due:
+            return []
+        needs = {n for job in due for n in job.needs}
+        if self.pacer is not None:
+            needs.update(self.PACER_NEEDS)
+        data = self.shared.collect(ex, sorted(needs))
+        if self.pacer is not None:
+            self._repace(ex, data)
+        inline = isinstance(clock.get_clock(), clock.SimulatedClock)
+        for job in due:
+            sub = {n: data[n] for n in job.needs if n in data}
+            if inline:
+                self._run(ex, job, sub)
+            else:
+                self._pool.submit(self._run, ex, job, sub)
+        self._publish()
+        return [job.name for job in due]
+
+    def _repace(self, ex, data: dict):
+        try:
+            self.pacer.observe(ex, data)
+        except Exception as e:
+            log("[Jobs] pacer error:", str(e))
+            return
+        with self._lock:
+            # Pending runs move too, so a job slowed while idle speeds up as soon as things heat up
+            for job in self.jobs.values():
+                job.interval = self.pacer.interval(job.every)
+                if job.last_start is not None:
+                    job.next_run = job.last_start + job.interval
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            return min((j.next_run for j in self.jobs.values()), default=None)
+
+    def loop(self, ex):
+        while True:
+            try:
+                self.run_due(ex)
+                STATE.set_thread_status("job_scheduler", {"status": "running", "jobs": sorted(self.jobs)})
+                nxt = self.next_due()
+                clock.sleep(1.0 if nxt is None else max(0.01, nxt - clock.now()))
+            except Exception as e:
+                log("[Jobs] scheduler error:", str(e))
+                clock.sleep(1)
+
+    def start(self, ex) -> threading.Thread:
+        return clock.start_thread(self.loop, args=(ex,), name="job_scheduler")
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            out = {name: {**j.stats, "every": j.every, "interval": round(j.interval, 3), "needs": list(j.needs)}
+                   for name, j in self.jobs.items()}
+        out["data"] = dict(self.shared.stats)
+        return out
+
+    def _publish(self):
+        try:
+            STATE.set_metrics("jobs", self.snapshot())
+        except Exception:
+            pass
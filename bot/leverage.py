@@ -0,0 +1,118 @@
+import threading
+import weakref
+from typing import Dict, Optional
+
+from .state import STATE
+from .utils import log
+
+
+def max_notional_for(tiers, leverage: float) -> Optional[float]:
+    """Largest position notional the leverage tiers allow at `leverage`; None when unknown."""
+    caps = [float(t["maxNotional"]) for t in tiers or []
+            if t.get("maxNotional") is not None and float(t.get("maxLeverage") or 0) >= float(leverage)]
+    return max(caps) if caps else None
+
+
+class LeverageCache:
+    """Each symbol's leverage and margin mode as last seen on the exchange, plus its leverage tiers.
+
+    load() reads every symbol's settings and tiers in bulk; ensure() then only sends set_leverage /
+    set_margin_mode for what actually differs, and records what the exchange accepted. Unknown
+    symbols (bulk load unsupported or failed) are set once and cached from then on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._books = weakref.WeakKeyDictionary()   # ex -> {"settings": {symbol: {...}}, "tiers": {symbol: [...]}}
+        self.stats = {"loads": 0, "skipped": 0, "set_leverage": 0, "set_margin_mode": 0, "errors": 0}
+
+    def _book(self, ex) -> dict:
+        with self._lock:
+            book = self._books.get(ex)
+            if book is None:
+                book = self._books[ex] = {"settings": {}, "tiers": {}}
+            return book
+
+    def load(self, ex):
+        book = self._book(ex)
+        if hasattr(ex, "fetch_leverages"):
+            try:
+                for symbol, lv in (ex.fetch_leverages() or {}).items():
+                    info = lv.get("info") or {}
+                    book["settings"][symbol] = {
+                        "leverage": lv.get("longLeverage") or lv.get("shortLeverage"),
+                        "margin_mode": lv.get("marginMode"),
+                        "max_notional": float(info["maxNotionalValue"]) if info.get("maxNotionalValue") else None,
+                    }
+            except Exception as e:
+                self.stats["errors"] += 1
+                log("fetch_leverages failed:", str(e))
+        if hasattr(ex, "fetch_leverage_tiers"):
+            try:
+                book["tiers"].update(ex.fetch_leverage_tiers() or {})
+            except Exception as e:
+                self.stats["errors"] += 1
+                log("fetch_leverage_tiers failed:", str(e))
+        self.stats["loads"] += 1
+        log("Leverage settings loaded:", len(book["settings"]), "symbols,", len(book["tiers"]), "with tiers")
+        self._publish()
+
+    def settings(self, ex, symbol: str) -> Dict[str, object]:
+        return dict(self._book(ex)["settings"].get(symbol) or {})
+
+    def ensure(self, ex, symbol: str, leverage: int, margin_mode: str):
+        """Bring `symbol` to `leverage`/`margin_mode`, skipping calls whose setting already matches."""
+        cur = self._book(ex)["settings"].setdefault(symbol, {})
+        if hasattr(ex, "set_leverage"):
+            if cur.get("leverage") == int(leverage):
+                self.stats["skipped"] += 1
+            else:
+                try:
+                    res = ex.set_leverage(int(leverage), symbol=symbol) or {}
+                    cur["leverage"] = int(leverage)
+                    # Binance answers with the cap for the new leverage
+                    mnv = res.get("maxNotionalValue") if isinstance(res, dict) else None
+                    cur["max_notional"] = float(mnv) if mnv else None
+                    self.stats["set_leverage"] += 1
+                    log("set_leverage ok", symbol, leverage)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    log("set_leverage failed", symbol, str(e))
+        if hasattr(ex, "set_margin_mode"):
+            if cur.get("margin_mode") == str(margin_mode).lower():
+                self.stats["skipped"] += 1
+            else:
+                try:
+                    ex.set_margin_mode(margin_mode, symbol=symbol)
+                    cur["margin_mode"] = str(margin_mode).lower()
+                    self.stats["set_margin_mode"] += 1
+                    log("set_margin_mode ok", symbol, margin_mode)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    log("set_margin_mode failed", symbol, str(e))
+        self._publish()
+
+    def max_notional(self, ex, symbol: str, leverage: Optional[float] = None) -> Optional[float]:
+        """Notional cap at `leverage` (default: the symbol's current one); None when unknown."""
+        book = self._book(ex)
+        cur = book["settings"].get(symbol) or {}
+        lev = leverage if leverage is not None else cur.get("leverage")
+        if lev is None:
+            return None
+        cap = max_notional_for(book["tiers"].get(symbol), lev)
+        if cap is None and cur.get("leverage") == lev:
+            cap = cur.get("max_notional")
+        return cap
+
+    def notional_allowed(self, ex, symbol: str, notional: float, leverage: Optional[float] = None) -> bool:
+        cap = self.max_notional(ex, symbol, leverage)
+        return cap is None or notional <= cap
+
+    def _publish(self):
+        try:
+            STATE.set_metrics("leverage", self.stats)
+        except Exception:
+            pass
+
+
+LEVERAGES = LeverageCache()
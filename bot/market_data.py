@@ -5,13 +5,13 @@ from .utils import log
 from .config import MIN_24H_QUOTE_VOLUME_USDT, SYMBOL_BLACKLIST as GLOBAL_BLACKLIST, SYMBOL_WHITELIST as GLOBAL_WHITELIST, SYMBOL_EXCLUDE_REGEX
 
 
-def top_usdt_perps(ex, n: int = 12):
+def usdt_perp_symbols(ex) -> list:
     ex.load_markets()
-    symbols = []
-    for s, m in ex.markets.items():
-        if m.get("swap") and m.get("linear") and m.get("quote") == "USDT":
-            symbols.append(s)
-    tickers = ex.fetch_tickers(symbols)
+    return [s for s, m in ex.markets.items() if m.get("swap") and m.get("linear") and m.get("quote") == "USDT"]
+
+
+def rank_usdt_perps(tickers: dict, n: int = None) -> list:
+    """Tradable symbols from a fetch_tickers result, by 24h quote volume (highest first)."""
     scored = []
     rx = re.compile(SYMBOL_EXCLUDE_REGEX) if SYMBOL_EXCLUDE_REGEX else None
     for sym, t in tickers.items():
@@ -28,7 +28,11 @@ def top_usdt_perps(ex, n: int = 12):
             continue
         scored.append((sym, qv))
     scored.sort(key=lambda x: x[1], reverse=True)
-    return [s for s, _ in scored[:n]]
+    return [s for s, _ in (scored if n is None else scored[:n])]
+
+
+def top_usdt_perps(ex, n: int = 12):
+    return rank_usdt_perps(ex.fetch_tickers(usdt_perp_symbols(ex)), n)
 
 
 def fetch_ohlcv_df(ex, symbol: str, timeframe: str, limit: int = 400) -> pd.DataFrame:
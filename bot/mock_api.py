@@ -0,0 +1,606 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import ccxt
+
+from .history import timeframe_ms
+from .sim_exchange import SimExchange, sim_from_env
+from .utils import log
+
+
+# Request weight per (method, path) as documented for USDⓈ-M futures; callables take the request params.
+def _klines_weight(p):
+    n = int(p.get("limit", 500))
+    return 1 if n < 100 else 2 if n < 500 else 5 if n <= 1000 else 10
+
+
+WEIGHTS = {
+    ("GET", "/fapi/v1/ping"): 1,
+    ("GET", "/fapi/v1/time"): 1,
+    ("GET", "/fapi/v1/exchangeInfo"): 1,
+    ("GET", "/fapi/v1/klines"): _klines_weight,
+    ("GET", "/fapi/v1/ticker/24hr"): lambda p: 1 if p.get("symbol") else 40,
+    ("GET", "/fapi/v1/ticker/price"): lambda p: 1 if p.get("symbol") else 2,
+    ("GET", "/fapi/v1/ticker/bookTicker"): lambda p: 2 if p.get("symbol") else 5,
+    ("GET", "/fapi/v1/premiumIndex"): lambda p: 1 if p.get("symbol") else 10,
+    ("GET", "/fapi/v2/positionRisk"): 5,
+    ("GET", "/fapi/v3/positionRisk"): 5,
+    ("GET", "/fapi/v2/balance"): 5,
+    ("GET", "/fapi/v3/balance"): 5,
+    ("GET", "/fapi/v2/account"): 5,
+    ("GET", "/fapi/v3/account"): 5,
+    ("GET", "/fapi/v1/openOrders"): lambda p: 1 if p.get("symbol") else 40,
+    ("GET", "/fapi/v1/openAlgoOrders"): lambda p: 1 if p.get("symbol") else 40,
+    ("GET", "/fapi/v1/order"): 1,
+    ("GET", "/fapi/v1/algoOrder"): 1,
+    ("POST", "/fapi/v1/order"): 0,
+    ("POST", "/fapi/v1/algoOrder"): 0,
+    ("DELETE", "/fapi/v1/order"): 1,
+    ("DELETE", "/fapi/v1/algoOrder"): 1,
+    ("POST", "/fapi/v1/batchOrders"): 5,
+    ("DELETE", "/fapi/v1/batchOrders"): 1,
+    ("DELETE", "/fapi/v1/allOpenOrders"): 1,
+    ("DELETE", "/fapi/v1/algoOpenOrders"): 1,
+    ("GET", "/fapi/v1/userTrades"): 5,
+    ("GET", "/fapi/v1/leverageBracket"): 1,
+    ("GET", "/fapi/v1/symbolConfig"): 5,
+    ("POST", "/fapi/v1/leverage"): 1,
+    ("POST", "/fapi/v1/marginType"): 1,
+}
+
+# Simplified notional tiers served for every symbol: (notionalCap, maxLeverage, maintMarginRatio, cum)
+_BRACKETS = ((50_000, 125, 0.004, 0.0), (250_000, 100, 0.005, 50.0), (1_000_000, 50, 0.01, 1_300.0),
+             (10_000_000, 20, 0.025, 16_300.0), (50_000_000, 10, 0.05, 266_300.0))
+
+
+def _max_notional(leverage: int) -> float:
+    return max(cap for cap, lev, _, _ in _BRACKETS if lev >= leverage)
+
+
+_ERROR_CODES = {
+    ccxt.BadSymbol: (-1121, "Invalid symbol."),
+    ccxt.OrderNotFound: (-2013, "Order does not exist."),
+    ccxt.InsufficientFunds: (-2019, "Margin is insufficient."),
+    ccxt.OrderImmediatelyFillable: (-2021, "Order would immediately trigger."),
+}
+
+_ALGO_STATUS = {"open": "NEW", "closed": "FINISHED", "canceled": "CANCELED", "expired": "EXPIRED"}
+
+
+def _s(x) -> str:
+    return "0" if x is None else f"{float(x):.12f}".rstrip("0").rstrip(".") or "0"
+
+
+class MockFuturesApi:
+    """Local HTTP stand-in for the Binance USDⓈ-M REST endpoints the bot uses, backed by a SimExchange.
+
+    Point a real `ccxt.binanceusdm` at `url` (see EXCHANGE_API_URL) to exercise signing, JSON parsing and
+    the rate limiter end to end. Every response carries X-MBX-USED-WEIGHT-1M; going over `weight_limit` in a
+    minute returns 429, and `ban_after` consecutive 429s turn into a 418 ban for `ban_seconds`. Latency and
+    random 429s can be injected to tune retry/backoff paths. Conditional orders must go through the algo
+    order endpoints, as on the live API since the algo migration (plain /order rejects them with -4120).
+    """
+
+    def __init__(self, sim: SimExchange, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 weight_limit: int = 2400, inject_429_rate: float = 0.0, ban_after: int = 3,
+                 ban_seconds: float = 120.0, seed: Optional[int] = None):
+        self.sim = sim
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.weight_limit = int(weight_limit)
+        self.inject_429_rate = float(inject_429_rate)
+        self.ban_after = int(ban_after)
+        self.ban_seconds = float(ban_seconds)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._minute = 0
+        self._used = 0
+        self._orders_minute = 0
+        self._violations = 0
+        self._banned_until = 0.0
+        self._algo_ids = set()
+        self.stats = {"requests": 0, "weight": 0, "429": 0, "418": 0}
+        self.calls: Counter = Counter()   # (method, path) -> requests received, admitted or not
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # --- server lifecycle ---
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                api._handle(self, "GET")
+
+            def do_POST(self):
+                api._handle(self, "POST")
+
+            def do_DELETE(self):
+                api._handle(self, "DELETE")
+
+            def do_PUT(self):
+                api._handle(self, "PUT")
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        log("[MockApi] listening on", self.url)
+        return self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # --- rate limits ---
+    def _admit(self, weight: int, is_order: bool):
+        """Returns (status, headers, error_body or None) after charging the request against the minute window."""
+        now = time.time()
+        with self._lock:
+            minute = int(now // 60)
+            if minute != self._minute:
+                self._minute, self._used, self._orders_minute = minute, 0, 0
+            retry_after = str(max(1, int((minute + 1) * 60 - now)))
+            if now < self._banned_until:
+                self.stats["418"] += 1
+                until = int(self._banned_until * 1000)
+                return 418, {"Retry-After": str(max(1, int(self._banned_until - now)))}, {
+                    "code": -1003, "msg": f"Way too many requests; IP(127.0.0.1) banned until {until}. "
+                                          "Please use the websocket for live updates to avoid bans."}
+            over = self._used + weight > self.weight_limit
+            if over or (self.inject_429_rate and self._rng.random() < self.inject_429_rate):
+                self._violations += 1
+                if self._violations >= self.ban_after > 0:
+                    self._banned_until = now + self.ban_seconds
+                    self._violations = 0
+                self.stats["429"] += 1
+                return 429, {"Retry-After": retry_after, "X-MBX-USED-WEIGHT-1M": str(self._used)}, {
+                    "code": -1003, "msg": f"Too many requests; current limit of IP(127.0.0.1) is {self.weight_limit} "
+                                          "requests per minute. Please use the websocket for live updates to avoid polling the API."}
+            self._violations = 0
+            self._used += weight
+            self.stats["requests"] += 1
+            self.stats["weight"] += weight
+            headers = {"X-MBX-USED-WEIGHT-1M": str(self._used)}
+            if is_order:
+                self._orders_minute += 1
+                headers["X-MBX-ORDER-COUNT-1M"] = str(self._orders_minute)
+            return 200, headers, None
+
+    def _sleep_latency(self):
+        delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    # --- request handling ---
+    def _handle(self, req: BaseHTTPRequestHandler, method: str):
+        parts = urlsplit(req.path)
+        params = dict(parse_qsl(parts.query))
+        length = int(req.headers.get("Content-Length") or 0)
+        if length:
+            params.update(parse_qsl(req.rfile.read(length).decode()))
+        path = parts.path
+        with self._lock:
+            self.calls[(method, path)] += 1
+        self._sleep_latency()
+        w = WEIGHTS.get((method, path))
+        weight = w(params) if callable(w) else int(w or 1)
+        status, headers, body = self._admit(weight, method == "POST" and path.endswith("rder"))
+        if body is None:
+            try:
+                route = self._routes().get((method, path))
+                if route is None:
+                    status, body = 404, {"code": -5000, "msg": f"Path {path}, Method {method} is invalid"}
+                else:
+                    body = route(params)
+            except Exception as e:
+                status, body = 400, self._error_body(e)
+        raw = json.dumps(body).encode()
+        req.send_response(status)
+        req.send_header("Content-Type", "application/json")
+        req.send_header("Content-Length", str(len(raw)))
+        for k, v in headers.items():
+            req.send_header(k, v)
+        req.end_headers()
+        req.wfile.write(raw)
+
+    @staticmethod
+    def _error_body(e: Exception) -> dict:
+        m = re.search(r"(-\d{4})\s+(.*)", str(e))
+        if m:
+            return {"code": int(m.group(1)), "msg": m.group(2).split(" sim ")[0].strip()}
+        for klass, (code, msg) in _ERROR_CODES.items():
+            if isinstance(e, klass):
+                return {"code": code, "msg": msg}
+        return {"code": -1000, "msg": str(e)}
+
+    def _routes(self):
+        return {
+            ("GET", "/fapi/v1/ping"): lambda p: {},
+            ("GET", "/fapi/v1/time"): lambda p: {"serverTime": self.sim.fetch_time()},
+            ("GET", "/fapi/v1/exchangeInfo"): self._exchange_info,
+            ("GET", "/fapi/v1/klines"): self._klines,
+            ("GET", "/fapi/v1/ticker/24hr"): self._ticker_24hr,
+            ("GET", "/fapi/v1/ticker/price"): self._ticker_price,
+            ("GET", "/fapi/v1/ticker/bookTicker"): self._book_ticker,
+            ("GET", "/fapi/v1/premiumIndex"): self._premium_index,
+            ("GET", "/fapi/v2/positionRisk"): lambda p: self._position_risk(p, all_symbols=True),
+            ("GET", "/fapi/v3/positionRisk"): lambda p: self._position_risk(p, all_symbols=False),
+            ("GET", "/fapi/v2/balance"): self._balance,
+            ("GET", "/fapi/v3/balance"): self._balance,
+            ("GET", "/fapi/v2/account"): self._account,
+            ("GET", "/fapi/v3/account"): self._account,
+            ("GET", "/fapi/v1/openOrders"): lambda p: self._open_orders(p, algo=False),
+            ("GET", "/fapi/v1/openAlgoOrders"): lambda p: self._open_orders(p, algo=True),
+            ("GET", "/fapi/v1/order"): lambda p: self._get_order(p, algo=False),
+            ("GET", "/fapi/v1/algoOrder"): lambda p: self._get_order(p, algo=True),
+            ("POST", "/fapi/v1/order"): lambda p: self._new_order(p, algo=False),
+            ("POST", "/fapi/v1/algoOrder"): lambda p: self._new_order(p, algo=True),
+            ("DELETE", "/fapi/v1/order"): lambda p: self._cancel_order(p, algo=False),
+            ("DELETE", "/fapi/v1/algoOrder"): lambda p: self._cancel_order(p, algo=True),
+            ("POST", "/fapi/v1/batchOrders"): self._batch_orders,
+            ("DELETE", "/fapi/v1/batchOrders"): self._batch_cancel,
+            ("DELETE", "/fapi/v1/allOpenOrders"): lambda p: self._cancel_all(p, algo=False),
+            ("DELETE", "/fapi/v1/algoOpenOrders"): lambda p: self._cancel_all(p, algo=True),
+            ("GET", "/fapi/v1/userTrades"): self._user_trades,
+            ("GET", "/fapi/v1/leverageBracket"): self._leverage_bracket,
+            ("GET", "/fapi/v1/symbolConfig"): self._symbol_config,
+            ("POST", "/fapi/v1/leverage"): self._leverage,
+            ("POST", "/fapi/v1/marginType"): self._margin_type,
+        }
+
+    # --- symbol mapping ---
+    def _unified(self, market_id: str) -> str:
+        for sym, m in self.sim.markets.items():
+            if m["id"] == market_id:
+                return sym
+        raise ccxt.BadSymbol(market_id)
+
+    def _symbols(self, p) -> list:
+        return [self._unified(p["symbol"])] if p.get("symbol") else list(self.sim.markets)
+
+    # --- market data ---
+    def _exchange_info(self, p):
+        symbols = []
+        for m in self.sim.markets.values():
+            tick, step = m["precision"]["price"], m["precision"]["amount"]
+            symbols.append({
+                "symbol": m["id"], "pair": m["id"], "contractType": "PERPETUAL", "deliveryDate": 4133404800000,
+                "onboardDate": 1569398400000, "status": "TRADING", "baseAsset": m["base"], "quoteAsset": "USDT",
+                "marginAsset": "USDT", "pricePrecision": 8, "quantityPrecision": 8, "baseAssetPrecision": 8,
+                "quotePrecision": 8, "underlyingType": "COIN", "triggerProtect": "0.0500",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "minPrice": _s(tick), "maxPrice": "1000000", "tickSize": _s(tick)},
+                    {"filterType": "LOT_SIZE", "minQty": _s(step), "maxQty": "1000000000", "stepSize": _s(step)},
+                    {"filterType": "MARKET_LOT_SIZE", "minQty": _s(step), "maxQty": "1000000000", "stepSize": _s(step)},
+                    {"filterType": "MAX_NUM_ORDERS", "limit": 200},
+                    {"filterType": "MAX_NUM_ALGO_ORDERS", "limit": 10},
+                    {"filterType": "MIN_NOTIONAL", "notional": "5"},
+                ],
+                "orderTypes": ["LIMIT", "MARKET", "STOP_MARKET", "TAKE_PROFIT_MARKET"],
+                "timeInForce": ["GTC", "IOC", "FOK", "GTX"],
+            })
+        return {
+            "timezone": "UTC", "serverTime": self.sim.fetch_time(), "futuresType": "U_MARGINED",
+            "rateLimits": [
+                {"rateLimitType": "REQUEST_WEIGHT", "interval": "MINUTE", "intervalNum": 1, "limit": self.weight_limit},
+                {"rateLimitType": "ORDERS", "interval": "MINUTE", "intervalNum": 1, "limit": 1200},
+            ],
+            "exchangeFilters": [], "assets": [{"asset": "USDT", "marginAvailable": True}], "symbols": symbols,
+        }
+
+    def _klines(self, p):
+        sym = self._unified(p["symbol"])
+        tf = p.get("interval", "1m")
+        since = int(p["startTime"]) if p.get("startTime") else None
+        rows = self.sim.fetch_ohlcv(sym, tf, since=since, limit=int(p.get("limit", 500)))
+        end = int(p["endTime"]) if p.get("endTime") else None
+        tf_ms = timeframe_ms(tf)
+        out = []
+        for t, o, h, l, c, v in rows:
+            if end is not None and t > end:
+                break
+            out.append([t, _s(o), _s(h), _s(l), _s(c), _s(v), t + tf_ms - 1, _s(v * c), 0, "0", "0", "0"])
+        return out
+
+    def _ticker_24hr(self, p):
+        out = []
+        for sym in self._symbols(p):
+            t = self.sim.fetch_ticker(sym)
+            out.append({
+                "symbol": self.sim.markets[sym]["id"], "lastPrice": _s(t["last"]), "openPrice": _s(t["last"]),
+                "highPrice": _s(t["last"]), "lowPrice": _s(t["last"]), "priceChange": "0", "priceChangePercent": "0",
+                "weightedAvgPrice": _s(t["last"]), "lastQty": "0", "volume": _s(t["quoteVolume"] / t["last"]),
+                "quoteVolume": _s(t["quoteVolume"]), "openTime": t["timestamp"] - 86_400_000,
+                "closeTime": t["timestamp"], "firstId": 0, "lastId": 0, "count": 0,
+            })
+        return out[0] if p.get("symbol") else out
+
+    def _ticker_price(self, p):
+        out = [{"symbol": self.sim.markets[s]["id"], "price": _s(t["last"]), "time": t["timestamp"]}
+               for s in self._symbols(p) for t in [self.sim.fetch_ticker(s)]]
+        return out[0] if p.get("symbol") else out
+
+    def _book_ticker(self, p):
+        out = [{"symbol": self.sim.markets[s]["id"], "bidPrice": _s(t["bid"]), "bidQty": "1000",
+                "askPrice": _s(t["ask"]), "askQty": "1000", "time": t["timestamp"]}
+               for s in self._symbols(p) for t in [self.sim.fetch_ticker(s)]]
+        return out[0] if p.get("symbol") else out
+
+    def _premium_index(self, p):
+        out = [{"symbol": self.sim.markets[s]["id"], "markPrice": _s(t["last"]), "indexPrice": _s(t["last"]),
+                "estimatedSettlePrice": _s(t["last"]), "lastFundingRate": "0", "interestRate": "0",
+                "nextFundingTime": (t["timestamp"] // 28_800_000 + 1) * 28_800_000, "time": t["timestamp"]}
+               for s in self._symbols(p) for t in [self.sim.fetch_ticker(s)]]
+        return out[0] if p.get("symbol") else out
+
+    # --- account ---
+    def _position_risk(self, p, all_symbols: bool):
+        wanted = self._symbols(p)
+        live = {x["symbol"]: x for x in self.sim.fetch_positions(wanted)}
+        now = self.sim.fetch_time()
+        out = []
+        for sym in wanted:
+            x = live.get(sym)
+            if x is None and not all_symbols:
+                continue
+            amt = (x["contracts"] if x["side"] == "long" else -x["contracts"]) if x else 0.0
+            mark = x["markPrice"] if x else self.sim.fetch_ticker(sym)["last"]
+            out.append({
+                "symbol": self.sim.markets[sym]["id"], "positionSide": "BOTH", "positionAmt": _s(amt),
+                "entryPrice": _s(x["entryPrice"] if x else 0), "breakEvenPrice": _s(x["entryPrice"] if x else 0),
+                "markPrice": _s(mark), "unRealizedProfit": _s(x["unrealizedPnl"] if x else 0),
+                "liquidationPrice": "0", "notional": _s(amt * mark), "marginAsset": "USDT",
+                "initialMargin": _s(x["initialMargin"] if x else 0),
+                "positionInitialMargin": _s(x["initialMargin"] if x else 0), "maintMargin": "0",
+                "isolatedMargin": "0", "isolatedWallet": "0", "adl": 0, "bidNotional": "0", "askNotional": "0",
+                "leverage": str(x["leverage"] if x else self.sim._leverage.get(sym, self.sim._default_leverage)),
+                "marginType": (x["marginMode"] if x else "cross"), "isolated": bool(x and x["marginMode"] == "isolated"),
+                "maxNotionalValue": "1000000", "updateTime": now,
+            })
+        return out
+
+    def _asset_row(self):
+        b = self.sim.fetch_balance()
+        wallet = float(b["info"]["totalWalletBalance"])
+        upnl = b["total"]["USDT"] - wallet
+        return {
+            "accountAlias": "SimUSDT", "asset": "USDT", "walletBalance": _s(wallet), "balance": _s(wallet),
+            "crossWalletBalance": _s(wallet), "crossUnPnl": _s(upnl), "unrealizedProfit": _s(upnl),
+            "marginBalance": _s(b["total"]["USDT"]), "availableBalance": _s(b["free"]["USDT"]),
+            "maxWithdrawAmount": _s(b["free"]["USDT"]), "initialMargin": _s(b["used"]["USDT"]),
+            "maintMargin": "0", "positionInitialMargin": _s(b["used"]["USDT"]), "openOrderInitialMargin": "0",
+            "marginAvailable": True, "updateTime": self.sim.fetch_time(),
+        }
+
+    def _balance(self, p):
+        return [self._asset_row()]
+
+    def _account(self, p):
+        a = self._asset_row()
+        return {
+            "totalWalletBalance": a["walletBalance"], "totalUnrealizedProfit": a["unrealizedProfit"],
+            "totalMarginBalance": a["marginBalance"], "totalInitialMargin": a["initialMargin"],
+            "totalMaintMargin": "0", "availableBalance": a["availableBalance"],
+            "maxWithdrawAmount": a["maxWithdrawAmount"], "assets": [a],
+            "positions": self._position_risk({}, all_symbols=False),
+        }
+
+    def _leverage_bracket(self, p):
+        out = []
+        for sym in self._symbols(p):
+            floor, brackets = 0, []
+            for i, (cap, lev, mmr, cum) in enumerate(_BRACKETS, start=1):
+                brackets.append({"bracket": i, "initialLeverage": lev, "notionalCap": cap, "notionalFloor": floor,
+                                 "maintMarginRatio": mmr, "cum": cum})
+                floor = cap
+            out.append({"symbol": self.sim.markets[sym]["id"], "notionalCoef": 1.0, "brackets": brackets})
+        return out[0] if p.get("symbol") else out
+
+    def _symbol_config(self, p):
+        out = []
+        for sym in self._symbols(p):
+            lev = self.sim._leverage.get(sym, self.sim._default_leverage)
+            out.append({"symbol": self.sim.markets[sym]["id"], "leverage": lev,
+                        "marginType": "ISOLATED" if self.sim._margin_mode.get(sym) == "isolated" else "CROSSED",
+                        "isAutoAddMargin": "false", "maxNotionalValue": _s(_max_notional(lev))})
+        return out
+
+    def _leverage(self, p):
+        sym = self._unified(p["symbol"])
+        self.sim.set_leverage(int(p["leverage"]), sym)
+        return {"symbol": p["symbol"], "leverage": int(p["leverage"]),
+                "maxNotionalValue": _s(_max_notional(int(p["leverage"])))}
+
+    def _margin_type(self, p):
+        self.sim.set_margin_mode(str(p["marginType"]).lower(), self._unified(p["symbol"]))
+        return {"code": 200, "msg": "success"}
+
+    # --- orders ---
+    def _order_json(self, o: dict) -> dict:
+        info = o["info"]
+        return {
+            "orderId": int(o["id"]), "symbol": info["symbol"], "status": info["status"],
+            "clientOrderId": o["clientOrderId"], "price": _s(o["price"]), "avgPrice": _s(o["average"]),
+            "origQty": _s(o["amount"]), "executedQty": _s(o["filled"]), "cumQuote": _s(o["cost"]),
+            "timeInForce": o["timeInForce"], "type": info["type"], "origType": info["origType"],
+            "reduceOnly": bool(o["reduceOnly"]), "closePosition": bool(info["closePosition"]),
+            "side": info["side"], "positionSide": "BOTH", "stopPrice": _s(o["stopPrice"]),
+            "workingType": info["workingType"], "priceProtect": False, "priceMatch": "NONE",
+            "selfTradePreventionMode": "NONE", "goodTillDate": 0,
+            "time": o["timestamp"], "updateTime": o["lastTradeTimestamp"] or o["timestamp"],
+        }
+
+    def _algo_json(self, o: dict) -> dict:
+        info = o["info"]
+        return {
+            "algoId": int(o["id"]), "clientAlgoId": o["clientOrderId"], "algoType": "CONDITIONAL",
+            "orderType": info["type"], "symbol": info["symbol"], "side": info["side"], "positionSide": "BOTH",
+            "timeInForce": o["timeInForce"], "quantity": _s(o["amount"]), "algoStatus": _ALGO_STATUS[o["status"]],
+            "triggerPrice": _s(o["stopPrice"]), "price": _s(o["price"]), "icebergQuantity": None,
+            "selfTradePreventionMode": "NONE", "workingType": info["workingType"], "priceMatch": "NONE",
+            "closePosition": bool(info["closePosition"]), "priceProtect": False, "reduceOnly": bool(o["reduceOnly"]),
+            "createTime": o["timestamp"], "updateTime": o["lastTradeTimestamp"] or o["timestamp"],
+            "triggerTime": o["lastTradeTimestamp"] if o["status"] == "closed" else 0, "goodTillDate": 0,
+        }
+
+    def _find(self, p, algo: bool) -> dict:
+        oid = p.get("algoId") if algo else p.get("orderId")
+        if oid is None:
+            client = p.get("clientAlgoId") if algo else p.get("origClientOrderId")
+            matches = [o for o in self.sim._orders.values() if o["clientOrderId"] == client]
+            if not matches:
+                raise ccxt.OrderNotFound("sim -2013 Order does not exist.")
+            oid = matches[-1]["id"]
+        if (str(oid) in self._algo_ids) != algo:
+            raise ccxt.OrderNotFound("sim -2013 Order does not exist.")
+        return self.sim.fetch_order(str(oid))
+
+    def _open_orders(self, p, algo: bool):
+        sym = self._unified(p["symbol"]) if p.get("symbol") else None
+        fmt = self._algo_json if algo else self._order_json
+        return [fmt(o) for o in self.sim.fetch_open_orders(sym) if (o["id"] in self._algo_ids) == algo]
+
+    def _get_order(self, p, algo: bool):
+        o = self._find(p, algo)
+        return self._algo_json(o) if algo else self._order_json(o)
+
+    def _new_order(self, p, algo: bool):
+        t = str(p.get("type", "")).upper()
+        conditional = t in ("STOP_MARKET", "TAKE_PROFIT_MARKET", "STOP", "TAKE_PROFIT", "TRAILING_STOP_MARKET")
+        if conditional != algo:
+            if algo:
+                raise ccxt.InvalidOrder("sim -4500 Invalid algo order type.")
+            raise ccxt.InvalidOrder("sim -4120 Order type not supported for this endpoint. "
+                                    "Please use the Algo Order API endpoints instead.")
+        params = {}
+        if str(p.get("closePosition", "")).lower() == "true":
+            params["closePosition"] = True
+        if str(p.get("reduceOnly", "")).lower() == "true":
+            params["reduceOnly"] = True
+        stop = p.get("triggerPrice") if algo else p.get("stopPrice")
+        if stop is not None:
+            params["stopPrice"] = float(stop)
+        for k in ("workingType", "timeInForce"):
+            if p.get(k):
+                params[k] = p[k]
+        client = p.get("clientAlgoId") if algo else p.get("newClientOrderId")
+        if client:
+            params["newClientOrderId"] = client
+        qty = float(p["quantity"]) if p.get("quantity") else None
+        price = float(p["price"]) if p.get("price") else None
+        o = self.sim.create_order(self._unified(p["symbol"]), t, str(p["side"]).lower(), qty, price, params)
+        if algo:
+            self._algo_ids.add(o["id"])
+            return self._algo_json(o)
+        return self._order_json(o)
+
+    def _cancel_order(self, p, algo: bool):
+        o = self._find(p, algo)
+        o = self.sim.cancel_order(o["id"])
+        if algo:
+            return {"algoId": int(o["id"]), "clientAlgoId": o["clientOrderId"], "code": "200", "msg": "success"}
+        return self._order_json(o)
+
+    def _each(self, fn, items):
+        """Batch endpoints answer per item: the result, or that item's error object."""
+        out = []
+        for item in items:
+            try:
+                out.append(fn(item))
+            except Exception as e:
+                out.append(self._error_body(e))
+        return out
+
+    def _batch_orders(self, p):
+        orders = json.loads(p["batchOrders"])
+        if len(orders) > 5:
+            raise ccxt.BadRequest("sim -1130 Data sent for parameter 'batchOrders' is not valid.")
+        return self._each(lambda o: self._new_order(o, algo=False), orders)
+
+    def _batch_cancel(self, p):
+        ids = json.loads(p.get("orderidlist") or "[]")
+        return self._each(lambda i: self._cancel_order({"symbol": p["symbol"], "orderId": str(i)}, algo=False), ids)
+
+    def _cancel_all(self, p, algo: bool):
+        sym = self._unified(p["symbol"])
+        for o in self.sim.fetch_open_orders(sym):
+            if (o["id"] in self._algo_ids) == algo:
+                self.sim.cancel_order(o["id"])
+        return {"code": 200, "msg": "The operation of cancel all open order is done."}
+
+    def _user_trades(self, p):
+        sym = self._unified(p["symbol"])
+        since = int(p["startTime"]) if p.get("startTime") else None
+        trades = self.sim.fetch_my_trades(sym, since=since, limit=int(p.get("limit", 500)))
+        return [{
+            "symbol": self.sim.markets[sym]["id"], "id": int(t["id"]), "orderId": int(t["order"]),
+            "side": t["side"].upper(), "price": _s(t["price"]), "qty": _s(t["amount"]),
+            "realizedPnl": t["info"]["realizedPnl"], "quoteQty": _s(t["cost"]),
+            "commission": _s(t["fee"]["cost"]), "commissionAsset": "USDT", "time": t["timestamp"],
+            "positionSide": "BOTH", "buyer": t["side"] == "buy", "maker": False,
+        } for t in trades]
+
+
+def point_ccxt_at(ex, base_url: str):
+    """Route every USDⓈ-M endpoint of a ccxt binance client to `base_url` (e.g. the mock server)."""
+    base = base_url.rstrip("/")
+    api = ex.urls["api"]
+    for key in list(api):
+        if key.startswith("fapi"):
+            version = {"V2": "v2", "V3": "v3"}.get(key[-2:], "v1")
+            api[key] = f"{base}/futures/data" if key == "fapiData" else f"{base}/fapi/{version}"
+    # Currencies come from the spot sapi, which the stand-in does not serve
+    ex.options["fetchCurrencies"] = False
+    # ccxt picks the linear error-code table by hostname; keep it for the local url so codes map as live
+    linear = ex.exceptions.get("linear", {})
+    ex.get_exceptions_by_url = lambda url, exact_or_broad: linear.get(exact_or_broad, {})
+    return ex
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Serve a Binance USDⓈ-M REST stand-in backed by the sim exchange")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--weight-limit", type=int, default=2400)
+    ap.add_argument("--inject-429-rate", type=float, default=0.0)
+    ap.add_argument("--ban-after", type=int, default=3)
+    ap.add_argument("--ban-seconds", type=float, default=120.0)
+    args = ap.parse_args(argv)
+    api = MockFuturesApi(sim_from_env(), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         weight_limit=args.weight_limit, inject_429_rate=args.inject_429_rate,
+                         ban_after=args.ban_after, ban_seconds=args.ban_seconds)
+    api.start(args.host, args.port)
+    try:
+        while True:
+            time.sleep(60)
+            log("[MockApi] stats", api.stats)
+    except KeyboardInterrupt:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import threading
+import weakref
+from typing import Dict, List, Optional, Set
+
+from . import clock
+from .config import OPEN_ORDERS_TTL_SECONDS
+from .state import STATE
+from .utils import log
+
+
+def _truthy(v) -> bool:
+    return v is True or str(v).lower() == "true"
+
+
+def order_kinds(o: dict) -> Set[str]:
+    """Tags used to look an order up: "sl", "tp", "close_position", "reduce_only" (the last also covers
+    closePosition orders, which never open exposure). Types are read from the raw payload first, since
+    ccxt reports conditional algo orders with a plain unified type.
+    """
+    info = o.get("info") or {}
+    params = o.get("params") or {}
+    t = str(info.get("origType") or info.get("orderType") or info.get("type") or o.get("type") or "").upper()
+    kinds = set()
+    if "TAKE_PROFIT" in t or o.get("takeProfitPrice"):
+        kinds.add("tp")
+    elif "STOP" in t or o.get("stopLossPrice"):
+        kinds.add("sl")
+    if any(_truthy(d.get("closePosition")) for d in (o, info, params)):
+        kinds.add("close_position")
+    if "close_position" in kinds or o.get("reduceOnly") or _truthy(info.get("reduceOnly")) \
+            or _truthy(params.get("reduceOnly")):
+        kinds.add("reduce_only")
+    return kinds
+
+
+class OpenOrdersIndex:
+    """Account-wide open orders per exchange, keyed by symbol, refreshed by one request per `ttl_seconds`.
+
+    Replaces per-symbol fetch_open_orders scans in the orphan sweeps and exit reconcile. Our own
+    cancels are applied to the index directly and our placements invalidate it; anything else (fills,
+    manual orders) shows up on the next refresh.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0):
+        self.ttl_seconds = float(ttl_seconds)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._books = weakref.WeakKeyDictionary()   # ex -> (ts, {symbol: {order_id: order}})
+        self._generation = 0   # bumped by invalidate() so an in-flight fetch cannot store a stale view
+        self.stats = {"hits": 0, "fetches": 0, "errors": 0, "invalidations": 0}
+
+    def _fetch(self, ex) -> Dict[str, Dict[str, dict]]:
+        try:
+            ex.options["warnOnFetchOpenOrdersWithoutSymbol"] = False
+        except Exception:
+            pass
+        raw = list(ex.fetch_open_orders() or [])
+        if getattr(ex, "id", "") in ("binanceusdm", "binance"):
+            # Conditional (STOP/TAKE_PROFIT) orders live in a separate algo-order book on Binance futures
+            raw += list(ex.fetch_open_orders(None, params={"trigger": True}) or [])
+        book: Dict[str, Dict[str, dict]] = {}
+        for o in raw:
+            sym, oid = o.get("symbol"), o.get("id")
+            if sym and oid is not None:
+                book.setdefault(sym, {})[str(oid)] = o
+        return book
+
+    def _fresh(self, ex, max_age: float):
+        with self._lock:
+            entry = self._books.get(ex)
+        if entry is not None and max_age > 0 and clock.now() - entry[0] <= max_age:
+            return entry[1]
+        return None
+
+    def _book(self, ex, max_age: Optional[float]) -> Dict[str, Dict[str, dict]]:
+        max_age = self.ttl_seconds if max_age is None else float(max_age)
+        book = self._fresh(ex, max_age)
+        if book is not None:
+            self.stats["hits"] += 1
+            return book
+        with self._refresh_lock:
+            book = self._fresh(ex, max_age)
+            if book is None:
+                t0 = clock.now()
+                gen = self._generation
+                try:
+                    book = self._fetch(ex)
+                except Exception:
+                    self.stats["errors"] += 1
+                    raise
+                with self._lock:
+                    if gen == self._generation:
+                        self._books[ex] = (t0, book)
+                self.stats["fetches"] += 1
+                self._publish()
+            else:
+                self.stats["hits"] += 1
+        return book
+
+    def orders(self, ex, symbol: Optional[str] = None, kind: Optional[str] = None,
+               max_age: Optional[float] = None) -> List[dict]:
+        """Open orders (optionally for one symbol and/or of one kind); raises if the refresh fails."""
+        book = self._book(ex, max_age)
+        with self._lock:
+            if symbol is None:
+                out = [o for by_id in book.values() for o in by_id.values()]
+            else:
+                out = list(book.get(symbol, {}).values())
+        if kind is not None:
+            out = [o for o in out if kind in order_kinds(o)]
+        return [dict(o) for o in out]
+
+    def symbols(self, ex, max_age: Optional[float] = None) -> Set[str]:
+        book = self._book(ex, max_age)
+        with self._lock:
+            return {s for s, by_id in book.items() if by_id}
+
+    def note_cancelled(self, ex, symbol: str, order_id):
+        with self._lock:
+            entry = self._books.get(ex)
+            if entry is not None:
+                entry[1].get(symbol, {}).pop(str(order_id), None)
+
+    def invalidate(self, ex=None):
+        with self._lock:
+            self._generation += 1
+            if ex is None:
+                self._books.clear()
+            else:
+                self._books.pop(ex, None)
+        self.stats["invalidations"] += 1
+
+    def _publish(self):
+        try:
+            STATE.set_metrics("open_orders", self.stats)
+        except Exception:
+            pass
+
+
+OPEN_ORDERS = OpenOrdersIndex(OPEN_ORDERS_TTL_SECONDS)
+
+
+def open_orders_for(ex, symbol: Optional[str] = None, kind: Optional[str] = None) -> List[dict]:
+    try:
+        return OPEN_ORDERS.orders(ex, symbol, kind)
+    except Exception as e:
+        log("fetch_open_orders failed:", str(e))
+        return []
@@ -1,36 +1,35 @@
-import time
+from . import clock
 
 from .config import DRY_RUN, MIN_NOTIONAL_USDT, BREAKEVEN_AFTER_R, TRAIL_AFTER_R, TRAIL_ATR_MULT, ATR_MULT_SL
 from .risk import round_qty
 from .state import STATE
+from .positions import POSITIONS
+from .open_orders import OPEN_ORDERS, open_orders_for, order_kinds
+from .batch_orders import place_orders, cancel_many
+from .stops import move_stop
 from .utils import log
 
 
+def entry_params(ex) -> dict:
+    """Market-entry params; Binance futures answers ACK by default, RESULT carries the fill (qty, avgPrice)."""
+    return {"newOrderRespType": "RESULT"} if getattr(ex, "id", "") in ("binanceusdm", "binance") else {}
+
+
 def get_open_orders(ex, symbol):
-    try:
-        return ex.fetch_open_orders(symbol)
-    except Exception:
-        return []
+    return open_orders_for(ex, symbol)
 
 
 def get_all_open_orders(ex, symbols):
-    all_orders = {}
-    for sym in symbols:
-        try:
-            all_orders[sym] = ex.fetch_open_orders(sym)
-        except Exception:
-            all_orders[sym] = []
-    return all_orders
+    # One account-wide refresh serves every symbol
+    return {sym: open_orders_for(ex, sym) for sym in symbols}
 
 
 def cancel_reduce_only_orders(ex, symbol):
     try:
-        for o in get_open_orders(ex, symbol):
-            if o.get("reduceOnly"):
-                try:
-                    ex.cancel_order(o["id"], symbol)
-                except Exception:
-                    pass
+        orders = open_orders_for(ex, symbol, kind="reduce_only")
+        if orders:
+            # By id only: the index can miss orders placed since its refresh, which a cancel-all would wipe
+            cancel_many(ex, symbol, orders)
     except Exception:
         pass
 
@@ -38,16 +37,9 @@ def cancel_reduce_only_orders(ex, symbol):
 def cancel_reduce_only_stop_orders(ex, symbol):
     """Cancel only reduce-only stop (SL) orders, keep take-profit orders intact."""
     try:
-        for o in get_open_orders(ex, symbol):
-            if not o.get("reduceOnly"):
-                continue
-            t = (o.get("type") or "").upper()
-            if "TAKE_PROFIT" in t:
-                continue
-            try:
-                ex.cancel_order(o["id"], symbol)
-            except Exception:
-                pass
+        orders = [o for o in open_orders_for(ex, symbol, kind="reduce_only") if "tp" not in order_kinds(o)]
+        if orders:
+            cancel_many(ex, symbol, orders)
     except Exception:
         pass
 
@@ -66,9 +58,10 @@ def place_bracket_orders(ex, symbol, side, qty, entry_price, sl_price, tp_price)
         log(f"[DRY_RUN] ENTRY {side.upper()} {qty} {symbol} @~{entry_price}")
         log(f"[DRY_RUN] SL reduceOnly {opposite.upper()} @ {sl_price}")
         log(f"[DRY_RUN] TP reduceOnly {opposite.upper()} @ {tp_price}")
-        return {"id": f"dry_{int(time.time())}"}
+        return {"id": f"dry_{int(clock.now())}"}
 
-    entry = ex.create_order(symbol, type="market", side=side, amount=qty)
+    entry = ex.create_order(symbol, type="market", side=side, amount=qty, params=entry_params(ex))
+    POSITIONS.invalidate(ex)
     entry_id = entry.get("id") or entry.get("orderId") or ""
     log("ENTRY", entry_id, side, qty, symbol)
     try:
@@ -77,22 +70,26 @@ def place_bracket_orders(ex, symbol, side, qty, entry_price, sl_price, tp_price)
         pass
 
     params = {"reduceOnly": True}
-    try:
-        ex.create_order(symbol, type="STOP_MARKET", side=opposite, amount=qty,
-                        params={**params, "stopPrice": float(sl_price)})
+    # SL and TP go out together, so the position is unprotected for a single round trip
+    (sl, sl_err), (tp, tp_err) = place_orders(ex, [
+        {"symbol": symbol, "type": "STOP_MARKET", "side": opposite, "amount": qty,
+         "params": {**params, "stopPrice": float(sl_price)}},
+        {"symbol": symbol, "type": "TAKE_PROFIT_MARKET", "side": opposite, "amount": qty,
+         "params": {**params, "stopPrice": float(tp_price)}},
+    ])
+    if sl_err is None:
         log("SL placed", sl_price)
         try:
             STATE.mark_exits_placed(symbol)
         except Exception:
             pass
-    except Exception as e:
-        log("Failed to place SL:", str(e))
-    try:
-        ex.create_order(symbol, type="TAKE_PROFIT_MARKET", side=opposite, amount=qty,
-                        params={**params, "stopPrice": float(tp_price)})
+    else:
+        log("Failed to place SL:", str(sl_err))
+    if tp_err is None:
         log("TP placed", tp_price)
-    except Exception as e:
-        log("Failed to place TP:", str(e))
+    else:
+        log("Failed to place TP:", str(tp_err))
+    OPEN_ORDERS.invalidate(ex)
     return entry
 
 
@@ -109,9 +106,10 @@ def place_multi_target_orders(ex, symbol: str, side: str, qty: float, entry_pric
             STATE.mark_entry(symbol)
         except Exception:
             pass
-        return {"id": f"dry_{int(time.time())}"}
+        return {"id": f"dry_{int(clock.now())}"}
 
-    entry = ex.create_order(symbol, type="market", side=side, amount=qty)
+    entry = ex.create_order(symbol, type="market", side=side, amount=qty, params=entry_params(ex))
+    POSITIONS.invalidate(ex)
     log("ENTRY", entry.get("id"), side, qty, symbol)
     try:
         STATE.mark_entry(symbol)
@@ -119,16 +117,6 @@ def place_multi_target_orders(ex, symbol: str, side: str, qty: float, entry_pric
         pass
 
     params = {"reduceOnly": True}
-    try:
-        sl = ex.create_order(symbol, type="STOP_MARKET", side=opposite, amount=qty,
-                             params={**params, "stopPrice": float(initial_sl)})
-        log("SL placed", initial_sl, (sl.get("id") or sl.get("orderId") or ""))
-        try:
-            STATE.mark_exits_placed(symbol)
-        except Exception:
-            pass
-    except Exception as e:
-        log("Failed to place SL:", str(e))
     # Compute rounded partial quantities respecting precision and min step
     # Limit number of partials by min amount step, always ensure a TP at the final target exists
     try:
@@ -178,52 +166,55 @@ def place_multi_target_orders(ex, symbol: str, side: str, qty: float, entry_pric
         placed_sum += max(0.0, r)
         leftover = max(0.0, alloc - r)
 
-    # Place TPs using rounded amounts
-    for i, (t, part_qty) in enumerate(zip(used_targets, rounded_parts), start=1):
-        if part_qty <= 0:
-            continue
+    # Place the SL and the TPs (rounded amounts) in one wave; the SL leads so it is never queued behind TPs
+    legs = [{"symbol": symbol, "type": "STOP_MARKET", "side": opposite, "amount": qty,
+             "params": {**params, "stopPrice": float(initial_sl)}}]
+    tp_legs = [(i, t, part_qty) for i, (t, part_qty) in enumerate(zip(used_targets, rounded_parts), start=1)
+               if part_qty > 0]
+    legs += [{"symbol": symbol, "type": "TAKE_PROFIT_MARKET", "side": opposite, "amount": part_qty,
+              "params": {**params, "stopPrice": float(t)}} for _, t, part_qty in tp_legs]
+    results = place_orders(ex, legs)
+    sl, sl_err = results[0]
+    if sl_err is None:
+        log("SL placed", initial_sl, ((sl or {}).get("id") or (sl or {}).get("orderId") or ""))
         try:
-            tp = ex.create_order(symbol, type="TAKE_PROFIT_MARKET", side=opposite, amount=part_qty,
-                                  params={**params, "stopPrice": float(t)})
-            log(f"TP{i} placed", t, part_qty, (tp.get("id") or tp.get("orderId") or ""))
-        except Exception as e:
-            log(f"Failed to place TP{i}:", str(e))
+            STATE.mark_exits_placed(symbol)
+        except Exception:
+            pass
+    else:
+        log("Failed to place SL:", str(sl_err))
+    for (i, t, part_qty), (tp, err) in zip(tp_legs, results[1:]):
+        if err is None:
+            log(f"TP{i} placed", t, part_qty, ((tp or {}).get("id") or (tp or {}).get("orderId") or ""))
+        else:
+            log(f"Failed to place TP{i}:", str(err))
     if len(used_targets) < len(targets or []):
         log("Some TPs merged due to min amount; placed:", len(used_targets), "of", len(targets or []), "(final TP preserved)")
+    OPEN_ORDERS.invalidate(ex)
     return entry
 
 def maybe_update_trailing(ex, symbol, side, qty, entry, atr, last_price):
     if DRY_RUN:
         return
-    try:
-        orders = get_open_orders(ex, symbol)
-    except Exception:
-        orders = []
 
+    r = ATR_MULT_SL * atr
     if side == "buy":
-        r = ATR_MULT_SL * atr
         be_trigger = entry + BREAKEVEN_AFTER_R * r
         trail_trigger = entry + TRAIL_AFTER_R * r
-        if last_price >= be_trigger:
-            new_sl = entry if last_price < trail_trigger else (last_price - TRAIL_ATR_MULT * atr)
-            cancel_reduce_only_orders(ex, symbol)
-            try:
-                ex.create_order(symbol, "STOP_MARKET", "sell", qty, params={"reduceOnly": True, "stopPrice": float(new_sl)})
-                log("Trailing/BE SL updated", symbol, new_sl)
-            except Exception as e:
-                log("Failed trailing SL:", str(e))
+        if last_price < be_trigger:
+            return
+        new_sl = entry if last_price < trail_trigger else (last_price - TRAIL_ATR_MULT * atr)
+        close_side = "sell"
     else:
-        r = ATR_MULT_SL * atr
         be_trigger = entry - BREAKEVEN_AFTER_R * r
         trail_trigger = entry - TRAIL_AFTER_R * r
-        if last_price <= be_trigger:
-            new_sl = entry if last_price > trail_trigger else (last_price + TRAIL_ATR_MULT * atr)
-            cancel_reduce_only_orders(ex, symbol)
-            try:
-                ex.create_order(symbol, "STOP_MARKET", "buy", qty, params={"reduceOnly": True, "stopPrice": float(new_sl)})
-                log("Trailing/BE SL updated", symbol, new_sl)
-            except Exception as e:
-                log("Failed trailing SL:", str(e))
+        if last_price > be_trigger:
+            return
+        new_sl = entry if last_price > trail_trigger else (last_price + TRAIL_ATR_MULT * atr)
+        close_side = "buy"
+    # Only the stop moves; take-profits stay resting
+    if move_stop(ex, symbol, close_side, new_sl, {"reduceOnly": True}, amount=qty) is not None:
+        log("Trailing/BE SL updated", symbol, new_sl)
 
 
 def place_reduce_only_exits(ex, symbol, position_side: str, qty: float, sl_price: float, tp_price: float):
@@ -236,17 +227,20 @@ def place_reduce_only_exits(ex, symbol, position_side: str, qty: float, sl_price
         log(f"[DRY_RUN] EXIT SL/TP reduceOnly {opposite.upper()} {qty} {symbol} SL={sl_price} TP={tp_price}")
         return
     params = {"reduceOnly": True}
-    try:
-        ex.create_order(symbol, type="STOP_MARKET", side=opposite, amount=qty,
-                        params={**params, "stopPrice": float(sl_price)})
+    (_, sl_err), (_, tp_err) = place_orders(ex, [
+        {"symbol": symbol, "type": "STOP_MARKET", "side": opposite, "amount": qty,
+         "params": {**params, "stopPrice": float(sl_price)}},
+        {"symbol": symbol, "type": "TAKE_PROFIT_MARKET", "side": opposite, "amount": qty,
+         "params": {**params, "stopPrice": float(tp_price)}},
+    ])
+    if sl_err is None:
         log("SL placed (reconcile)", symbol, sl_price)
-    except Exception as e:
-        log("Failed to place SL (reconcile):", symbol, str(e))
-    try:
-        ex.create_order(symbol, type="TAKE_PROFIT_MARKET", side=opposite, amount=qty,
-                        params={**params, "stopPrice": float(tp_price)})
+    else:
+        log("Failed to place SL (reconcile):", symbol, str(sl_err))
+    if tp_err is None:
         log("TP placed (reconcile)", symbol, tp_price)
-    except Exception as e:
-        log("Failed to place TP (reconcile):", symbol, str(e))
+    else:
+        log("Failed to place TP (reconcile):", symbol, str(tp_err))
+    OPEN_ORDERS.invalidate(ex)
 
 
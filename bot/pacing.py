@@ -0,0 +1,164 @@
+import math
+import statistics
+import threading
+from typing import Dict, Optional
+
+from . import clock
+from .open_orders import OPEN_ORDERS
+from .request_scheduler import weight_usage
+from .state import STATE
+from .stops import stop_price_of
+from .virtual_stops import VIRTUAL_STOPS
+
+# Pacing levels, fastest first
+HOT, ACTIVE, IDLE = "hot", "active", "idle"
+
+# Quotes closer together than this say little about movement
+_MIN_DT = 0.5
+
+# Share of a due() period a call may come early and still count: a job polling at the same base interval
+# lands a little before or after it depending on start delays, and must not skip every other run
+DUE_TOLERANCE = 0.1
+
+
+class Pacer:
+    """Adaptive job intervals driven by open exposure, stop distance, price movement and request budget.
+
+    A job's configured interval is its "active" pace, used while positions are open or the market moves.
+    While a held symbol's stop is within `near_stop_pct` of price, or the symbol moves faster than
+    `hot_move_pct` (percent per sqrt-minute), jobs run at `fast_factor` times that interval. While flat
+    and calm they run at `slow_factor` times it. Once the request scheduler has used more than
+    `budget_share` of its per-minute weight, every interval stretches in proportion, up to the slow pace.
+    observe() takes the shared positions/quotes each scheduler cycle; interval() and due() read the result.
+    """
+
+    def __init__(self, fast_factor: float = 0.5, slow_factor: float = 3.0, near_stop_pct: float = 0.5,
+                 hot_move_pct: float = 0.3, budget_share: float = 0.7, min_seconds: float = 0.5, alpha: float = 0.3):
+        self.fast_factor = float(fast_factor)
+        self.slow_factor = max(1.0, float(slow_factor))
+        self.near_stop_pct = float(near_stop_pct)
+        self.hot_move_pct = float(hot_move_pct)
+        self.budget_share = float(budget_share)
+        self.min_seconds = float(min_seconds)
+        self.alpha = float(alpha)
+        self._lock = threading.Lock()
+        self._mids: Dict[str, tuple] = {}     # symbol -> (ts, mid)
+        self._moves: Dict[str, float] = {}    # symbol -> smoothed % move per sqrt-minute
+        self._held: Dict[str, dict] = {}
+        self._hot: Dict[str, str] = {}        # symbol -> reason
+        self._last_due: Dict[tuple, float] = {}
+        self.level = IDLE
+        self.stretch = 1.0
+        self.usage: Optional[float] = None
+        self.stats = {"observations": 0, HOT: 0, ACTIVE: 0, IDLE: 0}
+
+    def observe(self, ex, data: dict):
+        now = clock.now()
+        quotes = data.get("quotes") or {}
+        with self._lock:
+            for sym, q in quotes.items():
+                mid = q.get("mid")
+                prev = self._mids.get(sym)
+                if prev is not None and now - prev[0] < _MIN_DT:
+                    continue
+                if prev is not None and prev[1] > 0 and mid:
+                    move = abs(mid / prev[1] - 1.0) * 100.0 / math.sqrt((now - prev[0]) / 60.0)
+                    old = self._moves.get(sym)
+                    self._moves[sym] = move if old is None else self.alpha * move + (1.0 - self.alpha) * old
+                if mid:
+                    self._mids[sym] = (now, mid)
+            if "positions" in data:
+                self._held = dict(data["positions"] or {})
+            held = dict(self._held)
+        hot = self._stop_distances(ex, held)
+        with self._lock:
+            for sym in held:
+                if self._moves.get(sym, 0.0) >= self.hot_move_pct:
+                    hot.setdefault(sym, "moving")
+            market = statistics.median(self._moves.values()) if self._moves else 0.0
+            self._hot = hot
+            if hot:
+                self.level = HOT
+            elif held or market >= self.hot_move_pct:
+                self.level = ACTIVE
+            else:
+                self.level = IDLE
+            self.stats["observations"] += 1
+            self.stats[self.level] += 1
+        self.usage = weight_usage(ex)
+        self.stretch = max(1.0, self.usage / self.budget_share) if self.usage and self.budget_share > 0 else 1.0
+        self._publish(market)
+
+    def _stop_distances(self, ex, held: dict) -> Dict[str, str]:
+        """Held symbols whose nearest stop (virtual or resting) is within near_stop_pct of the mid."""
+        stops: Dict[str, list] = {}
+        for sym in held:
+            v = VIRTUAL_STOPS.get(sym)
+            if v and v.get("level"):
+                stops.setdefault(sym, []).append(float(v["level"]))
+        try:
+            # A stale index is fine for distances; the monitor keeps it fresh
+            for o in OPEN_ORDERS.orders(ex, kind="sl", max_age=60):
+                p = stop_price_of(o)
+                if o.get("symbol") in held and p:
+                    stops.setdefault(o["symbol"], []).append(p)
+        except Exception:
+            pass
+        out = {}
+        with self._lock:
+            for sym, levels in stops.items():
+                mid = (self._mids.get(sym) or (0, 0))[1]
+                if mid and min(abs(mid - lv) / mid * 100.0 for lv in levels) <= self.near_stop_pct:
+                    out[sym] = "near_stop"
+        return out
+
+    def interval(self, base: float) -> float:
+        """Current interval for a job whose configured interval is `base`."""
+        base = float(base)
+        factor = {HOT: self.fast_factor, ACTIVE: 1.0, IDLE: self.slow_factor}[self.level]
+        slowest = max(self.min_seconds, base * self.slow_factor)
+        return min(max(self.min_seconds, base * factor) * self.stretch, slowest)
+
+    def symbol_level(self, symbol: str) -> str:
+        with self._lock:
+            if symbol in self._hot:
+                return HOT
+            return ACTIVE if symbol in self._held else IDLE
+
+    def due(self, key: str, symbol: str, base: float) -> bool:
+        """Per-symbol pacing inside a job: True when `symbol` should be polled again for `key`. Hot
+        symbols are due every call; the rest about every `base` seconds (stretched when over budget), with
+        DUE_TOLERANCE slack so callers running on that same interval are not skipped by jitter.
+        """
+        now = clock.now()
+        if self.symbol_level(symbol) == HOT:
+            every = 0.0
+        else:
+            every = float(base) * self.stretch
+        with self._lock:
+            last = self._last_due.get((key, symbol))
+            if last is not None and now - last < every * (1.0 - DUE_TOLERANCE):
+                return False
+            self._last_due[(key, symbol)] = now
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "level": self.level, "hot": dict(self._hot), "held": len(self._held),
+                    "stretch": round(self.stretch, 3), "weight_usage": self.usage}
+
+    def _publish(self, market_move: float):
+        try:
+            STATE.set_metrics("pacing", {**self.snapshot(), "market_move": round(market_move, 4)})
+        except Exception:
+            pass
+
+
+def pacer_from_env() -> Pacer:
+    from .config import (PACING_FAST_FACTOR, PACING_SLOW_FACTOR, PACING_NEAR_STOP_PCT, PACING_HOT_MOVE_PCT,
+                         PACING_BUDGET_SHARE, PACING_MIN_SECONDS)
+    return Pacer(PACING_FAST_FACTOR, PACING_SLOW_FACTOR, PACING_NEAR_STOP_PCT, PACING_HOT_MOVE_PCT,
+                 PACING_BUDGET_SHARE, PACING_MIN_SECONDS)
+
+
+PACER = pacer_from_env()
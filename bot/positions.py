@@ -1,44 +1,168 @@
+import threading
+import weakref
+from typing import Dict, Optional
+
+from . import clock
+from .config import POSITIONS_TTL_SECONDS, POSITION_CONFIRM_SECONDS
+from .state import STATE
 from .utils import log
-import time
 
 
-def get_open_positions(ex):
+def parse_position(p: dict) -> Optional[dict]:
+    """Normalize one fetch_positions entry to {side, size, entryPrice}; None when flat.
+    ccxt reports `contracts` unsigned with an explicit `side`; raw/legacy shapes carry a signed amount.
+    """
+    amt = p.get("contracts") or p.get("positionAmt") or p.get("contractsAmount")
+    if not amt:
+        amt = (p.get("info") or {}).get("positionAmt")
+    sz = float(amt or 0)
+    if sz == 0:
+        return None
+    side = p.get("side")
+    if side not in ("long", "short"):
+        side = "long" if sz > 0 else "short"
+    entry_price = p.get("entryPrice") or (p.get("info") or {}).get("entryPrice")
     try:
-        poss = ex.fetch_positions()
-        open_map = {}
-        for p in poss:
-            sym = p.get("symbol")
-            amt = p.get("contracts") or p.get("positionAmt") or p.get("contractsAmount")
-            sz = float(amt or 0)
-            side = "long" if sz > 0 else "short" if sz < 0 else None
-            if side:
-                # Try to grab entry price if present
-                entry_price = p.get("entryPrice") or p.get("info", {}).get("entryPrice")
+        entry_price = float(entry_price) if entry_price is not None else None
+    except Exception:
+        entry_price = None
+    return {"side": side, "size": abs(sz), "entryPrice": entry_price}
+
+
+class PositionBook:
+    """One parsed positions snapshot per exchange, shared by the orchestrator and all workers.
+
+    A snapshot is reused for `ttl_seconds` and dropped early by invalidate() whenever we send an order
+    that can change a position. Concurrent readers of a stale snapshot wait for a single refresh.
+
+    assume() adds a position we know from an entry's fill before the exchange lists it: snapshots show
+    it until a fetched book contains the symbol (confirmed) or `confirm_seconds` pass without that
+    (unconfirmed, logged and dropped). Every positions read after the entry thus doubles as the check.
+    """
+
+    def __init__(self, ttl_seconds: float = 2.0, confirm_seconds: float = 10.0):
+        self.ttl_seconds = float(ttl_seconds)
+        self.confirm_seconds = float(confirm_seconds)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._books = weakref.WeakKeyDictionary()   # ex -> (ts, {symbol: position})
+        self._generation = 0   # bumped by invalidate() so an in-flight fetch cannot store a pre-order view
+        self._assumed = weakref.WeakKeyDictionary()   # ex -> {symbol: (position, since, generation)}
+        self.stats = {"hits": 0, "fetches": 0, "errors": 0, "invalidations": 0,
+                      "assumed": 0, "confirmed": 0, "unconfirmed": 0, "confirm_ms_max": 0.0}
+
+    def _fresh(self, ex, max_age: float):
+        with self._lock:
+            entry = self._books.get(ex)
+        if entry is not None and max_age > 0 and clock.now() - entry[0] <= max_age:
+            return entry[1]
+        return None
+
+    def snapshot(self, ex, max_age: Optional[float] = None) -> Dict[str, dict]:
+        """Open positions by symbol; raises if the exchange call fails and nothing fresh is cached."""
+        max_age = self.ttl_seconds if max_age is None else float(max_age)
+        book = self._fresh(ex, max_age)
+        if book is not None:
+            self.stats["hits"] += 1
+            return self._overlay(ex, book)
+        with self._refresh_lock:
+            # Another thread may have refreshed while we waited
+            book = self._fresh(ex, max_age)
+            if book is None:
+                t0 = clock.now()
+                gen = self._generation
                 try:
-                    entry_price = float(entry_price) if entry_price is not None else None
+                    raw = ex.fetch_positions()
                 except Exception:
-                    entry_price = None
-                open_map[sym] = {"side": side, "size": abs(sz), "entryPrice": entry_price}
-        return open_map
-    except Exception as e:
-        log("fetch_positions failed:", str(e))
-        return {}
+                    self.stats["errors"] += 1
+                    raise
+                book = {}
+                for p in raw or []:
+                    parsed = parse_position(p)
+                    if parsed and p.get("symbol"):
+                        book[p["symbol"]] = parsed
+                with self._lock:
+                    if gen == self._generation:
+                        self._books[ex] = (t0, book)
+                self.stats["fetches"] += 1
+                self._confirm(ex, book, gen)
+                self._publish()
+            else:
+                self.stats["hits"] += 1
+        return self._overlay(ex, book)
+
+    def assume(self, ex, symbol: str, position: dict):
+        """Show `position` (side, size, entryPrice) for `symbol` until the exchange confirms it."""
+        with self._lock:
+            self._assumed.setdefault(ex, {})[symbol] = (dict(position, optimistic=True), clock.now(), self._generation)
+        self.stats["assumed"] += 1
+        try:
+            STATE.update_position(symbol, dict(position, optimistic=True))
+        except Exception:
+            pass
 
+    def assumed(self, ex) -> Dict[str, dict]:
+        with self._lock:
+            return {s: dict(v[0]) for s, v in (self._assumed.get(ex) or {}).items()}
 
-def wait_for_position_visible(ex, symbol: str, timeout_seconds: float = 8.0, poll_seconds: float = 0.5):
-    """Polls the exchange until a position for symbol becomes visible or timeout is reached.
-    Returns the latest positions map (may or may not include the symbol).
-    """
-    start = time.time()
-    last = {}
-    while time.time() - start < timeout_seconds:
+    def _confirm(self, ex, book: dict, gen: int):
+        """Settle assumed positions against a book fetched at generation `gen`."""
+        now = clock.now()
+        with self._lock:
+            pending = self._assumed.get(ex) or {}
+            for sym, (pos, since, assumed_gen) in list(pending.items()):
+                if sym in book and gen >= assumed_gen:
+                    del pending[sym]
+                    self.stats["confirmed"] += 1
+                    ms = (now - since) * 1000.0
+                    self.stats["confirm_ms_max"] = round(max(self.stats["confirm_ms_max"], ms), 1)
+                elif now - since > self.confirm_seconds:
+                    del pending[sym]
+                    self.stats["unconfirmed"] += 1
+                    log("[Positions] entry on", sym, "not confirmed by the exchange after",
+                        self.confirm_seconds, "s; dropping the assumed position")
+
+    def _overlay(self, ex, book: dict) -> Dict[str, dict]:
+        out = {s: dict(p) for s, p in book.items()}
+        with self._lock:
+            pending = self._assumed.get(ex) or {}
+            now = clock.now()
+            for sym, (pos, since, _) in pending.items():
+                if sym not in out and now - since <= self.confirm_seconds:
+                    out[sym] = dict(pos)
+        return out
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every invalidate(); views derived from positions compare it to spot our own fills."""
+        return self._generation
+
+    def get(self, ex, symbol: str, max_age: Optional[float] = None) -> Optional[dict]:
+        return self.snapshot(ex, max_age).get(symbol)
+
+    def invalidate(self, ex=None):
+        with self._lock:
+            self._generation += 1
+            if ex is None:
+                self._books.clear()
+            else:
+                self._books.pop(ex, None)
+        self.stats["invalidations"] += 1
+
+    def _publish(self):
         try:
-            last = get_open_positions(ex)
-            if symbol in last:
-                return last
+            STATE.set_metrics("positions", self.stats)
         except Exception:
             pass
-        time.sleep(max(0.1, poll_seconds))
-    return last
 
 
+POSITIONS = PositionBook(POSITIONS_TTL_SECONDS, POSITION_CONFIRM_SECONDS)
+
+
+def get_open_positions(ex, max_age: Optional[float] = None):
+    try:
+        return POSITIONS.snapshot(ex, max_age)
+    except Exception as e:
+        log("fetch_positions failed:", str(e))
+        return {}
+
@@ -0,0 +1,246 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import ccxt
+
+from .state import STATE
+
+
+# Priority levels: lower runs first
+ORDER, ACCOUNT, MARKET, UI = 0, 1, 2, 3
+PRIORITY_NAMES = {ORDER: "order", ACCOUNT: "account", MARKET: "market", UI: "ui"}
+
+# Fraction of the per-minute weight budget each level may fill, so bulk market data and UI polling
+# can never use up the headroom order placement and stop moves need.
+BUDGET_SHARE = {ORDER: 1.0, ACCOUNT: 0.9, MARKET: 0.8, UI: 0.6}
+
+
+def _ohlcv_weight(ex, args, kwargs):
+    limit = kwargs.get("limit", args[3] if len(args) > 3 else None) or 500
+    limit = int(limit)
+    return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+
+
+def _symbol_or(single: int, all_: int, pos: int = 0):
+    def w(ex, args, kwargs):
+        sym = kwargs.get("symbol", kwargs.get("symbols", args[pos] if len(args) > pos else None))
+        return single if sym else all_
+    return w
+
+
+# ccxt method -> (priority, request weight or weight(ex, args, kwargs)); Binance USDⓈ-M weights
+ENDPOINTS: Dict[str, tuple] = {
+    "create_order": (ORDER, 1),
+    "cancel_order": (ORDER, 1),
+    "create_orders": (ORDER, 5),
+    "cancel_orders": (ORDER, 1),
+    "cancel_all_orders": (ORDER, 1),
+    "edit_order": (ORDER, 1),
+    "set_leverage": (ORDER, 1),
+    "set_margin_mode": (ORDER, 1),
+    "fetch_positions": (ACCOUNT, 5),
+    "fetch_balance": (ACCOUNT, 5),
+    "fetch_open_orders": (ACCOUNT, _symbol_or(1, 40)),
+    "fetch_order": (ACCOUNT, 1),
+    "fetch_my_trades": (ACCOUNT, 5),
+    "fetch_leverages": (ACCOUNT, 6),   # symbolConfig + leverageBracket
+    "fetch_leverage_tiers": (ACCOUNT, 1),
+    "fetch_ohlcv": (MARKET, _ohlcv_weight),
+    "fetch_ticker": (MARKET, 1),
+    "fetch_tickers": (MARKET, 40),
+    "fetch_bids_asks": (MARKET, _symbol_or(2, 5)),
+    "fetch_time": (MARKET, 1),
+    "load_markets": (MARKET, lambda ex, args, kwargs: 0 if getattr(ex, "markets", None) else 1),
+}
+
+_local = threading.local()
+
+
+@contextmanager
+def priority(level: int):
+    """Run exchange calls made by this thread at `level` (e.g. UI for display-only polling)."""
+    prev = getattr(_local, "priority", None)
+    _local.priority = level
+    try:
+        yield
+    finally:
+        _local.priority = prev
+
+
+def take_admission_wait() -> float:
+    """Seconds this thread spent waiting for admission since the last call, and reset."""
+    waited = getattr(_local, "admission_wait", 0.0)
+    _local.admission_wait = 0.0
+    return waited
+
+
+class RequestScheduler:
+    """Admits exchange requests against the per-minute IP weight budget, highest priority first.
+
+    The budget is tracked locally from the endpoint weights and corrected upwards from the
+    X-MBX-USED-WEIGHT-1M header the server returns. Admitted requests run concurrently; only
+    admission is ordered. A 429/418 blocks everyone until its Retry-After has passed.
+    """
+
+    def __init__(self, weight_limit: int = 2400, headroom: float = 0.9, time_fn: Callable[[], float] = time.time):
+        self.weight_limit = int(weight_limit)
+        self.headroom = float(headroom)
+        self._time = time_fn
+        self._cond = threading.Condition()
+        self._queue = []  # (priority, seq)
+        self._seq = itertools.count()
+        self._minute = None
+        self._used = 0
+        self._blocked_until = 0.0
+        self.stats = {"requests": 0, "weight": 0, "waited_s": 0.0, "max_queue": 0, "rate_limited": 0,
+                      "server_used": 0, **{f"{n}_requests": 0 for n in PRIORITY_NAMES.values()}}
+
+    def _roll(self, now: float):
+        minute = int(now // 60)
+        if minute != self._minute:
+            self._minute, self._used = minute, 0
+
+    def _cap(self, level: int) -> float:
+        return self.weight_limit * self.headroom * BUDGET_SHARE.get(level, 1.0)
+
+    def _acquire(self, level: int, weight: int):
+        t0 = self._time()
+        with self._cond:
+            me = (level, next(self._seq))
+            heapq.heappush(self._queue, me)
+            self.stats["max_queue"] = max(self.stats["max_queue"], len(self._queue))
+            while True:
+                now = self._time()
+                self._roll(now)
+                fits = self._used + weight <= self._cap(level) or (self._used == 0 and weight > 0)
+                if self._queue[0] == me and now >= self._blocked_until and fits:
+                    heapq.heappop(self._queue)
+                    self._used += weight
+                    self.stats["requests"] += 1
+                    self.stats["weight"] += weight
+                    self.stats[f"{PRIORITY_NAMES.get(level, 'ui')}_requests"] += 1
+                    self._cond.notify_all()
+                    break
+                wake = max(self._blocked_until, (self._minute + 1) * 60) - now
+                self._cond.wait(timeout=min(max(wake, 0.01), 0.25))
+        self.stats["waited_s"] += max(0.0, self._time() - t0)
+
+    def _observe(self, ex):
+        headers = getattr(ex, "last_response_headers", None) or {}
+        raw = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("x-mbx-used-weight-1m")
+        if raw is None:
+            return
+        try:
+            reported = int(raw)
+        except Exception:
+            return
+        with self._cond:
+            self._roll(self._time())
+            self.stats["server_used"] = reported
+            if reported > self._used:
+                self._used = reported
+
+    def _rate_limited(self, ex):
+        headers = getattr(ex, "last_response_headers", None) or {}
+        try:
+            retry_after = float(headers.get("Retry-After") or headers.get("retry-after") or 0)
+        except Exception:
+            retry_after = 0.0
+        with self._cond:
+            now = self._time()
+            self._roll(now)
+            self._used = self.weight_limit
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            self.stats["rate_limited"] += 1
+            self._cond.notify_all()
+
+    def call(self, level: int, weight: int, fn, args=(), kwargs=None, ex=None):
+        override = getattr(_local, "priority", None)
+        if override is not None:
+            level = override
+        if weight <= 0:
+            return fn(*args, **(kwargs or {}))
+        t0 = time.perf_counter()
+        self._acquire(level, int(weight))
+        # Queue time is not exchange latency; callers timing the whole call subtract it
+        _local.admission_wait = getattr(_local, "admission_wait", 0.0) + time.perf_counter() - t0
+        try:
+            return fn(*args, **(kwargs or {}))
+        except (ccxt.DDoSProtection, ccxt.RateLimitExceeded):
+            self._rate_limited(ex)
+            raise
+        finally:
+            if ex is not None:
+                self._observe(ex)
+            try:
+                STATE.set_metrics("requests", self.snapshot())
+            except Exception:
+                pass
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            out = dict(self.stats)
+            out.update({"used_weight": self._used, "weight_limit": self.weight_limit, "queued": len(self._queue),
+                        "blocked_for_s": max(0.0, self._blocked_until - self._time())})
+            return out
+
+
+class ScheduledExchange:
+    """ccxt exchange proxy that routes every weighted call through a RequestScheduler.
+    Attribute reads/writes fall through to the wrapped exchange.
+    """
+
+    def __init__(self, ex, scheduler: RequestScheduler):
+        object.__setattr__(self, "_ex", ex)
+        object.__setattr__(self, "_scheduler", scheduler)
+
+    @property
+    def inner(self):
+        return self._ex
+
+    def __getattr__(self, name):
+        attr = getattr(self._ex, name)
+        spec = ENDPOINTS.get(name)
+        if spec is None or not callable(attr):
+            return attr
+        level, weight = spec
+        ex, scheduler = self._ex, self._scheduler
+
+        def scheduled(*args, **kwargs):
+            w = weight(ex, args, kwargs) if callable(weight) else weight
+            return scheduler.call(level, w, attr, args, kwargs, ex=ex)
+
+        return scheduled
+
+    def __setattr__(self, name, value):
+        setattr(self._ex, name, value)
+
+
+def scheduled_exchange(ex, weight_limit: Optional[int] = None, headroom: Optional[float] = None) -> ScheduledExchange:
+    """Wrap `ex` with a scheduler; ccxt's own limiter is switched off since the scheduler replaces it."""
+    from .config import REQUEST_WEIGHT_LIMIT, REQUEST_WEIGHT_HEADROOM
+    try:
+        ex.enableRateLimit = False
+    except Exception:
+        pass
+    sched = RequestScheduler(weight_limit or REQUEST_WEIGHT_LIMIT,
+                             REQUEST_WEIGHT_HEADROOM if headroom is None else headroom)
+    return ScheduledExchange(ex, sched)
+
+
+def weight_usage(ex) -> Optional[float]:
+    """Used fraction of the per-minute weight budget of the scheduler behind `ex` (None if unscheduled)."""
+    for _ in range(4):
+        attrs = getattr(ex, "__dict__", None) or {}
+        sched = attrs.get("_scheduler")
+        if isinstance(sched, RequestScheduler):
+            snap = sched.snapshot()
+            return snap["used_weight"] / max(1, snap["weight_limit"])
+        ex = attrs.get("_ex")
+        if ex is None:
+            break
+    return None
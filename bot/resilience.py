@@ -0,0 +1,210 @@
+import bisect
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import ccxt
+
+from . import clock
+from .request_scheduler import ENDPOINTS, MARKET, PRIORITY_NAMES, _local as _priority_local, take_admission_wait
+from .state import STATE
+from .utils import log
+
+# Latency histogram bucket upper bounds (ms); the last bucket is open-ended
+BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Reads that are safe to repeat; writes are never retried here (a lost response may still have been executed)
+IDEMPOTENT_PREFIXES = ("fetch_", "load_")
+
+
+class CircuitOpen(ccxt.ExchangeNotAvailable):
+    """Raised instead of calling an endpoint whose breaker is open (low-priority calls only)."""
+
+
+def _retryable(e: Exception) -> bool:
+    # Rate limits are the scheduler's job (it holds everyone until Retry-After); retrying here would hammer
+    if isinstance(e, (ccxt.DDoSProtection, ccxt.RateLimitExceeded, CircuitOpen)):
+        return False
+    return isinstance(e, ccxt.NetworkError)
+
+
+class Breaker:
+    """Per-endpoint circuit breaker: opens after `failures` consecutive errors or slow calls, stays open for
+    `cooldown` seconds, then lets a single probe through (half-open) and closes again on its success.
+    """
+
+    def __init__(self, failures: int, cooldown: float):
+        self.failures = int(failures)
+        self.cooldown = float(cooldown)
+        self.state = "closed"
+        self.streak = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+
+    def admit(self, now: float) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and now - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+        if self.state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record(self, ok: bool, now: float):
+        self.probing = False
+        if ok:
+            self.state, self.streak = "closed", 0
+            return
+        self.streak += 1
+        if self.state == "half_open" or self.streak >= self.failures:
+            if self.state != "open":
+                self.trips += 1
+            self.state, self.opened_at = "open", now
+
+
+class ResilientExchange:
+    """ccxt exchange proxy adding bounded, jittered retries for idempotent reads, per-endpoint circuit
+    breakers and per-endpoint latency/error histograms (published as metrics.resilience).
+
+    An open breaker sheds market-data and UI calls immediately with CircuitOpen; order and account calls
+    still go through, since skipping them would leave positions unmanaged. Attribute reads/writes fall
+    through to the wrapped exchange.
+    """
+
+    def __init__(self, ex, max_attempts: int = 3, base_delay: float = 0.25, max_delay: float = 2.0,
+                 failures: int = 5, cooldown: float = 30.0, slow_ms: float = 3000.0,
+                 sleep: Callable[[float], None] = None, time_fn: Callable[[], float] = None):
+        object.__setattr__(self, "_ex", ex)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_breakers", {})
+        object.__setattr__(self, "_hist", {})
+        object.__setattr__(self, "max_attempts", max(1, int(max_attempts)))
+        object.__setattr__(self, "base_delay", float(base_delay))
+        object.__setattr__(self, "max_delay", float(max_delay))
+        object.__setattr__(self, "failures", int(failures))
+        object.__setattr__(self, "cooldown", float(cooldown))
+        object.__setattr__(self, "slow_ms", float(slow_ms))
+        object.__setattr__(self, "_sleep", sleep or clock.sleep)
+        object.__setattr__(self, "_time", time_fn or clock.now)
+
+    @property
+    def inner(self):
+        return self._ex
+
+    def breaker(self, name: str) -> Breaker:
+        with self._lock:
+            b = self._breakers.get(name)
+            if b is None:
+                b = self._breakers[name] = Breaker(self.failures, self.cooldown)
+            return b
+
+    def _level(self, name: str) -> int:
+        override = getattr(_priority_local, "priority", None)
+        if override is not None:
+            return override
+        return ENDPOINTS.get(name, (MARKET, 0))[0]
+
+    def _entry(self, name: str) -> dict:
+        # Caller holds the lock
+        h = self._hist.get(name)
+        if h is None:
+            h = self._hist[name] = {"calls": 0, "retries": 0, "shed": 0, "buckets": [0] * (len(BUCKETS_MS) + 1),
+                                    "errors": {}}
+        return h
+
+    def _observe(self, name: str, ms: float, error: Optional[Exception]):
+        with self._lock:
+            h = self._entry(name)
+            h["calls"] += 1
+            h["buckets"][bisect.bisect_left(BUCKETS_MS, ms)] += 1
+            if error is not None:
+                kind = type(error).__name__
+                h["errors"][kind] = h["errors"].get(kind, 0) + 1
+
+    def _bump(self, name: str, key: str):
+        with self._lock:
+            self._entry(name)[key] += 1
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spreads retries from many threads instead of re-synchronizing them
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _call(self, name: str, fn, args, kwargs):
+        b = self.breaker(name)
+        level = self._level(name)
+        with self._lock:
+            admitted = b.admit(self._time())
+        if not admitted and level >= MARKET:
+            self._bump(name, "shed")
+            self._publish()
+            raise CircuitOpen(f"{name}: circuit open, {PRIORITY_NAMES.get(level, 'ui')} call shed")
+        attempts = self.max_attempts if name.startswith(IDEMPOTENT_PREFIXES) else 1
+        attempt = 0
+        while True:
+            take_admission_wait()
+            t0 = time.perf_counter()
+            try:
+                out = fn(*args, **kwargs)
+            except Exception as e:
+                self._settle(b, name, t0, e)
+                # Low-priority reads stop retrying once their breaker has opened
+                if _retryable(e) and attempt + 1 < attempts and (level < MARKET or b.state == "closed"):
+                    attempt += 1
+                    self._bump(name, "retries")
+                    self._sleep(self._backoff(attempt))
+                    continue
+                raise
+            self._settle(b, name, t0, None)
+            return out
+
+    def _settle(self, b: Breaker, name: str, t0: float, error: Optional[Exception]):
+        # Only the exchange round trip: time queued in the request scheduler below is not a slow venue
+        ms = max(0.0, time.perf_counter() - t0 - take_admission_wait()) * 1000.0
+        failed = (error is not None and _retryable(error)) or ms >= self.slow_ms
+        with self._lock:
+            b.record(not failed, self._time())
+        self._observe(name, ms, error)
+        self._publish()
+
+    def __getattr__(self, name):
+        attr = getattr(self._ex, name)
+        if not callable(attr) or name.startswith("_") or not (name in ENDPOINTS or name.startswith(IDEMPOTENT_PREFIXES)):
+            return attr
+
+        def resilient(*args, **kwargs):
+            return self._call(name, attr, args, kwargs)
+
+        return resilient
+
+    def __setattr__(self, name, value):
+        setattr(self._ex, name, value)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            out = {}
+            for name, h in self._hist.items():
+                b = self._breakers.get(name)
+                out[name] = {
+                    "calls": h["calls"], "retries": h["retries"], "shed": h["shed"], "errors": dict(h["errors"]),
+                    "latency_ms": {(f"le_{ub}" if i < len(BUCKETS_MS) else f"gt_{BUCKETS_MS[-1]}"): n
+                                   for i, (ub, n) in enumerate(zip(BUCKETS_MS + (None,), h["buckets"]))},
+                    "breaker": b.state if b else "closed", "trips": b.trips if b else 0,
+                }
+            return out
+
+    def _publish(self):
+        try:
+            STATE.set_metrics("resilience", self.snapshot())
+        except Exception:
+            pass
+
+
+def resilient_exchange(ex) -> ResilientExchange:
+    from .config import (RETRY_MAX_ATTEMPTS, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS, BREAKER_FAILURES,
+                         BREAKER_COOLDOWN_SECONDS, BREAKER_SLOW_MS)
+    log("Resilience: retries", RETRY_MAX_ATTEMPTS, "breaker after", BREAKER_FAILURES, "failures /", BREAKER_SLOW_MS, "ms")
+    return ResilientExchange(ex, RETRY_MAX_ATTEMPTS, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS, BREAKER_FAILURES,
+                             BREAKER_COOLDOWN_SECONDS, BREAKER_SLOW_MS)
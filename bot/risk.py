@@ -1,7 +1,7 @@
 import math
 
+from .account import ACCOUNT
 from .config import (
-    ACCOUNT_EQUITY_USDT,
     RISK_PER_TRADE,
     ABS_RISK_USDT,
     LEVERAGE,
@@ -13,14 +13,8 @@ from .config import (
 
 
 def equity_from_balance(ex) -> float:
-    try:
-        b = ex.fetch_balance()
-        total = b.get("total", {}).get("USDT", None)
-        if total is not None:
-            return float(total)
-    except Exception:
-        pass
-    return ACCOUNT_EQUITY_USDT
+    # Served from the shared account view; refetched after our own fills or when it goes stale
+    return ACCOUNT.equity(ex)
 
 
 def compute_risk_usdt(equity_usdt: float) -> float:
@@ -0,0 +1,112 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from . import clock
+from .state import STATE
+
+# Share of the budget the adaptive universe size aims to fill, leaving room for slow outliers
+HEADROOM = 0.8
+
+# Fetch stage of pipelined passes: one batch in flight ahead of the compute
+_FETCH = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-fetch")
+
+
+class ScanBudget:
+    """Time budget for repeated passes over a symbol universe.
+
+    plan() orders a pass: symbols with open positions, then ranked candidates (the previous pass's
+    signals) and symbols deferred by an earlier pass, then the rest of the universe by volume, cut to
+    the current size. run() works through it in batches and stops starting new ones once the next
+    batch would end past the deadline; what is left is deferred to the front of the next pass. The
+    measured cost per symbol sets the next pass's universe size (between `min_size` and `max_size`).
+    Coverage and overruns are published as metrics.scan_<name>.
+    """
+
+    def __init__(self, name: str, budget_seconds: float, max_size: int, min_size: int = 5, alpha: float = 0.3):
+        self.name = name
+        self.budget_seconds = float(budget_seconds)
+        self.max_size = max(1, int(max_size))
+        self.min_size = max(1, min(int(min_size), self.max_size))
+        self.alpha = float(alpha)
+        self.size = self.max_size
+        self.cost: Optional[float] = None   # smoothed seconds per symbol
+        self.candidates: List[str] = []
+        self.deferred: List[str] = []
+        self.stats = {"scans": 0, "overruns": 0, "deferred_total": 0}
+        self.last: dict = {}
+
+    def set_candidates(self, symbols: Iterable[str]):
+        """Ranked symbols (best first) to scan right after open positions next time."""
+        self.candidates = list(dict.fromkeys(symbols))
+
+    def plan(self, universe: Sequence[str], held: Iterable[str] = ()) -> List[str]:
+        """Scan order for the next pass; `universe` is the full volume ranking."""
+        universe = list(universe)
+        eligible = set(universe)
+        carried = [s for s in (*self.candidates, *self.deferred) if s in eligible]
+        return list(dict.fromkeys([*held, *carried, *universe[:self.size]]))
+
+    def run(self, symbols: Sequence[str], fn: Callable, batch: int = 1, deadline: Optional[float] = None,
+            fetch: Optional[Callable[[List[str]], object]] = None) -> List[str]:
+        """fn(batch_of_symbols) over `symbols` until done or out of time; returns the symbols processed.
+
+        With a `fetch` stage the pass is pipelined: fn(batch, fetch(batch)) runs while the next batch's
+        fetch is already in flight, so network waits overlap the compute. A batch fetched ahead but cut by
+        the deadline is dropped (its data still lands in the caches behind `fetch`).
+        """
+        symbols = list(symbols)
+        t0 = clock.now()
+        deadline = t0 + self.budget_seconds if deadline is None else float(deadline)
+        batch = max(1, int(batch))
+        chunks = [symbols[i:i + batch] for i in range(0, len(symbols), batch)]
+        ahead = fetch is not None and not isinstance(clock.get_clock(), clock.SimulatedClock)
+        pending: Optional[Future] = None
+        done: List[str] = []
+        for k, chunk in enumerate(chunks):
+            # Per-symbol cost measured so far in this pass, else the smoothed one from earlier passes
+            per = (clock.now() - t0) / len(done) if done else (self.cost or 0.0)
+            # The first batch always runs so a pass never makes zero progress
+            if done and clock.now() + per * len(chunk) > deadline:
+                break
+            if fetch is None:
+                fn(chunk)
+            else:
+                data = pending.result() if pending is not None else fetch(chunk)
+                pending = _FETCH.submit(fetch, chunks[k + 1]) if ahead and k + 1 < len(chunks) else None
+                fn(chunk, data)
+            done.extend(chunk)
+        self._finish(symbols, done, t0, deadline)
+        return done
+
+    def _finish(self, planned: List[str], done: List[str], t0: float, deadline: float):
+        end = clock.now()
+        elapsed = end - t0
+        if done:
+            per = elapsed / len(done)
+            self.cost = per if self.cost is None else self.alpha * per + (1.0 - self.alpha) * self.cost
+        if self.cost and self.cost > 0:
+            fits = int(self.budget_seconds * HEADROOM / self.cost)
+            self.size = max(self.min_size, min(self.max_size, fits))
+        finished = set(done)
+        self.deferred = [s for s in planned if s not in finished]
+        overrun = max(0.0, end - deadline)
+        self.stats["scans"] += 1
+        self.stats["deferred_total"] += len(self.deferred)
+        if overrun > 0:
+            self.stats["overruns"] += 1
+        self.last = {
+            "planned": len(planned), "scanned": len(done), "deferred": len(self.deferred),
+            "coverage": round(len(done) / len(planned), 4) if planned else 1.0,
+            "elapsed_s": round(elapsed, 3), "budget_s": self.budget_seconds, "overrun_s": round(overrun, 3),
+            "cost_ms_per_symbol": round((self.cost or 0.0) * 1000.0, 2), "next_size": self.size,
+        }
+        self._publish()
+
+    def snapshot(self) -> dict:
+        return {**self.stats, **self.last}
+
+    def _publish(self):
+        try:
+            STATE.set_metrics(f"scan_{self.name}", self.snapshot())
+        except Exception:
+            pass
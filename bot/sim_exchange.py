@@ -0,0 +1,556 @@
+import itertools
+import math
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import ccxt
+import numpy as np
+import pandas as pd
+
+from .history import load_history, stored_symbols, timeframe_ms, to_epoch_ms
+from .utils import log
+
+
+BAR_MS = 60_000
+# Fractions of a 1m bar at which the replayed path visits open -> extreme -> extreme -> close
+_PATH_AT = (0.0, 1.0 / 3.0, 2.0 / 3.0, 1.0)
+
+_TRIGGER_TYPES = ("STOP_MARKET", "TAKE_PROFIT_MARKET")
+
+
+def _step_for(value: float) -> float:
+    return 10.0 ** math.floor(math.log10(value)) if value > 0 else 1.0
+
+
+def _round_step(x: float, step: float) -> float:
+    return math.floor(x / step + 1e-9) * step
+
+
+def _decimals(step: float) -> int:
+    return max(0, -int(math.floor(math.log10(step)))) if step < 1 else 0
+
+
+class SimExchange:
+    """In-process stand-in for the ccxt futures surface the bot uses (binanceusdm-like, one-way mode).
+
+    Market data is replayed from 1m candles (optionally ticks); conditional orders are matched along
+    each candle's open -> high/low -> close path, so stops, take-profits and closePosition exits fill
+    in time order. Time comes from `now_fn` (epoch seconds); without it the exchange is stepped
+    manually with advance()/set_time().
+    """
+
+    id = "sim"
+
+    def __init__(self, candles: Dict[str, pd.DataFrame], start_ms: Optional[int] = None,
+                 now_fn: Optional[Callable[[], float]] = None, balance_usdt: float = 1000.0,
+                 fee_pct: float = 0.04, spread_pct: float = 0.01, ticks: Optional[Dict[str, pd.DataFrame]] = None,
+                 default_leverage: int = 5):
+        self._lock = threading.RLock()
+        self._bars = {}
+        for sym, df in candles.items():
+            if df is None or not len(df):
+                continue
+            self._bars[sym] = {
+                "ts": to_epoch_ms(df["ts"]),
+                "open": df["open"].to_numpy(dtype=float), "high": df["high"].to_numpy(dtype=float),
+                "low": df["low"].to_numpy(dtype=float), "close": df["close"].to_numpy(dtype=float),
+                "volume": df["volume"].to_numpy(dtype=float),
+            }
+        self._ticks = {}
+        for sym, df in (ticks or {}).items():
+            self._ticks[sym] = (to_epoch_ms(df["ts"]), df["price"].to_numpy(dtype=float))
+        if not self._bars:
+            raise ValueError("SimExchange needs candles for at least one symbol")
+        first = min(int(b["ts"][0]) for b in self._bars.values())
+        self._now_ms = int(start_ms if start_ms is not None else first)
+        self._now_fn = now_fn
+        self._fee = float(fee_pct) / 100.0
+        self._half_spread = float(spread_pct) / 200.0
+        self._default_leverage = int(default_leverage)
+        self._wallet = float(balance_usdt)
+        self._orders: Dict[str, dict] = {}
+        self._open: Dict[str, Dict[str, dict]] = {}   # symbol -> {id: order} for status "open"
+        self._positions: Dict[str, dict] = {}   # symbol -> {qty (signed), entry}
+        self._leverage: Dict[str, int] = {}
+        self._margin_mode: Dict[str, str] = {}
+        self._trades: List[dict] = []
+        self._synced: Dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self.markets: Dict[str, dict] = {}
+        self.options = {"defaultType": "future"}
+        self.has = {"fetchPositions": True, "fetchOpenOrders": True, "fetchTickers": True, "fetchBidsAsks": True,
+                    "setLeverage": True, "setMarginMode": True, "fetchMyTrades": True}
+        self.last_response_headers = {}
+        self.load_markets()
+
+    @classmethod
+    def from_history(cls, symbols=None, start_ms: Optional[int] = None, root: Optional[str] = None, **kw) -> "SimExchange":
+        symbols = symbols or stored_symbols("1m", root)
+        return cls({s: load_history(s, "1m", root) for s in symbols}, start_ms=start_ms, **kw)
+
+    # --- time ---
+    def now_ms(self) -> int:
+        if self._now_fn is not None:
+            return int(self._now_fn() * 1000)
+        return self._now_ms
+
+    def milliseconds(self) -> int:
+        return self.now_ms()
+
+    def set_time(self, ms: int):
+        with self._lock:
+            self._now_ms = int(ms)
+            self._sync()
+
+    def advance(self, seconds: float):
+        self.set_time(self._now_ms + int(seconds * 1000))
+
+    def fetch_time(self, params=None) -> int:
+        return self.now_ms()
+
+    # --- markets ---
+    def set_sandbox_mode(self, enabled):
+        return None
+
+    def load_markets(self, reload=False, params=None):
+        with self._lock:
+            if self.markets and not reload:
+                return self.markets
+            for sym, b in self._bars.items():
+                ref = float(np.nanmedian(b["close"][: min(len(b["close"]), 1440)]))
+                base = sym.split("/")[0]
+                amount_step = min(1.0, max(0.001, _step_for(1.0 / ref)))
+                price_step = _step_for(ref) * 1e-4
+                self.markets[sym] = {
+                    "id": base + "USDT", "symbol": sym, "base": base, "quote": "USDT", "settle": "USDT",
+                    "type": "swap", "swap": True, "future": False, "linear": True, "inverse": False,
+                    "contract": True, "contractSize": 1.0, "active": True,
+                    "precision": {"amount": amount_step, "price": price_step},
+                    "limits": {"amount": {"min": amount_step, "max": 1e9}, "price": {"min": price_step, "max": 1e12},
+                               "cost": {"min": 5.0, "max": None}, "leverage": {"min": 1, "max": 125}},
+                    "info": {"symbol": base + "USDT"},
+                }
+            return self.markets
+
+    def _sym(self, symbol: str) -> str:
+        if symbol in self.markets:
+            return symbol
+        if f"{symbol}:USDT" in self.markets:
+            return f"{symbol}:USDT"
+        raise ccxt.BadSymbol(f"sim does not have market symbol {symbol}")
+
+    def market(self, symbol: str) -> dict:
+        return self.markets[self._sym(symbol)]
+
+    def amount_to_precision(self, symbol, amount):
+        step = self.market(symbol)["precision"]["amount"]
+        return f"{_round_step(float(amount), step):.{_decimals(step)}f}"
+
+    def price_to_precision(self, symbol, price):
+        step = self.market(symbol)["precision"]["price"]
+        return f"{round(float(price) / step) * step:.{_decimals(step)}f}"
+
+    # --- replayed prices ---
+    def _path(self, sym: str, i: int):
+        b = self._bars[sym]
+        o, h, l, c, t = b["open"][i], b["high"][i], b["low"][i], b["close"][i], int(b["ts"][i])
+        mid = (l, h) if c >= o else (h, l)
+        prices = (o, mid[0], mid[1], c)
+        return [(t + int(f * (BAR_MS - 1)), p) for f, p in zip(_PATH_AT, prices)]
+
+    def _price_at(self, sym: str, ms: int) -> Optional[float]:
+        if sym in self._ticks:
+            ts, px = self._ticks[sym]
+            k = int(np.searchsorted(ts, ms, side="right")) - 1
+            return float(px[max(0, k)])
+        b = self._bars[sym]
+        i = int(np.searchsorted(b["ts"], ms, side="right")) - 1
+        if i < 0:
+            return float(b["open"][0])
+        if ms >= int(b["ts"][i]) + BAR_MS:
+            return float(b["close"][i])
+        pts = self._path(sym, i)
+        for (ta, pa), (tb, pb) in zip(pts, pts[1:]):
+            if ms <= tb:
+                return float(pa + (pb - pa) * (ms - ta) / max(1, tb - ta))
+        return float(pts[-1][1])
+
+    def _segments(self, sym: str, frm: int, until: int):
+        """Price path segments (ta, pa, tb, pb, jump) covering (frm, until], in time order."""
+        if sym in self._ticks:
+            ts, px = self._ticks[sym]
+            k0 = int(np.searchsorted(ts, frm, side="right"))
+            k1 = int(np.searchsorted(ts, until, side="right"))
+            prev = self._price_at(sym, frm)
+            for k in range(k0, k1):
+                yield frm if k == k0 else int(ts[k - 1]), prev, int(ts[k]), float(px[k]), True
+                prev = float(px[k])
+            return
+        b = self._bars[sym]
+        i0 = max(0, int(np.searchsorted(b["ts"], frm, side="right")) - 1)
+        i1 = int(np.searchsorted(b["ts"], until, side="right"))
+        for i in range(i0, i1):
+            pts = self._path(sym, i)
+            for (ta, pa), (tb, pb) in zip(pts, pts[1:]):
+                if tb <= frm or ta > until:
+                    continue
+                if ta < frm:
+                    pa, ta = pa + (pb - pa) * (frm - ta) / max(1, tb - ta), frm
+                if tb > until:
+                    pb, tb = pa + (pb - pa) * (until - ta) / max(1, tb - ta), until
+                yield ta, pa, tb, pb, False
+
+    # --- matching ---
+    def _trigger_dir(self, o: dict) -> str:
+        t = o["info"]["type"]
+        if t == "LIMIT":
+            return "down" if o["side"] == "buy" else "up"
+        stop_like = t == "STOP_MARKET"
+        sell = o["side"] == "sell"
+        return "down" if stop_like == sell else "up"
+
+    def _hit(self, o: dict, ta, pa, tb, pb, jump):
+        lvl = float(o["price"] if o["info"]["type"] == "LIMIT" else o["stopPrice"])
+        down = self._trigger_dir(o) == "down"
+        beyond = (lambda p: p <= lvl) if down else (lambda p: p >= lvl)
+        if beyond(pa):
+            return ta, pa
+        if not beyond(pb):
+            return None
+        if jump:
+            return tb, pb
+        frac = (pa - lvl) / (pa - pb) if pa != pb else 1.0
+        return ta + int(frac * (tb - ta)), lvl
+
+    def _sync(self):
+        now = self.now_ms()
+        for sym in list(self._bars):
+            frm = self._synced.get(sym, now)
+            if now <= frm:
+                self._synced[sym] = max(frm, now)
+                continue
+            while True:
+                pending = list(self._open.get(sym, {}).values())
+                if not pending:
+                    break
+                event = None
+                for ta, pa, tb, pb, jump in self._segments(sym, frm, now):
+                    hits = [(h, o) for o in pending for h in [self._hit(o, ta, pa, tb, pb, jump)] if h]
+                    if hits:
+                        event = min(hits, key=lambda x: (x[0][0], x[1]["timestamp"]))
+                        break
+                if event is None:
+                    break
+                (t_ev, px), o = event
+                self._execute_trigger(o, px, t_ev)
+                frm = t_ev
+            self._synced[sym] = now
+
+    def _execute_trigger(self, o: dict, px: float, ts: int):
+        pos = self._positions.get(o["symbol"], {"qty": 0.0})
+        if o["info"]["closePosition"]:
+            qty = abs(pos["qty"])
+            wrong_side = (pos["qty"] > 0) != (o["side"] == "sell")
+            if qty <= 0 or wrong_side:
+                return self._finish(o, "expired", ts)
+        else:
+            qty = float(o["remaining"])
+        if o["reduceOnly"]:
+            reducible = abs(pos["qty"]) if (pos["qty"] > 0) == (o["side"] == "sell") and pos["qty"] != 0 else 0.0
+            qty = min(qty, reducible)
+            if qty <= 0:
+                return self._finish(o, "expired", ts)
+        fill = px if o["info"]["type"] == "LIMIT" else self._slipped(o["side"], px)
+        self._fill(o, qty, fill, ts)
+
+    def _slipped(self, side: str, px: float) -> float:
+        return px * (1 + self._half_spread) if side == "buy" else px * (1 - self._half_spread)
+
+    def _fill(self, o: dict, qty: float, px: float, ts: int):
+        sym = o["symbol"]
+        d = qty if o["side"] == "buy" else -qty
+        pos = self._positions.setdefault(sym, {"qty": 0.0, "entry": 0.0})
+        q, e = pos["qty"], pos["entry"]
+        realized = 0.0
+        if q == 0 or (q > 0) == (d > 0):
+            pos["entry"] = (abs(q) * e + abs(d) * px) / (abs(q) + abs(d))
+        else:
+            closed = min(abs(d), abs(q))
+            realized = closed * (px - e) * (1 if q > 0 else -1)
+            if abs(d) > abs(q):
+                pos["entry"] = px
+        pos["qty"] = q + d
+        if abs(pos["qty"]) < 1e-12:
+            pos["qty"], pos["entry"] = 0.0, 0.0
+        fee = abs(qty * px) * self._fee
+        self._wallet += realized - fee
+        o["filled"] = float(o.get("filled") or 0.0) + qty
+        o["remaining"] = max(0.0, float(o["amount"] or 0.0) - o["filled"])
+        o["average"] = px
+        o["cost"] = o["filled"] * px
+        self._trades.append({
+            "id": str(len(self._trades) + 1), "order": o["id"], "clientOrderId": o["clientOrderId"], "symbol": sym,
+            "side": o["side"], "amount": qty, "price": px, "cost": qty * px, "timestamp": ts,
+            "datetime": self._iso(ts), "fee": {"cost": fee, "currency": "USDT"},
+            "info": {"realizedPnl": str(realized), "orderId": o["id"]},
+        })
+        self._finish(o, "closed", ts)
+
+    def _finish(self, o: dict, status: str, ts: int):
+        self._open.get(o["symbol"], {}).pop(o["id"], None)
+        o["status"] = status
+        o["lastTradeTimestamp"] = ts
+        o["info"]["status"] = {"closed": "FILLED", "expired": "EXPIRED", "canceled": "CANCELED"}.get(status, "NEW")
+
+    # --- helpers ---
+    def _iso(self, ms: int) -> str:
+        return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+    def _copy(self, o: dict) -> dict:
+        out = dict(o)
+        out["info"] = dict(o["info"])
+        return out
+
+    def _mark(self, sym: str) -> float:
+        return self._price_at(sym, self.now_ms())
+
+    def _used_margin(self) -> float:
+        used = 0.0
+        for sym, p in self._positions.items():
+            if p["qty"]:
+                used += abs(p["qty"]) * self._mark(sym) / self._leverage.get(sym, self._default_leverage)
+        return used
+
+    def _unrealized(self) -> float:
+        return sum(p["qty"] * (self._mark(s) - p["entry"]) for s, p in self._positions.items() if p["qty"])
+
+    # --- ccxt surface ---
+    def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=None, params=None):
+        with self._lock:
+            sym = self._sym(symbol)
+            self._sync()
+            now = self.now_ms()
+            tf = timeframe_ms(timeframe)
+            limit = int(limit or 500)
+            b = self._bars[sym]
+            start = (int(since) // tf * tf) if since is not None else (now // tf - limit + 1) * tf
+            i0 = int(np.searchsorted(b["ts"], start, side="left"))
+            i1 = int(np.searchsorted(b["ts"], now, side="right"))
+            if i1 <= i0:
+                return []
+            ts = b["ts"][i0:i1]
+            o, h, l, c, v = (b[k][i0:i1].copy() for k in ("open", "high", "low", "close", "volume"))
+            # The last 1m bar may still be forming: cut it at `now`
+            if now < int(ts[-1]) + BAR_MS:
+                seen = [p for t, p in self._path(sym, i1 - 1) if t <= now] + [self._price_at(sym, now)]
+                h[-1], l[-1], c[-1] = max(seen), min(seen), seen[-1]
+                v[-1] *= (now - int(ts[-1])) / BAR_MS
+            bucket = ts // tf * tf
+            starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+            ends = np.r_[starts[1:], len(ts)] - 1
+            rows = np.column_stack([
+                bucket[starts], o[starts], np.maximum.reduceat(h, starts), np.minimum.reduceat(l, starts),
+                c[ends], np.add.reduceat(v, starts),
+            ])
+            out = [[int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5])] for r in rows]
+            return out[:limit] if since is not None else out[-limit:]
+
+    def fetch_ticker(self, symbol, params=None):
+        with self._lock:
+            sym = self._sym(symbol)
+            self._sync()
+            now = self.now_ms()
+            last = self._price_at(sym, now)
+            b = self._bars[sym]
+            i1 = int(np.searchsorted(b["ts"], now, side="right"))
+            i0 = max(0, i1 - 1440)
+            qv = float(np.nansum(b["close"][i0:i1] * b["volume"][i0:i1]))
+            bid, ask = last * (1 - self._half_spread), last * (1 + self._half_spread)
+            return {
+                "symbol": sym, "timestamp": now, "datetime": self._iso(now), "last": last, "close": last,
+                "bid": bid, "ask": ask, "quoteVolume": qv,
+                "info": {"symbol": self.markets[sym]["id"], "lastPrice": str(last), "markPrice": str(last),
+                         "bidPrice": str(bid), "askPrice": str(ask), "quoteVolume": str(qv)},
+            }
+
+    def fetch_tickers(self, symbols=None, params=None):
+        with self._lock:
+            syms = [self._sym(s) for s in symbols] if symbols else list(self.markets)
+            return {s: self.fetch_ticker(s) for s in syms}
+
+    def fetch_bids_asks(self, symbols=None, params=None):
+        return {s: {k: t[k] for k in ("symbol", "timestamp", "datetime", "bid", "ask", "info")}
+                for s, t in self.fetch_tickers(symbols).items()}
+
+    def fetch_positions(self, symbols=None, params=None):
+        with self._lock:
+            self._sync()
+            now = self.now_ms()
+            wanted = {self._sym(s) for s in symbols} if symbols else None
+            out = []
+            for sym, p in self._positions.items():
+                if not p["qty"] or (wanted and sym not in wanted):
+                    continue
+                mark = self._price_at(sym, now)
+                lev = self._leverage.get(sym, self._default_leverage)
+                upnl = p["qty"] * (mark - p["entry"])
+                notional = abs(p["qty"]) * mark
+                out.append({
+                    "symbol": sym, "contracts": abs(p["qty"]), "contractSize": 1.0,
+                    "side": "long" if p["qty"] > 0 else "short", "entryPrice": p["entry"], "markPrice": mark,
+                    "notional": notional, "leverage": lev, "unrealizedPnl": upnl, "initialMargin": notional / lev,
+                    "marginMode": self._margin_mode.get(sym, "cross"), "timestamp": now, "datetime": self._iso(now),
+                    "info": {"symbol": self.markets[sym]["id"], "positionAmt": str(p["qty"]),
+                             "entryPrice": str(p["entry"]), "markPrice": str(mark), "unRealizedProfit": str(upnl),
+                             "leverage": str(lev), "marginType": self._margin_mode.get(sym, "cross")},
+                })
+            return out
+
+    def fetch_balance(self, params=None):
+        with self._lock:
+            self._sync()
+            total = self._wallet + self._unrealized()
+            used = self._used_margin()
+            free = max(0.0, total - used)
+            acct = {"free": free, "used": used, "total": total}
+            return {"info": {"totalWalletBalance": str(self._wallet)}, "USDT": dict(acct),
+                    "free": {"USDT": free}, "used": {"USDT": used}, "total": {"USDT": total}}
+
+    def set_leverage(self, leverage, symbol=None, params=None):
+        with self._lock:
+            self._leverage[self._sym(symbol)] = int(leverage)
+            return {"symbol": self.markets[self._sym(symbol)]["id"], "leverage": int(leverage)}
+
+    def set_margin_mode(self, marginMode, symbol=None, params=None):
+        with self._lock:
+            self._margin_mode[self._sym(symbol)] = str(marginMode).lower()
+            return {"code": 200, "msg": "success"}
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        with self._lock:
+            self._sync()
+            if symbol:
+                return [self._copy(o) for o in self._open.get(self._sym(symbol), {}).values()]
+            return [self._copy(o) for book in self._open.values() for o in book.values()]
+
+    def fetch_order(self, id, symbol=None, params=None):
+        with self._lock:
+            self._sync()
+            o = self._orders.get(str(id))
+            if o is None:
+                raise ccxt.OrderNotFound(f"sim -2013 Order does not exist. {id}")
+            return self._copy(o)
+
+    def fetch_my_trades(self, symbol=None, since=None, limit=None, params=None):
+        with self._lock:
+            self._sync()
+            sym = self._sym(symbol) if symbol else None
+            out = [dict(t) for t in self._trades
+                   if (sym is None or t["symbol"] == sym) and (since is None or t["timestamp"] >= since)]
+            return out[:limit] if limit else out
+
+    def cancel_order(self, id, symbol=None, params=None):
+        with self._lock:
+            self._sync()
+            o = self._orders.get(str(id))
+            if o is None or o["status"] != "open":
+                raise ccxt.OrderNotFound(f"sim -2011 Unknown order sent. {id}")
+            self._finish(o, "canceled", self.now_ms())
+            return self._copy(o)
+
+    def create_order(self, symbol, type, side, amount=None, price=None, params=None):
+        with self._lock:
+            params = dict(params or {})
+            sym = self._sym(symbol)
+            self._sync()
+            now = self.now_ms()
+            t = str(type).upper()
+            side = str(side).lower()
+            close_position = bool(params.get("closePosition"))
+            reduce_only = bool(params.get("reduceOnly"))
+            stop = params.get("stopPrice", params.get("triggerPrice"))
+            if t not in ("MARKET", "LIMIT") + _TRIGGER_TYPES:
+                raise ccxt.InvalidOrder(f"sim does not support order type {type}")
+            if close_position and reduce_only:
+                raise ccxt.BadRequest("sim -1106 Parameter 'reduceonly' sent when not required.")
+            if close_position and t not in _TRIGGER_TYPES:
+                raise ccxt.InvalidOrder("sim closePosition requires STOP_MARKET or TAKE_PROFIT_MARKET")
+            if t in _TRIGGER_TYPES and stop is None:
+                raise ccxt.InvalidOrder("sim -1102 stopPrice is required")
+            qty = 0.0 if close_position else float(self.amount_to_precision(sym, amount or 0))
+            if not close_position and qty <= 0:
+                raise ccxt.InvalidOrder(f"sim -4003 Quantity less than or equal to zero. {amount}")
+            oid = str(next(self._ids))
+            o = {
+                "id": oid, "clientOrderId": params.get("newClientOrderId") or params.get("clientOrderId") or f"sim-{oid}",
+                "timestamp": now, "datetime": self._iso(now), "lastTradeTimestamp": None, "symbol": sym,
+                "type": t.lower(), "timeInForce": params.get("timeInForce", "GTC"), "side": side,
+                "amount": qty, "price": float(price) if price is not None else None,
+                "stopPrice": float(stop) if stop is not None else None,
+                "triggerPrice": float(stop) if stop is not None else None,
+                "reduceOnly": reduce_only or close_position, "filled": 0.0, "remaining": qty, "average": None,
+                "cost": 0.0, "status": "open", "fee": None, "trades": [],
+                "info": {"orderId": oid, "symbol": self.markets[sym]["id"], "type": t, "origType": t, "side": side.upper(),
+                         "closePosition": close_position, "reduceOnly": reduce_only or close_position,
+                         "stopPrice": str(stop or 0), "workingType": params.get("workingType", "CONTRACT_PRICE"),
+                         "status": "NEW"},
+            }
+            last = self._price_at(sym, now)
+            if t in _TRIGGER_TYPES:
+                if close_position and any(
+                    x["info"]["closePosition"] and x["info"]["type"] == t and x["side"] == side
+                    for x in self._open.get(sym, {}).values()
+                ):
+                    raise ccxt.InvalidOrder("sim -4130 An open stop or take profit order with GTE and closePosition in the direction is existing.")
+                down = self._trigger_dir(o) == "down"
+                if (last <= float(stop)) if down else (last >= float(stop)):
+                    raise ccxt.OrderImmediatelyFillable("sim -2021 Order would immediately trigger.")
+            pos_qty = self._positions.get(sym, {"qty": 0.0})["qty"]
+            if t == "MARKET":
+                fill = self._slipped(side, last)
+                increases = pos_qty == 0 or (pos_qty > 0) == (side == "buy")
+                if reduce_only:
+                    if increases:
+                        raise ccxt.InvalidOrder("sim -2022 ReduceOnly Order is rejected.")
+                    qty = min(qty, abs(pos_qty))
+                elif increases:
+                    lev = self._leverage.get(sym, self._default_leverage)
+                    free = self._wallet + self._unrealized() - self._used_margin()
+                    if qty * fill / lev > free:
+                        raise ccxt.InsufficientFunds("sim -2019 Margin is insufficient.")
+                self._orders[oid] = o
+                self._fill(o, qty, fill, now)
+            else:
+                self._orders[oid] = o
+                self._open.setdefault(sym, {})[oid] = o
+            log("[Sim] order", oid, sym, t, side, qty or "closePosition", stop or price or "")
+            return self._copy(o)
+
+
+def sim_from_env() -> SimExchange:
+    """Build the paper-trading exchange selected by EXCHANGE=sim from SIM_* settings."""
+    from .config import SIM_START, SIM_END, SIM_SPEED, SIM_BALANCE_USDT, SIM_FEE_PCT, SIM_SYMBOLS, CLOCK
+    from . import clock
+    symbols = SIM_SYMBOLS or stored_symbols("1m")
+    candles = {s: load_history(s, "1m") for s in symbols}
+    candles = {s: df for s, df in candles.items() if len(df)}
+    if not candles:
+        raise RuntimeError("EXCHANGE=sim needs stored 1m history (see bot/history.py, HISTORY_DIR)")
+    if SIM_START:
+        start_ms = _iso_ms(SIM_START)
+    else:
+        # Leave a week of history behind the replay start for indicator lookbacks
+        start_ms = min(int(to_epoch_ms(df["ts"])[0]) for df in candles.values()) + 7 * 86_400_000
+    # The whole bot (orphan protection, TTLs, blacklists, worker sleeps) runs on the replay clock
+    if CLOCK == "simulated":
+        clock.set_clock(clock.SimulatedClock(start_ms / 1000.0, _iso_ms(SIM_END) / 1000.0 if SIM_END else None))
+    else:
+        clock.set_clock(clock.AcceleratedClock(SIM_SPEED, origin=start_ms / 1000.0))
+    ex = SimExchange(candles, start_ms=start_ms, now_fn=clock.now, balance_usdt=SIM_BALANCE_USDT, fee_pct=SIM_FEE_PCT)
+    log("Sim exchange:", len(candles), "symbols from", ex._iso(start_ms), "clock", CLOCK, "speed", SIM_SPEED)
+    return ex
+
+
+def _iso_ms(s: str) -> int:
+    return int(datetime.fromisoformat(s).replace(tzinfo=timezone.utc).timestamp() * 1000)
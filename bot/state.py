@@ -1,7 +1,8 @@
 import threading
-import time
 from typing import Dict, Any, List, Optional
 
+from . import clock
+
 
 class BotState:
     def __init__(self):
@@ -20,6 +21,8 @@ class BotState:
         # Strategy/exit stage tracking per symbol
         self._exit_stage: Dict[str, int] = {}  # 0 none, 1 after TP1, 2 after TP2, 3 closed
         self._strategy_meta: Dict[str, Dict[str, Any]] = {}
+        # Runtime metrics published by infrastructure (request scheduler, caches, ...)
+        self._metrics: Dict[str, Dict[str, Any]] = {}
 
     def snapshot(self) -> Dict[str, Any]:
         with self._lock:
@@ -37,6 +40,7 @@ class BotState:
                 "threads": {k: dict(v) for k, v in self._threads.items()},
                 "exit_stage": dict(self._exit_stage),
                 "strategy_meta": {k: dict(v) for k, v in self._strategy_meta.items()},
+                "metrics": {k: dict(v) for k, v in self._metrics.items()},
             }
 
     def set_price(self, symbol: str, price: float):
@@ -56,6 +60,10 @@ class BotState:
         with self._lock:
             self._positions = dict(positions)
 
+    def update_position(self, symbol: str, position: Dict[str, Any]):
+        with self._lock:
+            self._positions = {**self._positions, symbol: dict(position)}
+
     def set_pnl(self, per_symbol: Dict[str, float]):
         with self._lock:
             self._pnl = dict(per_symbol)
@@ -67,12 +75,12 @@ class BotState:
 
     def mark_exits_placed(self, symbol: str):
         with self._lock:
-            self._last_exits_ts[symbol] = time.time()
+            self._last_exits_ts[symbol] = clock.now()
             self._exit_stage.setdefault(symbol, 0)
 
     def mark_entry(self, symbol: str):
         with self._lock:
-            self._last_entry_ts[symbol] = time.time()
+            self._last_entry_ts[symbol] = clock.now()
             self._exit_stage[symbol] = 0
 
     def set_exit_stage(self, symbol: str, stage: int):
@@ -88,7 +96,7 @@ class BotState:
             ts = self._last_exits_ts.get(symbol)
             if ts is None:
                 return False
-            return (time.time() - ts) <= protect_seconds
+            return (clock.now() - ts) <= protect_seconds
 
     def set_universe(self, universe):
         with self._lock:
@@ -97,9 +105,13 @@ class BotState:
     def set_thread_status(self, name: str, info: Dict[str, Any]):
         with self._lock:
             info_copy = dict(info)
-            info_copy["ts"] = time.time()
+            info_copy["ts"] = clock.now()
             self._threads[name] = info_copy
 
+    def set_metrics(self, section: str, values: Dict[str, Any]):
+        with self._lock:
+            self._metrics[section] = dict(values)
+
     def set_strategy_meta(self, symbol: str, meta: Dict[str, Any]):
         with self._lock:
             self._strategy_meta[symbol] = dict(meta)
@@ -110,7 +122,7 @@ class BotState:
 
     def mark_close(self, symbol: str):
         with self._lock:
-            self._last_close_ts[symbol] = time.time()
+            self._last_close_ts[symbol] = clock.now()
 
     def get_last_close_ts(self, symbol: str) -> Optional[float]:
         with self._lock:
@@ -0,0 +1,125 @@
+from typing import List, Optional
+
+import ccxt
+
+from .batch_orders import uses_algo_orders, cancel_many
+from .config import STOP_MIN_MOVE_TICKS
+from .open_orders import OPEN_ORDERS, open_orders_for, order_kinds
+from .state import STATE
+from .utils import log
+
+STATS = {"amended": 0, "replaced": 0, "recreated": 0, "skipped": 0, "failed": 0}
+
+
+def _publish():
+    try:
+        STATE.set_metrics("stops", STATS)
+    except Exception:
+        pass
+
+
+def stop_price_of(o: dict) -> Optional[float]:
+    info = o.get("info") or {}
+    params = o.get("params") or {}
+    for v in (o.get("triggerPrice"), o.get("stopPrice"), info.get("triggerPrice"), info.get("stopPrice"),
+              params.get("stopPrice")):
+        try:
+            if v is not None and float(v) > 0:
+                return float(v)
+        except Exception:
+            continue
+    return None
+
+
+def price_tick(ex, symbol: str) -> float:
+    try:
+        p = ex.market(symbol)["precision"]["price"]
+        if getattr(ex, "precisionMode", ccxt.TICK_SIZE) == ccxt.DECIMAL_PLACES:
+            return 10.0 ** -float(p)
+        return float(p)
+    except Exception:
+        return 0.0
+
+
+def protective_stops(ex, symbol: str, side: str) -> List[dict]:
+    """Resting reduce-only/closePosition stops that close via `side` ("buy"/"sell"), from the open-orders index."""
+    return [o for o in open_orders_for(ex, symbol, kind="sl")
+            if "reduce_only" in order_kinds(o) and (o.get("side") or side) == side]
+
+
+def _can_amend(ex, o: dict) -> bool:
+    # Binance USDⓈ-M can only modify LIMIT orders; its stops live on the algo book
+    if uses_algo_orders(ex):
+        return False
+    return bool((getattr(ex, "has", None) or {}).get("editOrder"))
+
+
+def move_stop(ex, symbol: str, side: str, stop_price: float, params: dict, amount: Optional[float] = None,
+              existing: Optional[List[dict]] = None, min_move_ticks: Optional[float] = None) -> Optional[dict]:
+    """Move the protective stop for `symbol` to `stop_price`; returns the live stop order, None when skipped or failed.
+
+    `side` is the closing side and `params` the new stop's parameters (closePosition or reduceOnly etc.; the
+    trigger is set here). `existing` defaults to the resting stops on that side. Moves smaller than
+    `min_move_ticks` price ticks are skipped. The trigger is amended in place where the exchange supports it;
+    otherwise the new stop is placed before the old ones are cancelled, so the position is never naked.
+    Binance refuses a second closePosition stop (-4130): when `amount` is known the replacement goes out as a
+    reduce-only stop for that amount instead, else we fall back to cancel-then-create.
+    """
+    try:
+        stop_price = float(ex.price_to_precision(symbol, stop_price))
+    except Exception:
+        stop_price = float(stop_price)
+    existing = protective_stops(ex, symbol, side) if existing is None else list(existing)
+    ticks = STOP_MIN_MOVE_TICKS if min_move_ticks is None else float(min_move_ticks)
+    tick = price_tick(ex, symbol)
+    current = [p for p in (stop_price_of(o) for o in existing) if p is not None]
+    if current and len(current) == len(existing) and all(abs(p - stop_price) < max(ticks * tick, 1e-12) for p in current):
+        STATS["skipped"] += 1
+        _publish()
+        return None
+
+    if len(existing) == 1 and _can_amend(ex, existing[0]):
+        old = existing[0]
+        try:
+            o = ex.edit_order(old["id"], symbol, old.get("type") or "STOP_MARKET", side, old.get("amount") or amount,
+                              None, {**params, "stopPrice": stop_price})
+            OPEN_ORDERS.invalidate(ex)
+            STATS["amended"] += 1
+            _publish()
+            return o
+        except Exception as e:
+            log("stop amend failed, replacing", symbol, str(e))
+
+    new_params = {**params, "stopPrice": stop_price}
+    if new_params.get("closePosition") and amount and any("close_position" in order_kinds(o) for o in existing):
+        new_params = {k: v for k, v in new_params.items() if k not in ("closePosition", "timeInForce")}
+        new_params["reduceOnly"] = True
+    order_amount = None if new_params.get("closePosition") else amount
+    try:
+        o = ex.create_order(symbol, "STOP_MARKET", side, order_amount, None, new_params)
+        OPEN_ORDERS.invalidate(ex)
+        if existing:
+            cancel_many(ex, symbol, existing)
+        STATS["replaced"] += 1
+        _publish()
+        return o
+    except Exception as e:
+        if not (isinstance(e, ccxt.InvalidOrder) and "-4130" in str(e) and existing):
+            STATS["failed"] += 1
+            _publish()
+            log("stop move failed", symbol, str(e))
+            return None
+    # Only one closePosition stop per direction: free the slot, then place
+    cancel_many(ex, symbol, existing)
+    try:
+        o = ex.create_order(symbol, "STOP_MARKET", side, None if params.get("closePosition") else amount, None,
+                            {**params, "stopPrice": stop_price})
+        OPEN_ORDERS.invalidate(ex)
+        STATS["recreated"] += 1
+        _publish()
+        return o
+    except Exception as e:
+        STATS["failed"] += 1
+        _publish()
+        log("stop move failed after cancel", symbol, str(e))
+        return None
@@ -42,7 +42,7 @@ class Strategy:
         return tfs
 
     def prepare(self, data: Dict[str, Dict[str, pd.DataFrame]]):
-        """Optional hook: called once per tick with all pre-fetched data by symbol and timeframe."""
+        """Optional hook: called before decide() with each scan batch's pre-fetched data by symbol and timeframe."""
         return
 
     def decide(self, symbol: str, data: Dict[str, pd.DataFrame]) -> Decision:
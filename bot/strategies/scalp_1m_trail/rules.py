@@ -0,0 +1,52 @@
+"""Exit rules of the scalp_1m_trail worker (ladder, TTL), shared by the live worker and the replay backtest."""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def pnl_pct(entry: float, last: float) -> Optional[float]:
+    # Price change vs entry in percent, as read by Scalp1mWorker for both sides
+    if last is None or entry <= 0:
+        return None
+    return (last - entry) / entry * 100.0
+
+
+def ladder_levels(levels) -> List[Tuple[float, float]]:
+    """Parse TRAIL_LEVELS into (pnl_pct, sl_pct) pairs, skipping malformed entries like the worker does."""
+    out = []
+    for lvl in levels or []:
+        try:
+            out.append((float(lvl.get("pnl_pct", 0.0)), float(lvl.get("sl_pct", 0.0))))
+        except Exception:
+            continue
+    return out
+
+
+def ladder_sl_pct(pnl: float, levels) -> Optional[float]:
+    """SL percent of the last level (in config order) whose pnl_pct threshold is reached, else None."""
+    target = None
+    for th, sl in ladder_levels(levels):
+        if pnl >= th:
+            target = sl
+    return target
+
+
+def ladder_sl_pct_vec(pnl: np.ndarray, levels) -> np.ndarray:
+    """Vectorized ladder_sl_pct over an array of pnl readings; NaN where no level is reached."""
+    pnl = np.asarray(pnl, dtype=float)
+    out = np.full(pnl.shape, np.nan)
+    for th, sl in ladder_levels(levels):
+        out = np.where(pnl >= th, sl, out)
+    return out
+
+
+def ladder_stop_price(side: str, entry: float, sl_pct):
+    """Stop price for a ladder step; works on scalars and numpy arrays."""
+    if side == "long":
+        return entry * (1.0 + sl_pct / 100.0)
+    return entry * (1.0 - sl_pct / 100.0)
+
+
+def ttl_expired(elapsed_seconds, pnl, ttl_seconds: float, min_profit_pct: float):
+    """Time stop: TTL elapsed without reaching the minimum profit. Works on scalars and numpy arrays."""
+    return (elapsed_seconds >= ttl_seconds) & (pnl < min_profit_pct)
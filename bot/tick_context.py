@@ -0,0 +1,93 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from .account import ACCOUNT
+from .candles import CANDLES
+from .indicators import add_indicators
+from .jobs import SHARED
+from .positions import POSITIONS, get_open_positions
+from .state import STATE
+
+
+def _last(df: pd.DataFrame, limit: int) -> pd.DataFrame:
+    return df.iloc[-int(limit):].reset_index(drop=True) if len(df) > limit else df
+
+
+class TickContext:
+    """Memo of the market/account reads and derived frames of one orchestrator iteration.
+
+    Every phase asks the context instead of the exchange: the first read of a key goes through the
+    shared caches (candles, positions, account, universe), repeats within the tick are answered from
+    the memo and counted as absorbed. Candle reads start at the longest lookback a strategy needs for
+    that timeframe (`lookbacks`), so a shorter read later in the tick is a slice. Positions and equity are
+    keyed on POSITIONS.generation, so an order placed during the tick makes the next read fresh.
+    Counts are published as metrics.tick when the tick ends.
+    """
+
+    def __init__(self, ex, lookbacks: Optional[Dict[str, int]] = None):
+        self.ex = ex
+        self.lookbacks = dict(lookbacks or {})
+        self._lock = threading.Lock()
+        self._memo: Dict[tuple, object] = {}
+        self.stats = {"reads": 0, "absorbed": 0}
+
+    def _get(self, key: tuple, fn):
+        with self._lock:
+            self.stats["reads"] += 1
+            if key in self._memo:
+                self.stats["absorbed"] += 1
+                return self._memo[key]
+        value = fn()
+        with self._lock:
+            self._memo[key] = value
+        return value
+
+    def universe(self) -> list:
+        return self._get(("universe",), lambda: SHARED.get(self.ex, "universe"))
+
+    def positions(self) -> dict:
+        return self._get(("positions", POSITIONS.generation), lambda: get_open_positions(self.ex))
+
+    def equity(self) -> float:
+        return self._get(("equity", POSITIONS.generation), lambda: ACCOUNT.equity(self.ex))
+
+    def _span(self, timeframe: str, limit: int) -> int:
+        return max(int(limit), int(self.lookbacks.get(timeframe, 0)))
+
+    def candles(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
+        """The last `limit` bars; the first read of a series fetches its full lookback."""
+        span = self._span(timeframe, limit)
+        df = self._get(("candles", symbol, timeframe, span), lambda: CANDLES.frame(self.ex, symbol, timeframe, span))
+        return _last(df, limit)
+
+    def frames(self, requests: Iterable[Tuple[str, str, int]]) -> Dict[tuple, Optional[pd.DataFrame]]:
+        """candles() for many (symbol, timeframe, limit); the series not read yet are fetched together.
+        A series that fails maps to None."""
+        keyed = [(sym, tf, limit, ("candles", sym, tf, self._span(tf, limit))) for sym, tf, limit in requests]
+        with self._lock:
+            missing = [(sym, tf, key[3]) for sym, tf, _, key in keyed if key not in self._memo]
+        fetched = CANDLES.frames(self.ex, missing) if missing else {}
+        out = {}
+        with self._lock:
+            for sym, tf, span in missing:
+                if fetched.get((sym, tf)) is not None:
+                    self._memo[("candles", sym, tf, span)] = fetched[(sym, tf)]
+            self.stats["reads"] += len(keyed)
+            self.stats["absorbed"] += len(keyed) - len(missing)
+            for sym, tf, limit, key in keyed:
+                df = self._memo.get(key)
+                out[(sym, tf)] = None if df is None else _last(df, limit)
+        return out
+
+    def indicators(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
+        """add_indicators() over the last `limit` bars, computed once per tick."""
+        return self._get(("indicators", symbol, timeframe, int(limit)),
+                         lambda: add_indicators(self.candles(symbol, timeframe, limit)))
+
+    def publish(self):
+        try:
+            STATE.set_metrics("tick", dict(self.stats))
+        except Exception:
+            pass
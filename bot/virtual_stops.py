@@ -0,0 +1,223 @@
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from . import clock
+from .batch_orders import cancel_many
+from .config import VIRTUAL_STOPS_PATH, VIRTUAL_STOP_DISASTER_PCT
+from .positions import POSITIONS
+from .state import STATE
+from .stops import move_stop, protective_stops, stop_price_of
+from .utils import log
+
+
+def _close_side(side: str) -> str:
+    return "sell" if side == "long" else "buy"
+
+
+def _breached(side: str, level: float, price: float) -> bool:
+    return price <= level if side == "long" else price >= level
+
+
+class VirtualStopEngine:
+    """Trailing/ladder stop levels held in memory and enforced client-side from the shared price feed.
+
+    A breach sends one reduce-only market exit. The exchange only keeps a wide disaster stop
+    (`disaster_pct` beyond the level), moved when the level has run a further `disaster_pct` away, so
+    trailing costs no requests until then. Levels are persisted to `path` on every change and
+    reloaded on restart; entries whose position is gone are dropped by sync().
+    """
+
+    def __init__(self, path: str = VIRTUAL_STOPS_PATH, disaster_pct: float = VIRTUAL_STOP_DISASTER_PCT):
+        self.path = path
+        self.disaster_pct = float(disaster_pct)
+        self._lock = threading.RLock()
+        self._stops: Dict[str, dict] = {}   # symbol -> {side, level, amount, tag, disaster, updated}
+        self._loaded = False
+        self.stats = {"armed": 0, "raised": 0, "fired": 0, "disaster_moves": 0, "errors": 0}
+
+    # --- persistence ---
+    def load(self):
+        with self._lock:
+            self._loaded = True
+            try:
+                with open(self.path) as f:
+                    self._stops = {s: dict(v) for s, v in (json.load(f) or {}).items()}
+                log("[VirtualStops] restored", len(self._stops), "stops from", self.path)
+            except FileNotFoundError:
+                self._stops = {}
+            except Exception as e:
+                log("[VirtualStops] could not read", self.path, str(e))
+                self._stops = {}
+
+    def _save(self):
+        try:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._stops, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log("[VirtualStops] could not persist:", str(e))
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    # --- levels ---
+    def get(self, symbol: str) -> Optional[dict]:
+        with self._lock:
+            self._ensure_loaded()
+            v = self._stops.get(symbol)
+            return dict(v) if v else None
+
+    def symbols(self):
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._stops)
+
+    def track(self, ex, symbol: str, side: str, level: float, amount: Optional[float] = None,
+              tag: Optional[str] = None) -> float:
+        """Arm a stop for the `side` ("long"/"short") position, or ratchet its level (never loosened).
+        Returns the level now in force.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            cur = self._stops.get(symbol)
+            if cur is None or cur.get("side") != side:
+                cur = {"side": side, "level": float(level), "amount": amount, "tag": tag, "disaster": None}
+                self._stops[symbol] = cur
+                self.stats["armed"] += 1
+            else:
+                better = level > cur["level"] if side == "long" else level < cur["level"]
+                if not better:
+                    return cur["level"]
+                cur["level"] = float(level)
+                if amount:
+                    cur["amount"] = amount
+                self.stats["raised"] += 1
+            cur["updated"] = clock.now()
+            self._save()
+        self._ensure_disaster(ex, symbol)
+        self._publish()
+        return float(level)
+
+    def disarm(self, symbol: str):
+        with self._lock:
+            self._ensure_loaded()
+            if self._stops.pop(symbol, None) is not None:
+                self._save()
+
+    # --- exchange side ---
+    def _resting(self, ex, symbol: str, v: dict):
+        stops = protective_stops(ex, symbol, _close_side(v["side"]))
+        if v.get("tag"):
+            stops = [o for o in stops if str(o.get("clientOrderId") or (o.get("info") or {}).get("clientOrderId")
+                                             or (o.get("info") or {}).get("clientAlgoId") or "").startswith(v["tag"])]
+        return stops
+
+    def _ensure_disaster(self, ex, symbol: str):
+        """Keep one exchange stop within 2 x disaster_pct of the level (anything tighter is kept as is)."""
+        v = self.get(symbol)
+        if v is None:
+            return
+        level, pct = v["level"], self.disaster_pct / 100.0
+        long_ = v["side"] == "long"
+        target = level * (1 - pct) if long_ else level * (1 + pct)
+        resting = self._resting(ex, symbol, v)
+        prices = [p for p in (stop_price_of(o) for o in resting) if p is not None]
+        if prices:
+            best = max(prices) if long_ else min(prices)
+            far = best < target - level * pct if long_ else best > target + level * pct
+            if not far:
+                self._set_disaster(symbol, best)
+                return
+        params = {"closePosition": True, "workingType": "MARK_PRICE", "timeInForce": "GTE_GTC"}
+        if v.get("tag"):
+            params["newClientOrderId"] = f"{v['tag']}{int(clock.now() * 1000)}"
+        placed = move_stop(ex, symbol, _close_side(v["side"]), target, params, amount=v.get("amount"),
+                           existing=resting, min_move_ticks=0)
+        if placed is not None:
+            self.stats["disaster_moves"] += 1
+            self._set_disaster(symbol, target)
+            log("[VirtualStops] disaster stop", symbol, round(target, 8), "level", round(level, 8))
+
+    def _set_disaster(self, symbol: str, price: float):
+        with self._lock:
+            v = self._stops.get(symbol)
+            if v is not None and v.get("disaster") != price:
+                v["disaster"] = price
+                self._save()
+
+    def check(self, ex, prices: Dict[str, float]) -> int:
+        """Fire every stop whose level the latest price has crossed; returns how many fired."""
+        fired = 0
+        for symbol in self.symbols():
+            v = self.get(symbol)
+            price = prices.get(symbol)
+            if v is None or not isinstance(price, (int, float)) or price <= 0:
+                continue
+            if _breached(v["side"], v["level"], float(price)) and self._fire(ex, symbol, v, float(price)):
+                fired += 1
+        return fired
+
+    def _fire(self, ex, symbol: str, v: dict, price: float) -> bool:
+        try:
+            pos = POSITIONS.get(ex, symbol)
+        except Exception:
+            pos = None
+        if not pos or pos.get("side") != v["side"]:
+            # Closed (or flipped) elsewhere, e.g. by the disaster stop
+            self.disarm(symbol)
+            return False
+        amount = float(pos.get("size") or v.get("amount") or 0)
+        try:
+            ex.create_order(symbol, "market", _close_side(v["side"]), amount, None, {"reduceOnly": True})
+        except Exception as e:
+            self.stats["errors"] += 1
+            log("[VirtualStops] exit failed", symbol, str(e))
+            return False
+        POSITIONS.invalidate(ex)
+        self.disarm(symbol)
+        self.stats["fired"] += 1
+        log("[VirtualStops] stop hit", symbol, v["side"], "level", v["level"], "price", price, "qty", amount)
+        try:
+            resting = self._resting(ex, symbol, v)
+            if resting:
+                cancel_many(ex, symbol, resting)
+        except Exception:
+            pass
+        try:
+            STATE.mark_close(symbol)
+        except Exception:
+            pass
+        self._publish()
+        return True
+
+    def sync(self, ex):
+        """Drop levels whose position is gone and re-place missing disaster stops (run on start-up)."""
+        try:
+            positions = POSITIONS.snapshot(ex)
+        except Exception as e:
+            log("[VirtualStops] sync skipped:", str(e))
+            return
+        for symbol in self.symbols():
+            v = self.get(symbol)
+            pos = positions.get(symbol)
+            if not pos or pos.get("side") != v["side"]:
+                self.disarm(symbol)
+                continue
+            self._ensure_disaster(ex, symbol)
+        self._publish()
+
+    def _publish(self):
+        try:
+            STATE.set_metrics("virtual_stops", {**self.stats, "active": len(self._stops)})
+        except Exception:
+            pass
+
+
+VIRTUAL_STOPS = VirtualStopEngine()
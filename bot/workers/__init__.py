@@ -1,3 +1,3 @@
-from . import monitor_worker, orphan_worker, pnl_worker  # re-export modules for convenience
+from . import monitor_worker, orphan_worker, pnl_worker, virtual_stop_worker  # re-export modules for convenience
 
 
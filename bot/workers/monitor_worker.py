@@ -1,42 +1,15 @@
 import threading
-import time
 
-from ..config import MONITOR_SECONDS, UNIVERSE_SIZE, ORPHAN_PROTECT_SECONDS, ORPHAN_MIN_AGE_SECONDS
+from .. import clock
+
+from ..config import MONITOR_SECONDS, UNIVERSE_SIZE, ORPHAN_PROTECT_SECONDS, ORPHAN_MIN_AGE_SECONDS, VIRTUAL_STOPS_ENABLED
 from ..utils import log
 from ..state import STATE
-from ..market_data import top_usdt_perps
-
-
-def _fetch_symbol_price(ex, symbol: str) -> float:
-    try:
-        t = ex.fetch_ticker(symbol)
-        info = t.get("info", {}) or {}
-        # Prefer mark price for PnL approximation; fallback to last/close
-        p = info.get("markPrice") or t.get("last") or t.get("close") or info.get("lastPrice")
-        return float(p) if p is not None else None
-    except Exception:
-        return None
-
-
-def _get_positions(ex) -> dict:
-    try:
-        poss = ex.fetch_positions()
-        open_map = {}
-        for p in poss:
-            sym = p.get("symbol")
-            amt = p.get("contracts") or p.get("positionAmt") or p.get("contractsAmount")
-            sz = float(amt or 0)
-            side = "long" if sz > 0 else "short" if sz < 0 else None
-            if side:
-                entry_price = p.get("entryPrice") or p.get("info", {}).get("entryPrice")
-                try:
-                    entry_price = float(entry_price) if entry_price is not None else None
-                except Exception:
-                    entry_price = None
-                open_map[sym] = {"side": side, "size": abs(sz), "entryPrice": entry_price}
-        return open_map
-    except Exception:
-        return {}
+from ..jobs import SHARED
+from ..fills import FILLS, SL
+from ..open_orders import OPEN_ORDERS, open_orders_for
+from ..stops import move_stop
+from ..virtual_stops import VIRTUAL_STOPS
 
 
 def _estimate_pnl_usdt(positions: dict, prices: dict) -> dict:
@@ -62,20 +35,15 @@ def _cancel_orphans(ex, symbols_without_pos):
                 continue
         except Exception:
             pass
-        try:
-            orders = ex.fetch_open_orders(sym)
-        except Exception:
-            orders = []
-        for o in orders:
-            if not o.get("reduceOnly"):
-                continue
+        for o in open_orders_for(ex, sym, kind="reduce_only"):
             ts = o.get("timestamp")
             if ts is not None:
-                age = (time.time() - ts/1000.0)
+                age = (clock.now() - ts/1000.0)
                 if age < ORPHAN_MIN_AGE_SECONDS:
                     continue
             try:
                 ex.cancel_order(o["id"], sym)
+                OPEN_ORDERS.note_cancelled(ex, sym, o["id"])
                 cancelled += 1
                 log("[Monitor] orphan cancelled", sym, o.get("id"))
             except Exception:
@@ -83,217 +51,177 @@ def _cancel_orphans(ex, symbols_without_pos):
     return cancelled
 
 
-def loop(ex):
-    while True:
-        try:
-            STATE.set_thread_status("monitor_worker", {"status": "running"})
+# Shared data this job reads (bot/jobs.py)
+NEEDS = ("universe", "positions", "quotes")
 
-            # Phase A: Universe refresh
-            try:
-                universe = top_usdt_perps(ex, UNIVERSE_SIZE)
-                if universe:
-                    STATE.set_universe(universe)
-            except Exception:
-                universe = []
 
-            # Phase B: Positions and prices
-            positions = _get_positions(ex)
-            STATE.set_positions(positions)
+def tick(ex, data: dict):
+    STATE.set_thread_status("monitor_worker", {"status": "running"})
+    if "positions" not in data:
+        # Without a positions view every exit would look orphaned
+        return
 
-            symbols = set(positions.keys())
-            symbols.update(STATE.snapshot().get("universe", []) or [])
+    # Phase A: Universe (shared 24h-volume ranking)
+    universe = (data.get("universe") or [])[:UNIVERSE_SIZE]
+    if universe:
+        STATE.set_universe(universe)
 
-            prices = {}
-            for sym in list(symbols)[:60]:
-                price = _fetch_symbol_price(ex, sym)
-                if price is not None:
-                    prices[sym] = price
-                    STATE.set_price(sym, price)
+    # Phase B: Positions and prices
+    positions = data["positions"]
+    STATE.set_positions(positions)
 
-            # Phase C: Orphan cleanup and SL adjustments based on TP stages
-            symbols_without_pos = [s for s in symbols if s not in positions]
-            cancelled = _cancel_orphans(ex, symbols_without_pos)
-            if cancelled:
-                log("[Monitor] orphan cancelled count:", cancelled)
+    symbols = set(positions.keys())
+    symbols.update(STATE.snapshot().get("universe", []) or [])
 
-            # Adjust SL after partial TPs if needed
+    prices = {}
+    quotes = data.get("quotes") or {}
+    for sym in symbols:
+        if sym in quotes:
+            prices[sym] = quotes[sym]["mid"]
+            STATE.set_price(sym, prices[sym])
+
+    # Phase C: Orphan cleanup and SL adjustments based on TP stages
+    symbols_without_pos = [s for s in symbols if s not in positions]
+    cancelled = _cancel_orphans(ex, symbols_without_pos)
+    if cancelled:
+        log("[Monitor] orphan cancelled count:", cancelled)
+
+    # Phase C2: Exit fills since the last tick (trades are only pulled for symbols whose size changed)
+    events = {}
+    try:
+        for ev in FILLS.poll(ex, positions):
+            events.setdefault(ev.symbol, []).append(ev)
+            log("[Monitor] fill", ev.symbol, ev.kind, ev.qty, "@", ev.price, "realized=", round(ev.realized_pnl, 4))
+            if ev.kind == SL and ev.symbol not in positions:
+                STATE.mark_close(ev.symbol)
+    except Exception as e:
+        log("[Monitor] fill tracking error:", str(e))
+
+    # Adjust SL after partial TPs if needed
+    try:
+        for sym, pos in positions.items():
+            meta = STATE.get_strategy_meta(sym)
+            stage = STATE.get_exit_stage(sym)
+            # Follow-through / early-exit (scalping): if configured in meta
             try:
-                for sym, pos in positions.items():
-                    meta = STATE.get_strategy_meta(sym)
-                    stage = STATE.get_exit_stage(sym)
-                    # Follow-through / early-exit (scalping): if configured in meta
-                    try:
-                        ft_cfg = meta.get("scalp_follow_through")
-                        if ft_cfg and sym in positions:
-                            side = positions.get(sym, {}).get("side")
-                            size = float(positions.get(sym, {}).get("size", 0))
-                            if size > 0 and side in ("long", "short"):
-                                # Trail SL per config
-                                try:
-                                    trail_mode = ft_cfg.get("trail_mode", "atr")
-                                    atr_mult = float(ft_cfg.get("atr_mult", 1.0))
-                                    entry = float(ft_cfg.get("entry_price", 0))
-                                    sl_dist = float(ft_cfg.get("sl_dist", 0))
-                                    last = STATE.snapshot().get("prices", {}).get(sym)
-                                    if isinstance(last, (int, float)) and last > 0:
-                                        if trail_mode == "atr":
-                                            # Approximate ATR trail using sl_dist / ATR_MULT_SL ratio
-                                            # Adjust SL a fraction toward price as it moves
-                                            new_sl = None
-                                            if side == "long":
-                                                target = last - atr_mult * max(1e-9, sl_dist)
-                                                new_sl = max(entry, target)
-                                                side_o = "sell"
-                                            else:
-                                                target = last + atr_mult * max(1e-9, sl_dist)
-                                                new_sl = min(entry, target)
-                                                side_o = "buy"
-                                            try:
-                                                from ..orders import cancel_reduce_only_stop_orders
-                                                cancel_reduce_only_stop_orders(ex, sym)
-                                            except Exception:
-                                                pass
-                                            try:
-                                                ex.create_order(sym, "STOP_MARKET", side_o, size, params={"reduceOnly": True, "stopPrice": float(new_sl)})
-                                                log("[Monitor] trailing SL (scalp)", sym, new_sl)
-                                            except Exception as e:
-                                                log("[Monitor] trail place fail", sym, str(e))
-                                except Exception:
-                                    pass
-                            # Early-exit (follow-through): if price fails to reach min R within N bars from entry ts
-                            try:
-                                ft_bars = int(ft_cfg.get("follow_through_bars", 3))
-                                min_r = float(ft_cfg.get("min_follow_through_r", 0.5))
-                                # If we had timestamps per entry, could compute bar count; simplified no-op for now
-                            except Exception:
-                                pass
-                    except Exception:
-                        pass
-                    if not meta:
-                        continue
-                    # Check open reduce-only TPs to infer filled stages
-                    try:
-                        ro = ex.fetch_open_orders(sym)
-                    except Exception:
-                        ro = []
-                    # Count remaining TP orders
-                    remaining_tps = [o for o in ro if o.get("reduceOnly") and "TAKE_PROFIT" in (o.get("type", "").upper())]
-                    total_expected = len(meta.get("targets", [])[:3])
-                    if total_expected == 0:
-                        continue
-                    remaining = len(remaining_tps)
-                    # Initialize baseline tp_remaining in meta and skip adjustments on first observation
-                    prev_tp_rem = meta.get("tp_remaining")
-                    if prev_tp_rem is None:
+                ft_cfg = meta.get("scalp_follow_through")
+                if ft_cfg and sym in positions:
+                    side = positions.get(sym, {}).get("side")
+                    size = float(positions.get(sym, {}).get("size", 0))
+                    if size > 0 and side in ("long", "short"):
+                        # Trail SL per config
                         try:
-                            cur = dict(meta)
-                            cur["tp_remaining"] = remaining
-                            STATE.set_strategy_meta(sym, cur)
+                            trail_mode = ft_cfg.get("trail_mode", "atr")
+                            atr_mult = float(ft_cfg.get("atr_mult", 1.0))
+                            entry = float(ft_cfg.get("entry_price", 0))
+                            sl_dist = float(ft_cfg.get("sl_dist", 0))
+                            last = STATE.snapshot().get("prices", {}).get(sym)
+                            if isinstance(last, (int, float)) and last > 0:
+                                if trail_mode == "atr":
+                                    # Approximate ATR trail using sl_dist / ATR_MULT_SL ratio
+                                    # Adjust SL a fraction toward price as it moves
+                                    new_sl = None
+                                    if side == "long":
+                                        target = last - atr_mult * max(1e-9, sl_dist)
+                                        new_sl = max(entry, target)
+                                        side_o = "sell"
+                                    else:
+                                        target = last + atr_mult * max(1e-9, sl_dist)
+                                        new_sl = min(entry, target)
+                                        side_o = "buy"
+                                    if VIRTUAL_STOPS_ENABLED:
+                                        VIRTUAL_STOPS.track(ex, sym, side, new_sl, amount=size)
+                                    elif move_stop(ex, sym, side_o, new_sl, {"reduceOnly": True}, amount=size) is not None:
+                                        log("[Monitor] trailing SL (scalp)", sym, new_sl)
                         except Exception:
                             pass
-                        continue
-                    # No change → no adjustment
-                    if remaining >= prev_tp_rem:
-                        continue
-                    # One or more TP orders filled
-                    fills_now = max(0, prev_tp_rem - remaining)
-                    new_stage = min(total_expected, stage + fills_now)
-                    log("[Monitor] TP fill detected", sym, f"prev_remaining={prev_tp_rem}", f"now={remaining}", f"stage {stage}->{new_stage}")
-                    # Update meta with new tp_remaining
+                    # Early-exit (follow-through): if price fails to reach min R within N bars from entry ts
                     try:
-                        cur = dict(meta)
-                        cur["tp_remaining"] = remaining
-                        STATE.set_strategy_meta(sym, cur)
+                        ft_bars = int(ft_cfg.get("follow_through_bars", 3))
+                        min_r = float(ft_cfg.get("min_follow_through_r", 0.5))
+                        # If we had timestamps per entry, could compute bar count; simplified no-op for now
                     except Exception:
                         pass
-                    # Adjust SL per stage transitions
-                    adj_sl = None
-                    if new_stage >= 1 and stage < 1:
-                        # After TP1 -> move SL to breakeven (entry)
-                        entry_proxy = meta.get("entry") or positions.get(sym, {}).get("entryPrice") or STATE.snapshot().get("prices", {}).get(sym)
-                        if entry_proxy:
-                            adj_sl = float(entry_proxy)
-                    if new_stage >= 2 and stage < 2:
-                        # After TP2 -> move SL to TP1
-                        t1s = meta.get("targets") or []
-                        if t1s:
-                            adj_sl = float(t1s[0])
-                    if new_stage >= total_expected:
-                        # All TPs filled; position should be closed by TPs soon
-                        try:
-                            STATE.set_exit_stage(sym, new_stage)
-                            STATE.mark_close(sym)
-                        except Exception:
-                            pass
-                        log("[Monitor] all TPs filled; awaiting position closure", sym)
-                        continue
-                    if adj_sl is not None and pos.get("size", 0) > 0:
-                        # Cancel existing STOP SLs (reduceOnly or closePosition), then place a new closePosition SL
-                        try:
-                            try:
-                                old_orders = ex.fetch_open_orders(sym)
-                            except Exception:
-                                old_orders = []
-                            for o in old_orders:
-                                try:
-                                    t_upper = (o.get("type") or "").upper()
-                                    is_stop = "STOP" in t_upper
-                                    ro = bool(o.get("reduceOnly"))
-                                    # Some exchanges expose closePosition under params or info
-                                    info = o.get("info", {}) or {}
-                                    params = o.get("params", {}) or {}
-                                    cp = bool(o.get("closePosition") or params.get("closePosition") or info.get("closePosition"))
-                                    if is_stop and (ro or cp):
-                                        ex.cancel_order(o.get("id"), sym)
-                                        log("[Monitor] cancelled old SL", sym, o.get("id"))
-                                except Exception:
-                                    pass
-                            side = "sell" if pos.get("side")=="long" else "buy"
-                            last = STATE.snapshot().get("prices", {}).get(sym)
-                            if isinstance(last, (int, float)):
-                                if side == "sell" and adj_sl >= last:
-                                    adj_sl = last * 0.999
-                                elif side == "buy" and adj_sl <= last:
-                                    adj_sl = last * 1.001
-                            ex.create_order(
-                                sym,
-                                "STOP_MARKET",
-                                side,
-                                None,
-                                params={
-                                    # Do NOT send reduceOnly with closePosition on Binance (-1106)
-                                    "closePosition": True,
-                                    "stopPrice": float(adj_sl),
-                                    "workingType": "MARK_PRICE",
-                                    "timeInForce": "GTE_GTC",
-                                },
-                            )
-                            log("[Monitor] SL adjusted (closePosition)", sym, adj_sl)
-                        except Exception as e:
-                            log("[Monitor] SL adjust fail", sym, str(e))
-                    try:
-                        STATE.set_exit_stage(sym, new_stage)
-                    except Exception:
-                        pass
-            except Exception as e:
-                log("[Monitor] stage adjust error:", str(e))
+            except Exception:
+                pass
+            if not meta:
+                continue
+            # Take-profit fills seen by the fill tracker move the stage; no order polling per position
+            hits = [ev.tp_stage for ev in events.get(sym, ()) if ev.tp_stage]
+            total_expected = len(meta.get("targets", [])[:3])
+            if total_expected == 0 or not hits:
+                continue
+            new_stage = min(total_expected, max(stage, *hits))
+            if new_stage <= stage:
+                continue
+            log("[Monitor] TP fill", sym, f"stage {stage}->{new_stage}")
+            # Adjust SL per stage transitions
+            adj_sl = None
+            if new_stage >= 1 and stage < 1:
+                # After TP1 -> move SL to breakeven (entry)
+                entry_proxy = meta.get("entry") or positions.get(sym, {}).get("entryPrice") or STATE.snapshot().get("prices", {}).get(sym)
+                if entry_proxy:
+                    adj_sl = float(entry_proxy)
+            if new_stage >= 2 and stage < 2:
+                # After TP2 -> move SL to TP1
+                t1s = meta.get("targets") or []
+                if t1s:
+                    adj_sl = float(t1s[0])
+            if new_stage >= total_expected:
+                # All TPs filled; position should be closed by TPs soon
+                try:
+                    STATE.set_exit_stage(sym, new_stage)
+                    STATE.mark_close(sym)
+                except Exception:
+                    pass
+                log("[Monitor] all TPs filled; awaiting position closure", sym)
+                continue
+            if adj_sl is not None and pos.get("size", 0) > 0:
+                # Move existing STOP SLs (reduceOnly or closePosition) to a closePosition SL at the new level
+                try:
+                    side = "sell" if pos.get("side")=="long" else "buy"
+                    last = STATE.snapshot().get("prices", {}).get(sym)
+                    if isinstance(last, (int, float)):
+                        if side == "sell" and adj_sl >= last:
+                            adj_sl = last * 0.999
+                        elif side == "buy" and adj_sl <= last:
+                            adj_sl = last * 1.001
+                    placed = move_stop(ex, sym, side, adj_sl, {
+                        # Do NOT send reduceOnly with closePosition on Binance (-1106)
+                        "closePosition": True,
+                        "workingType": "MARK_PRICE",
+                        "timeInForce": "GTE_GTC",
+                    }, amount=float(pos.get("size", 0)))
+                    if placed is not None:
+                        log("[Monitor] SL adjusted (closePosition)", sym, adj_sl)
+                except Exception as e:
+                    log("[Monitor] SL adjust fail", sym, str(e))
+            try:
+                STATE.set_exit_stage(sym, new_stage)
+            except Exception:
+                pass
+    except Exception as e:
+        log("[Monitor] stage adjust error:", str(e))
+
+    # Phase D: PnL compute
+    pnl = _estimate_pnl_usdt(positions, prices or STATE.snapshot().get("prices", {}))
+    STATE.set_pnl(pnl)
 
-            # Phase D: PnL compute
-            pnl = _estimate_pnl_usdt(positions, prices or STATE.snapshot().get("prices", {}))
-            STATE.set_pnl(pnl)
+    total = round(sum(pnl.values()) if pnl else 0.0, 4)
+    log("[Monitor] tick universe=", len(universe or []), "positions=", len(positions), "orphans_cancelled=", cancelled, "pnl_total=", total)
 
-            total = round(sum(pnl.values()) if pnl else 0.0, 4)
-            log("[Monitor] tick universe=", len(universe or []), "positions=", len(positions), "orphans_cancelled=", cancelled, "pnl_total=", total)
 
-            time.sleep(MONITOR_SECONDS)
+def loop(ex):
+    while True:
+        try:
+            tick(ex, SHARED.collect(ex, NEEDS))
+            clock.sleep(MONITOR_SECONDS)
         except Exception as e:
             log("[Monitor] error:", str(e))
-            time.sleep(MONITOR_SECONDS)
+            clock.sleep(MONITOR_SECONDS)
 
 
 def start(ex) -> threading.Thread:
-    t = threading.Thread(target=loop, args=(ex,), daemon=True)
-    t.start()
-    return t
+    return clock.start_thread(loop, args=(ex,), name="monitor_worker")
 
 
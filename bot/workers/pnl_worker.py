@@ -1,27 +1,12 @@
 import threading
-import time
+
+from .. import clock
 
 from ..config import PNL_MONITOR_SECONDS
 from ..utils import log
 from ..state import STATE
-
-
-def _fetch_symbol_price(ex, symbol: str) -> float:
-    try:
-        t = ex.fetch_ticker(symbol)
-        info = t.get("info", {}) or {}
-        bid = info.get("bidPrice") or t.get("bid")
-        ask = info.get("askPrice") or t.get("ask")
-        try:
-            if bid is not None and ask is not None:
-                from ..state import STATE
-                STATE.set_quote(symbol, float(bid), float(ask))
-        except Exception:
-            pass
-        p = t.get("last") or t.get("close") or info.get("lastPrice")
-        return float(p) if p is not None else None
-    except Exception:
-        return None
+from ..request_scheduler import UI, priority
+from ..jobs import SHARED
 
 
 def _estimate_pnl_usdt(positions: dict, price_lookup: callable) -> dict:
@@ -40,48 +25,58 @@ def _estimate_pnl_usdt(positions: dict, price_lookup: callable) -> dict:
     return pnl
 
 
-def loop(ex, get_positions_callable, get_symbols_callable):
-    while True:
+# Shared data this job reads (bot/jobs.py); quotes come from one all-symbol book-ticker request
+NEEDS = ("positions", "quotes")
+
+
+def tick(ex, data: dict):
+    STATE.set_thread_status("pnl_worker", {"status": "running"})
+    if "positions" not in data:
+        return
+    positions = data["positions"]
+    try:
+        STATE.set_positions(positions)
+    except Exception:
+        pass
+
+    # Publish prices for active symbols (positions + universe from state)
+    symbols = set(positions.keys())
+    try:
+        symbols.update(STATE.snapshot().get("universe", []) or [])
+    except Exception:
+        pass
+    quotes = data.get("quotes") or {}
+    for sym in symbols:
+        q = quotes.get(sym)
+        if q is None:
+            continue
         try:
-            STATE.set_thread_status("pnl_worker", {"status": "running"})
-            positions = get_positions_callable()
-            try:
-                STATE.set_positions(positions)
-            except Exception:
-                pass
+            STATE.set_quote(sym, q["bid"], q["ask"])
+            STATE.set_price(sym, q["mid"])
+        except Exception:
+            pass
 
-            # Refresh prices for active symbols (positions + universe from state)
-            symbols = set(positions.keys())
-            try:
-                snap_for_syms = STATE.snapshot()
-                symbols.update(snap_for_syms.get("universe", []) or [])
-            except Exception:
-                pass
-            for sym in list(symbols)[:50]:
-                price = _fetch_symbol_price(ex, sym)
-                if price is not None:
-                    try:
-                        STATE.set_price(sym, price)
-                    except Exception:
-                        pass
+    snap = STATE.snapshot()
+    pnl = _estimate_pnl_usdt(positions, lambda s: snap["prices"].get(s))
+    try:
+        STATE.set_pnl(pnl)
+    except Exception:
+        pass
+    log("[PNLWorker] tick symbols=", len(symbols), "positions=", len(positions), "pnl_total=", round(sum(pnl.values()) if pnl else 0.0, 4))
 
-            snap = STATE.snapshot()
-            pnl = _estimate_pnl_usdt(positions, lambda s: snap["prices"].get(s))
-            try:
-                STATE.set_pnl(pnl)
-            except Exception:
-                pass
-            log("[PNLWorker] tick symbols=", len(symbols), "positions=", len(positions), "pnl_total=", round(sum(pnl.values()) if pnl else 0.0, 4))
 
-            time.sleep(PNL_MONITOR_SECONDS)
+def loop(ex):
+    while True:
+        try:
+            # Display-only polling: yields to orders, account reads and strategy data
+            with priority(UI):
+                data = SHARED.collect(ex, NEEDS)
+            tick(ex, data)
+            clock.sleep(PNL_MONITOR_SECONDS)
         except Exception as e:
             log("[PNL Worker] error:", str(e))
-            time.sleep(PNL_MONITOR_SECONDS)
-
-
-def start(ex, get_positions_callable, get_symbols_callable) -> threading.Thread:
-    t = threading.Thread(target=loop, args=(ex, get_positions_callable, get_symbols_callable), daemon=True)
-    t.start()
-    return t
+            clock.sleep(PNL_MONITOR_SECONDS)
 
 
+def start(ex) -> threading.Thread:
+    return clock.start_thread(loop, args=(ex,), name="pnl_worker")
@@ -1,22 +1,35 @@
-import threading
-import time
 from datetime import datetime
 from typing import Optional
 
+from .. import clock
+
 from ..config import (
     SCALP1M_ENABLED,
     SCALP1M_UNIVERSE_SIZE,
     SCALP1M_REFRESH_SECONDS,
+    SCALP1M_SCAN_BUDGET_SECONDS,
     SCALP1M_MAX_POSITIONS,
     SCALP1M_BLACKLIST_HOURS,
+    VIRTUAL_STOPS_ENABLED,
+    PACING_ENABLED,
 )
 from ..utils import log as base_log
 from ..state import STATE
-from ..market_data import top_usdt_perps, fetch_ohlcv_df
+from ..market_data import fetch_ohlcv_df
+from ..jobs import SHARED
+from ..scan_budget import ScanBudget
+from ..pacing import PACER
 from ..strategies.scalp_1m_trail.strategy import Scalp1mTrailStrategy
+from ..strategies.scalp_1m_trail import rules
 from ..strategies.registry import _file_cfg
+from ..account import ACCOUNT
+from ..execution import EXECUTION, OrderIntent
+from ..orders import entry_params
+from ..leverage import LEVERAGES
 from ..risk import equity_from_balance, size_position, round_qty
-from ..orders import get_open_orders
+from ..stops import move_stop, protective_stops
+from ..virtual_stops import VIRTUAL_STOPS
+from ..positions import POSITIONS
 
 
 def slog(*a):
@@ -30,46 +43,30 @@ class Scalp1mWorker:
         self.blacklist_until = {}  # symbol -> epoch seconds
         self.entries = {}  # symbol -> {time, entry}
         self._placing = False  # guard against concurrent placements per loop
+        self.budget = ScanBudget("scalp1m", SCALP1M_SCAN_BUDGET_SECONDS, SCALP1M_UNIVERSE_SIZE)
 
     def _is_enabled(self) -> bool:
         return SCALP1M_ENABLED
 
     def _universe(self):
+        # Shared 24h-volume ranking (bot/jobs.py), refreshed once per UNIVERSE_TTL_SECONDS for all workers
         try:
-            return top_usdt_perps(self.ex, SCALP1M_UNIVERSE_SIZE)
+            return SHARED.get(self.ex, "universe")[:SCALP1M_UNIVERSE_SIZE]
         except Exception:
             return []
 
-    def _active_scalp_count(self) -> int:
+    def _positions(self) -> dict:
+        # Shared snapshot: a scan over the whole universe costs one positions request per TTL
         try:
-            poss = self.ex.fetch_positions()
+            return POSITIONS.snapshot(self.ex)
         except Exception:
-            poss = []
-        n = 0
-        for p in poss:
-            try:
-                amt = p.get("contracts") or p.get("positionAmt") or p.get("contractsAmount")
-                sz = float(amt or 0)
-                if abs(sz) > 0 and p.get("symbol") in self.entries:
-                    n += 1
-            except Exception:
-                pass
-        return n
+            return {}
+
+    def _active_scalp_count(self) -> int:
+        return sum(1 for sym in self._positions() if sym in self.entries)
 
     def _symbol_has_any_position(self, sym: str) -> bool:
-        try:
-            poss = self.ex.fetch_positions()
-        except Exception:
-            poss = []
-        for p in poss:
-            try:
-                if p.get("symbol") == sym:
-                    amt = p.get("contracts") or p.get("positionAmt") or p.get("contractsAmount")
-                    if abs(float(amt or 0)) > 0:
-                        return True
-            except Exception:
-                continue
-        return False
+        return sym in self._positions()
 
     def _place_entry(self, sym: str):
         # Fetch 1m data
@@ -90,16 +87,16 @@ class Scalp1mWorker:
             from ..config import SCALP1M_LEVERAGE as LEV_CAP, SCALP1M_MARGIN_FRACTION
         except Exception:
             LEV_CAP, SCALP1M_MARGIN_FRACTION = 10, 0.05
-        try:
-            # Attempt to read available balance (free collateral)
-            bal = self.ex.fetch_balance()
-            avail = float((bal.get("USDT") or {}).get("free") or bal.get("free", 0) or 0)
-        except Exception:
-            avail = equity
+        # Free collateral from the cached account view, net of margin held by in-flight entries
+        avail = ACCOUNT.available_margin(self.ex, default=equity)
         raw_cap = max(0.0, avail) * float(LEV_CAP) * float(SCALP1M_MARGIN_FRACTION)
         max_by_avail = max(0.0, avail) * float(LEV_CAP)
         # Use at least $10 notional if 5% is below $10, but never exceed available*leverage
         max_notional = min(max_by_avail, max(10.0, raw_cap))
+        # Never above what the leverage tiers allow at the scalp leverage
+        tier_cap = LEVERAGES.max_notional(self.ex, sym, LEV_CAP)
+        if tier_cap is not None:
+            max_notional = min(max_notional, tier_cap)
         notional = qty * entry
         if notional > max_notional and entry > 0:
             qty = round_qty(self.ex, sym, max(0.0, max_notional / entry))
@@ -114,34 +111,32 @@ class Scalp1mWorker:
         from ..config import MIN_NOTIONAL_USDT
         if notional < MIN_NOTIONAL_USDT:
             return
-        # Set leverage (scalp-specific) and isolated margin for this symbol
+        # Scalp-specific leverage and isolated margin are ensured by the execution engine
         try:
             from ..config import SCALP1M_LEVERAGE
         except Exception:
             SCALP1M_LEVERAGE = 10
-        try:
-            if hasattr(self.ex, "set_leverage"):
-                self.ex.set_leverage(SCALP1M_LEVERAGE, symbol=sym)
-        except Exception:
-            pass
-        try:
-            if hasattr(self.ex, "set_margin_mode"):
-                self.ex.set_margin_mode("isolated", symbol=sym)
-        except Exception:
-            pass
-        # Entry
         side = "buy" if dec.side == "long" else "sell"
+        intent = OrderIntent(symbol=sym, side=side, qty=qty, entry_price=entry, stop=stop,
+                             leverage=SCALP1M_LEVERAGE, margin_mode="isolated", cancel_exits=False,
+                             source="scalp_1m_trail", place=self._place_legs, meta={"side": dec.side})
         try:
-            entry_order = self.ex.create_order(sym, type="market", side=side, amount=qty)
-            slog("ENTRY", sym, dec.side, qty, entry)
+            EXECUTION.execute(self.ex, intent)
         except Exception as e:
             slog("entry fail", sym, str(e))
-            return
+
+    def _place_legs(self, ex, intent: OrderIntent):
+        """Market entry, then our closePosition SL (tagged so trailing only ever moves our own stop)."""
+        sym, qty, entry, stop = intent.symbol, intent.qty, intent.entry_price, intent.stop
+        pos_side = intent.meta["side"]
+        entry_order = ex.create_order(sym, type="market", side=intent.side, amount=qty, params=entry_params(ex))
+        POSITIONS.invalidate(ex)
+        slog("ENTRY", sym, pos_side, qty, entry)
         # Place initial closePosition SL
         try:
-            sl_side = "sell" if dec.side == "long" else "buy"
-            cid = f"scalp1m-sl-{int(time.time()*1000)}"
-            self.ex.create_order(sym, "STOP_MARKET", sl_side, None, params={
+            sl_side = "sell" if pos_side == "long" else "buy"
+            cid = f"scalp1m-sl-{int(clock.now()*1000)}"
+            ex.create_order(sym, "STOP_MARKET", sl_side, None, params={
                 # reduceOnly is redundant with closePosition on Binance and causes -1106
                 "closePosition": True,
                 "stopPrice": float(stop),
@@ -150,7 +145,10 @@ class Scalp1mWorker:
                 "newClientOrderId": cid,
             })
             slog("SL placed", sym, float(stop))
-            self.entries[sym] = {"time": time.time(), "entry": float(entry)}
+            self.entries[sym] = {"time": clock.now(), "entry": float(entry)}
+            if VIRTUAL_STOPS_ENABLED:
+                # The exchange SL above doubles as the disaster stop; trailing happens locally
+                VIRTUAL_STOPS.track(ex, sym, pos_side, float(stop), amount=float(qty), tag="scalp1m-sl-")
             try:
                 STATE.set_strategy_meta(sym, {
                     "strategy": "scalp_1m_trail",
@@ -164,15 +162,14 @@ class Scalp1mWorker:
                 pass
         except Exception as e:
             slog("sl place fail", sym, str(e))
+        return entry_order
 
     def _unrealized_pnl_pct(self, sym: str, entry: float) -> Optional[float]:
         try:
             t = self.ex.fetch_ticker(sym)
             last = t.get("last") or t.get("close") or (t.get("info", {}) or {}).get("lastPrice")
             last = float(last) if last is not None else None
-            if last is None or entry <= 0:
-                return None
-            return (last - entry) / entry * 100.0
+            return rules.pnl_pct(entry, last)
         except Exception:
             return None
 
@@ -184,138 +181,125 @@ class Scalp1mWorker:
         if entry <= 0:
             return
         pnl = self._unrealized_pnl_pct(sym, entry)
-        now = time.time()
+        now = clock.now()
         # Use the strategy's cfg (loaded from file + env overrides)
         ttl = int(self.strategy.cfg.get("TTL_SECONDS", 600))
         if pnl is None:
             return
         # Time stop if no profit within TTL
         min_pct = float(self.strategy.cfg.get("TTL_MIN_PROFIT_PCT", 1.0))
-        if (now - float(meta.get("time", now))) >= ttl and pnl < min_pct:
+        if rules.ttl_expired(now - float(meta.get("time", now)), pnl, ttl, min_pct):
             try:
                 # Market close reduceOnly
-                poss = self.ex.fetch_positions()
-                for p in poss:
-                    if p.get("symbol") == sym:
-                        amt = p.get("contracts") or p.get("positionAmt") or p.get("contractsAmount")
-                        sz = abs(float(amt or 0))
-                        if sz > 0:
-                            side = p.get("side")
-                            opp = "sell" if side == "long" else "buy"
-                            self.ex.create_order(sym, "market", opp, sz, params={"reduceOnly": True})
-                            slog("TTL close", sym)
-                            self.blacklist_until[sym] = now + SCALP1M_BLACKLIST_HOURS * 3600.0
-                            self.entries.pop(sym, None)
-                            return
+                p = self._positions().get(sym)
+                if p and p["size"] > 0:
+                    opp = "sell" if p["side"] == "long" else "buy"
+                    self.ex.create_order(sym, "market", opp, p["size"], params={"reduceOnly": True})
+                    POSITIONS.invalidate(self.ex)
+                    VIRTUAL_STOPS.disarm(sym)
+                    slog("TTL close", sym)
+                    self.blacklist_until[sym] = now + SCALP1M_BLACKLIST_HOURS * 3600.0
+                    self.entries.pop(sym, None)
+                    return
             except Exception:
                 pass
         # Laddered SL trailing
         levels = self.strategy.cfg.get("TRAIL_LEVELS", [])
         # Find highest level crossed
-        target_sl_pct = None
-        for lvl in levels:
-            try:
-                if pnl >= float(lvl.get("pnl_pct", 0.0)):
-                    target_sl_pct = float(lvl.get("sl_pct", 0.0))
-            except Exception:
-                continue
+        target_sl_pct = rules.ladder_sl_pct(pnl, levels)
         if target_sl_pct is None:
             return
         # Compute target SL price from entry
-        try:
-            poss = self.ex.fetch_positions()
-        except Exception:
-            poss = []
-        side = None
-        sz = 0.0
-        for p in poss:
-            if p.get("symbol") == sym:
-                amt = p.get("contracts") or p.get("positionAmt") or p.get("contractsAmount")
-                sz = abs(float(amt or 0))
-                side = p.get("side")
-                break
+        p = self._positions().get(sym) or {}
+        side = p.get("side")
+        sz = float(p.get("size") or 0.0)
         if sz <= 0 or side not in ("long", "short"):
             # Position closed externally -> blacklist and cleanup
-            self.blacklist_until[sym] = time.time() + SCALP1M_BLACKLIST_HOURS * 3600.0
+            self.blacklist_until[sym] = clock.now() + SCALP1M_BLACKLIST_HOURS * 3600.0
             self.entries.pop(sym, None)
             return
-        if side == "long":
-            new_sl = entry * (1.0 + target_sl_pct / 100.0)
-        else:
-            new_sl = entry * (1.0 - target_sl_pct / 100.0)
-        # Cancel prior SLs, then place new closePosition SL
-        try:
-            orders = self.ex.fetch_open_orders(sym)
-        except Exception:
-            orders = []
-        # Cancel only our own prior SLs: match clientOrderId tag when present
+        new_sl = rules.ladder_stop_price(side, entry, target_sl_pct)
+        if VIRTUAL_STOPS_ENABLED:
+            prev = (VIRTUAL_STOPS.get(sym) or {}).get("level")
+            level = VIRTUAL_STOPS.track(self.ex, sym, side, new_sl, amount=sz, tag="scalp1m-sl-")
+            if level != prev:
+                slog("trail SL (virtual)", sym, round(level, 8), f"pnl={round(pnl,3)}%")
+            return
+        # Move our own SL (matched by clientOrderId tag; other strategies' stops are left alone)
         our_tag_prefix = "scalp1m-sl-"
-        for o in orders:
-            try:
-                if not (o.get("reduceOnly") and "STOP" in (o.get("type", "").upper())):
-                    continue
-                # try to read client id from standardized field or raw info
-                coid = o.get("clientOrderId") or (o.get("info", {}) or {}).get("clientOrderId") or ""
-                if str(coid).startswith(our_tag_prefix):
-                    self.ex.cancel_order(o.get("id"), sym)
-            except Exception:
-                pass
-        try:
-            opp = "sell" if side == "long" else "buy"
-            cid2 = f"scalp1m-sl-{int(time.time()*1000)}"
-            self.ex.create_order(sym, "STOP_MARKET", opp, None, params={
-                "closePosition": True,
-                "stopPrice": float(new_sl),
-                "workingType": "MARK_PRICE",
-                "timeInForce": "GTE_GTC",
-                "newClientOrderId": cid2,
-            })
+        opp = "sell" if side == "long" else "buy"
+        own = []
+        for o in protective_stops(self.ex, sym, opp):
+            coid = o.get("clientOrderId") or (o.get("info", {}) or {}).get("clientOrderId") \
+                or (o.get("info", {}) or {}).get("clientAlgoId") or ""
+            if str(coid).startswith(our_tag_prefix):
+                own.append(o)
+        cid2 = f"scalp1m-sl-{int(clock.now()*1000)}"
+        placed = move_stop(self.ex, sym, opp, new_sl, {
+            "closePosition": True,
+            "workingType": "MARK_PRICE",
+            "timeInForce": "GTE_GTC",
+            "newClientOrderId": cid2,
+        }, amount=sz, existing=own)
+        if placed is not None:
             slog("trail SL", sym, round(new_sl, 8), f"pnl={round(pnl,3)}%")
-        except Exception as e:
-            slog("trail SL fail", sym, str(e))
+
+    def tick(self, ex=None, data: dict = None):
+        """One scan/trail pass; `data` may carry the shared universe (see NEEDS)."""
+        if not self._is_enabled():
+            return
+        universe = (data or {}).get("universe")
+        universe = universe[:SCALP1M_UNIVERSE_SIZE] if universe is not None else self._universe()
+        # Trail SL for active scalp entries first: open positions never wait behind the scan.
+        # Symbols near their stop or moving fast are trailed every tick, the rest every SCALP1M_REFRESH_SECONDS
+        for sym in list(self.entries.keys()):
+            if not PACING_ENABLED or PACER.due("scalp1m_trail", sym, SCALP1M_REFRESH_SECONDS):
+                self._trail_for_symbol(sym)
+        # Capacity: at most 1 scalp position
+        from ..config import SCALP1M_MAX_POSITIONS
+        if (self._active_scalp_count() < SCALP1M_MAX_POSITIONS) and not self._placing:
+            # Try to find an entry over the universe (first hit wins), within the scan budget
+            def _scan(batch):
+                for sym in batch:
+                    if self._active_scalp_count() >= SCALP1M_MAX_POSITIONS:
+                        return
+                    # Skip blacklisted
+                    until = float(self.blacklist_until.get(sym, 0.0) or 0.0)
+                    if until and clock.now() < until:
+                        continue
+                    # Skip if any position already exists on this symbol (do not interfere)
+                    if self._symbol_has_any_position(sym):
+                        continue
+                    # place
+                    self._placing = True
+                    self._place_entry(sym)
+                    self._placing = False
+
+            # Symbols the budget cut off lead the next tick, so the whole universe is still covered in turn
+            self.budget.run(self.budget.plan(universe), _scan)
+        else:
+            # Ensure flag resets if capacity is filled
+            self._placing = False
 
     def loop(self):
         while True:
             try:
                 if not self._is_enabled():
-                    time.sleep(2)
+                    clock.sleep(2)
                     continue
-                # Universe
-                universe = self._universe()
-                # Capacity: at most 1 scalp position
-                from ..config import SCALP1M_MAX_POSITIONS
-                if (self._active_scalp_count() < SCALP1M_MAX_POSITIONS) and not self._placing:
-                    # Try to find an entry over the universe (first hit wins)
-                    for sym in universe:
-                        # Skip blacklisted
-                        until = float(self.blacklist_until.get(sym, 0.0) or 0.0)
-                        if until and time.time() < until:
-                            continue
-                        # Skip if any position already exists on this symbol (do not interfere)
-                        if self._symbol_has_any_position(sym):
-                            continue
-                        # place
-                        self._placing = True
-                        self._place_entry(sym)
-                        self._placing = False
-                        if self._active_scalp_count() >= SCALP1M_MAX_POSITIONS:
-                            break
-                else:
-                    # Ensure flag resets if capacity is filled
-                    self._placing = False
-                # Trail SL for active scalp entries
-                for sym in list(self.entries.keys()):
-                    self._trail_for_symbol(sym)
-                time.sleep(max(1, int(SCALP1M_REFRESH_SECONDS)))
+                self.tick()
+                clock.sleep(max(1, int(SCALP1M_REFRESH_SECONDS)))
             except Exception as e:
                 slog("worker error", str(e))
-                time.sleep(max(1, int(SCALP1M_REFRESH_SECONDS)))
+                clock.sleep(max(1, int(SCALP1M_REFRESH_SECONDS)))
+
+
+# Shared data the scheduled job reads (bot/jobs.py)
+NEEDS = ("universe",)
 
 
-def start(ex) -> threading.Thread:
+def start(ex):
     w = Scalp1mWorker(ex)
-    t = threading.Thread(target=w.loop, daemon=True)
-    t.start()
-    return t
+    return clock.start_thread(w.loop, name="scalp1m_worker")
 
 
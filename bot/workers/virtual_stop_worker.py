@@ -0,0 +1,66 @@
+import threading
+
+from .. import clock
+
+from ..config import VIRTUAL_STOPS_POLL_SECONDS
+from ..utils import log
+from ..state import STATE
+from ..jobs import SHARED, fetch_quotes
+from ..request_scheduler import ACCOUNT, priority
+from ..virtual_stops import VIRTUAL_STOPS
+
+# Quotes are fetched here for the armed stops, not taken from the shared market-data source
+NEEDS = ()
+SYNC_SECONDS = 60
+# Quotes older than this many polls are not trusted for a breach; the disaster stop covers meanwhile
+STALE_POLLS = 3
+
+_last_sync = {"ts": None}
+_quotes = {"ts": None, "prices": {}}
+
+
+def _refresh_quotes(ex, symbols):
+    t0 = clock.now()
+    try:
+        # Stop enforcement outranks market data: admitted ahead of scans and never shed by an open breaker
+        with priority(ACCOUNT):
+            quotes = fetch_quotes(ex, symbols if len(symbols) == 1 else None)
+    except Exception as e:
+        log("[VirtualStops] quotes failed:", str(e))
+        return
+    _quotes.update(ts=t0, prices={s: q["mid"] for s, q in quotes.items()})
+
+
+def tick(ex, data: dict):
+    if _last_sync["ts"] is None:
+        # Restore persisted levels and drop those whose position closed while we were down
+        VIRTUAL_STOPS.load()
+    if _last_sync["ts"] is None or clock.now() - _last_sync["ts"] >= SYNC_SECONDS:
+        VIRTUAL_STOPS.sync(ex)
+        _last_sync["ts"] = clock.now()
+    STATE.set_thread_status("virtual_stop_worker", {"status": "running", "active": len(VIRTUAL_STOPS.symbols())})
+    symbols = VIRTUAL_STOPS.symbols()
+    if not symbols:
+        return
+    _refresh_quotes(ex, symbols)
+    age = None if _quotes["ts"] is None else clock.now() - _quotes["ts"]
+    if age is None or age > STALE_POLLS * VIRTUAL_STOPS_POLL_SECONDS:
+        log("[VirtualStops] no fresh quotes; leaving", len(symbols), "stops to the disaster stops")
+        return
+    fired = VIRTUAL_STOPS.check(ex, _quotes["prices"])
+    if fired:
+        log("[VirtualStops] exits sent:", fired)
+
+
+def loop(ex):
+    while True:
+        try:
+            tick(ex, SHARED.collect(ex, NEEDS))
+            clock.sleep(VIRTUAL_STOPS_POLL_SECONDS)
+        except Exception as e:
+            log("[VirtualStops Worker] error:", str(e))
+            clock.sleep(VIRTUAL_STOPS_POLL_SECONDS)
+
+
+def start(ex) -> threading.Thread:
+    return clock.start_thread(loop, args=(ex,), name="virtual_stop_worker")
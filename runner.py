@@ -1,8 +1,7 @@
-import time
+import bisect
 import traceback
 from datetime import datetime, UTC
 
-import pandas as pd
 import ccxt
 
 from bot.config import (
@@ -12,7 +11,13 @@ from bot.config import (
     MAX_POSITIONS,
     TP_R_MULT,
     POLL_SECONDS,
+    BAR_SETTLE_SECONDS,
+    PRECLOSE_WARMUP_SECONDS,
+    SCAN_BUDGET_SECONDS,
+    SCAN_BATCH_SIZE,
+    SCAN_MIN_UNIVERSE,
     LEVERAGE,
+    MARGIN_MODE,
     MAX_NOTIONAL_FRACTION,
     MIN_NOTIONAL_USDT,
     TZ,
@@ -21,45 +26,110 @@ from bot.config import (
     ORPHAN_MIN_AGE_SECONDS,
     SCAN_WHEN_FLAT_SECONDS,
     NON_SCALP_ENABLED,
+    REQUEST_SCHEDULER_ENABLED,
+    VIRTUAL_STOPS_ENABLED,
+    JOBS_ENABLED,
+    PACING_ENABLED,
+    MONITOR_SECONDS,
+    PNL_MONITOR_SECONDS,
+    SCALP1M_REFRESH_SECONDS,
+    VIRTUAL_STOPS_POLL_SECONDS,
 )
+from bot import clock
 from bot.utils import log
 from bot.state import STATE
-from bot.exchange_client import exchange, set_leverage_and_margin
-from bot.market_data import top_usdt_perps, fetch_ohlcv_df
-from bot.indicators import add_indicators, valid_row
+from bot.exchange_client import exchange
+from bot.execution import EXECUTION, OrderIntent
+from bot.candles import CANDLES
+from bot.jobs import JobScheduler
+from bot.pacing import PACER
+from bot.indicators import valid_row
+from bot.tick_context import TickContext
 from bot.signals import trend_and_signal, score_signal
-from bot.risk import equity_from_balance, size_position, round_qty, protective_prices
+from bot.account import ACCOUNT
+from bot.leverage import LEVERAGES
+from bot.resilience import CircuitOpen
+from bot.scan_budget import ScanBudget
+from bot.bar_scheduler import BarScheduler, server_offset, trigger_timeframe
+from bot.risk import size_position, round_qty, protective_prices
 from bot.strategies import load_strategies
-from bot.orders import cancel_reduce_only_orders, place_bracket_orders, maybe_update_trailing, place_reduce_only_exits, place_multi_target_orders
-from bot.positions import get_open_positions, wait_for_position_visible
+from bot.orders import maybe_update_trailing, place_reduce_only_exits
+from bot.positions import POSITIONS
+from bot.open_orders import open_orders_for
 from bot.storage import write_trade
 from bot.workers import pnl_worker
 from bot.workers import monitor_worker
 from bot.workers import scalp1m_worker
+from bot.workers import virtual_stop_worker
 import threading
 import uvicorn
 from bot.ui.app import app as ui_app
 
 
+def _requirements(strategies) -> dict:
+    """{timeframe: lookback} covering every strategy's needs."""
+    reqs = {}
+    for s in strategies:
+        for tf, lookback in s.required_timeframes().items():
+            reqs[tf] = max(reqs.get(tf, 0), lookback)
+    return reqs
+
+
+def _warmup(ex, strategies, universe):
+    """Pre-close phase: full histories into the candle cache and a fresh account view, so the close
+    itself only fetches the last bars (markets precision and leverage settings are already local).
+    """
+    t0 = clock.now()
+    reqs = _requirements(strategies)
+    CANDLES.frames(ex, [(sym, tf, lookback) for sym in universe for tf, lookback in reqs.items()])
+    try:
+        ACCOUNT.snapshot(ex)
+    except Exception as e:
+        log("warmup: account view unavailable:", str(e))
+    log(f"Pre-close warmup: {len(universe)} symbols x {len(reqs)} timeframes in {clock.now() - t0:.2f}s")
+
+
 def run():
     ex = exchange()
     ex.load_markets()
+    # Every symbol's leverage, margin mode and leverage tiers in bulk, so entries skip redundant settings calls
+    LEVERAGES.load(ex)
     strategies = load_strategies()
     try:
         log("Enabled strategies:", ", ".join(s.id for s in strategies))
     except Exception:
         pass
-    last_candle_time = None
+    bars = BarScheduler({TIMEFRAME, *(trigger_timeframe(s) for s in strategies)}, BAR_SETTLE_SECONDS,
+                        lambda: server_offset(ex))
+    lookbacks = _requirements(strategies)
     last_flat_scan_ts = 0.0
-
-    # Background workers (read-only) — unified monitor + pnl
-    monitor_worker.start(ex)
-    try:
-        scalp1m_worker.start(ex)
-        log("scalp_1m_trail worker started")
-    except Exception:
-        pass
-    pnl_worker.start(ex, lambda: get_open_positions(ex), lambda: universe if 'universe' in locals() else [])
+    scan_budget = ScanBudget("orchestrator", SCAN_BUDGET_SECONDS, UNIVERSE_SIZE, SCAN_MIN_UNIVERSE)
+    warmed_for = None
+
+    # Background workers — unified monitor + pnl
+    if JOBS_ENABLED:
+        # One scheduler runs them on their cadences; positions/quotes/universe are fetched once per cycle for all
+        # With PACING_ENABLED their intervals follow exposure, stop distance, movement and request budget
+        jobs = JobScheduler(pacer=PACER if PACING_ENABLED else None)
+        jobs.add("monitor", monitor_worker.tick, MONITOR_SECONDS, monitor_worker.NEEDS)
+        jobs.add("pnl", pnl_worker.tick, PNL_MONITOR_SECONDS, pnl_worker.NEEDS)
+        jobs.add("scalp1m", scalp1m_worker.Scalp1mWorker(ex).tick, max(1, int(SCALP1M_REFRESH_SECONDS)),
+                 scalp1m_worker.NEEDS)
+        if VIRTUAL_STOPS_ENABLED:
+            jobs.add("virtual_stops", virtual_stop_worker.tick, VIRTUAL_STOPS_POLL_SECONDS, virtual_stop_worker.NEEDS)
+        jobs.start(ex)
+        log("job scheduler started:", ", ".join(jobs.jobs))
+    else:
+        monitor_worker.start(ex)
+        try:
+            scalp1m_worker.start(ex)
+            log("scalp_1m_trail worker started")
+        except Exception:
+            pass
+        pnl_worker.start(ex)
+        if VIRTUAL_STOPS_ENABLED:
+            virtual_stop_worker.start(ex)
+            log("virtual stop worker started")
 
     # Start UI server (non-blocking) inside same process
     def _serve_ui():
@@ -69,20 +139,20 @@ def run():
 
     while True:
         try:
-            # Heartbeat: detect if a new closed LTF candle is available
-            hb = ex.fetch_ohlcv("BTC/USDT", timeframe=TIMEFRAME, limit=3)
-            hb_df = pd.DataFrame(hb, columns=["ts","o","h","l","c","v"])
-            hb_df["ts"] = pd.to_datetime(hb_df["ts"], unit="ms", utc=True)
-            latest_closed_ts = hb_df.iloc[-2]["ts"]
-            new_candle = last_candle_time != latest_closed_ts
-            if new_candle:
-                last_candle_time = latest_closed_ts
-                log(f"New {TIMEFRAME} close @ {latest_closed_ts.tz_convert(TZ)}")
+            # One memo for this iteration's reads: positions, universe, equity, candles and indicators
+            ctx = TickContext(ex, lookbacks)
+            # Bar closes on the exchange clock for every strategy timeframe; no heartbeat klines needed
+            closed_tfs = bars.closed()
+            new_candle = bool(closed_tfs)
+            for tf in closed_tfs:
+                log(f"New {tf} close @ {datetime.fromtimestamp(bars.last_close(tf), UTC).astimezone(TZ)}")
 
             # Orphan cleanup is handled by monitor_worker every few seconds
 
             # Build universe and persist to state for UI/PNL worker
-            universe = top_usdt_perps(ex, UNIVERSE_SIZE)
+            # Cut to what the last scans showed fits the scan budget (at most UNIVERSE_SIZE)
+            ranking = ctx.universe()
+            universe = ranking[:min(UNIVERSE_SIZE, scan_budget.size)]
             try:
                 from bot.state import STATE as _S
                 _S.set_universe(universe)
@@ -91,7 +161,7 @@ def run():
             log("[Orchestrator] Universe:", ", ".join(universe))
 
             # Existing positions
-            open_pos = get_open_positions(ex)
+            open_pos = ctx.positions()
             open_syms = set(open_pos.keys())
             # Exclude scalp_1m_trail positions from the global capacity count
             core_open_syms = {s for s in open_syms if (STATE.get_strategy_meta(s) or {}).get("strategy") != "scalp_1m_trail"}
@@ -100,22 +170,14 @@ def run():
             # Phase 2: Reconcile exits for existing positions
             for sym, pos in open_pos.items():
                 try:
-                    ltf = fetch_ohlcv_df(ex, sym, TIMEFRAME, limit=200)
-                    ltf = add_indicators(ltf)
+                    ltf = ctx.indicators(sym, TIMEFRAME, 200)
                     prev = ltf.iloc[-2]
                     if not valid_row(prev):
                         continue
                     entry_proxy = prev["close"]
                     stop, tp, _ = protective_prices("buy" if pos["side"]=="long" else "sell", entry_proxy, prev["atr"], TP_R_MULT)
                     # If no reduce-only orders exist, place them
-                    has_reduce_only = False
-                    try:
-                        for o in ex.fetch_open_orders(sym):
-                            if o.get("reduceOnly"):
-                                has_reduce_only = True
-                                break
-                    except Exception:
-                        has_reduce_only = False
+                    has_reduce_only = bool(open_orders_for(ex, sym, kind="reduce_only"))
                     if not has_reduce_only and pos.get("size", 0) > 0:
                         place_reduce_only_exits(ex, sym, pos["side"], pos["size"], stop, tp)
                 except Exception as e:
@@ -123,48 +185,16 @@ def run():
 
             # Scan + act on new candle, OR do a lightweight scan if under capacity for too long
             should_flat_scan = False
-            now_ts = time.time()
+            now_ts = clock.now()
             capacity_remaining = max(0, MAX_POSITIONS - len(core_open_syms))
             if not new_candle and capacity_remaining > 0 and (now_ts - last_flat_scan_ts) >= SCAN_WHEN_FLAT_SECONDS:
                 should_flat_scan = True
                 last_flat_scan_ts = now_ts
 
             if NON_SCALP_ENABLED and (new_candle or should_flat_scan):
-                # Strategy-based scan (reuse loaded strategies)
-                # Prefetch data per symbol/timeframe for strategies' needs
-                symbol_to_tf_data = {}
-                # Collect max requirements across strategies
-                reqs = {}
-                for s in strategies:
-                    for tf, lookback in s.required_timeframes().items():
-                        reqs[tf] = max(reqs.get(tf, 0), lookback)
-                for sym in universe:
-                    tf_map = {}
-                    for tf, lookback in reqs.items():
-                        try:
-                            tf_map[tf] = fetch_ohlcv_df(ex, sym, tf, limit=lookback)
-                        except Exception as e:
-                            tf_map[tf] = None
-                    symbol_to_tf_data[sym] = tf_map
-
-                # Let strategies prepare
-                for s in strategies:
-                    try:
-                        s.prepare(symbol_to_tf_data)
-                    except Exception:
-                        pass
-
-                # Evaluate decisions
-                decisions = []
-                for sym in universe:
-                    for s in strategies:
-                        try:
-                            data = {tf: df for tf, df in symbol_to_tf_data[sym].items() if df is not None}
-                            d = s.decide(sym, data)
-                            if d and d.side in ("long", "short"):
-                                decisions.append(d)
-                        except Exception as e:
-                            log("strategy decide fail", s.id, sym, str(e))
+                # Strategy-based scan: on a close only the strategies whose timeframe just closed, else all
+                active = [s for s in strategies if not new_candle or trigger_timeframe(s) in closed_tfs]
+                reqs = _requirements(active)
 
                 # Rank using confidence (0..1) first, then normalized score (score clamped to 0..100)
                 def _rank_key(d):
@@ -182,12 +212,44 @@ def run():
                         norm = 1.0
                     return (conf, norm)
 
-                # Build per-strategy groups
+                # Ranked buffer: decisions are inserted by rank as batches finish, per strategy (best first)
+                decisions = []
                 strat_to_ds = {}
-                for d in decisions:
-                    strat_to_ds.setdefault(d.strategy_id, []).append(d)
-                for sid in strat_to_ds:
-                    strat_to_ds[sid].sort(key=_rank_key, reverse=True)
+
+                def _buffer_key(d):
+                    return tuple(-v for v in _rank_key(d))
+
+                def _fetch_batch(batch):
+                    # Data per symbol/timeframe for strategies' needs; after a warmup only the last bars are fetched
+                    frames = ctx.frames([(sym, tf, lookback) for sym in batch for tf, lookback in reqs.items()])
+                    return {sym: {tf: frames[(sym, tf)] for tf in reqs} for sym in batch}
+
+                def _decide_batch(batch, symbol_to_tf_data):
+                    for s in active:
+                        try:
+                            s.prepare(symbol_to_tf_data)
+                        except Exception:
+                            pass
+                    for sym in batch:
+                        for s in active:
+                            try:
+                                data = {tf: df for tf, df in symbol_to_tf_data[sym].items() if df is not None}
+                                d = s.decide(sym, data)
+                                if d and d.side in ("long", "short"):
+                                    bisect.insort(decisions, d, key=_buffer_key)
+                                    bisect.insort(strat_to_ds.setdefault(d.strategy_id, []), d, key=_buffer_key)
+                            except Exception as e:
+                                log("strategy decide fail", s.id, sym, str(e))
+
+                # Open positions first, then last scan's signals and deferred symbols, then by volume, within the
+                # budget; the next batch is fetched while the current one is decided
+                plan = scan_budget.plan(ranking[:UNIVERSE_SIZE], held=open_syms)
+                scanned = scan_budget.run(plan, _decide_batch, batch=SCAN_BATCH_SIZE, fetch=_fetch_batch)
+                if len(scanned) < len(plan):
+                    log(f"[Orchestrator] Scan budget {SCAN_BUDGET_SECONDS}s spent: {len(scanned)}/{len(plan)} "
+                        f"symbols, {len(plan) - len(scanned)} deferred to the next scan")
+
+                scan_budget.set_candidates(d.symbol for d in decisions)
 
                 capacity = max(0, MAX_POSITIONS - len(core_open_syms))
                 selected = []
@@ -222,7 +284,7 @@ def run():
                             capacity -= 1
                 # Fall back if capacity was zero or no groups
                 if not selected:
-                    selected = sorted(decisions, key=_rank_key, reverse=True)
+                    selected = list(decisions)
 
                 log(
                     "Top decisions (balanced):",
@@ -232,8 +294,9 @@ def run():
                     ],
                 )
 
-                equity = equity_from_balance(ex)
+                equity = ctx.equity()
                 placed = 0
+                intents = []
                 for d in selected:
                     sym, side_sig, entry_price, atr = d.symbol, d.side, d.entry_price, d.atr
                     if sym in open_syms:
@@ -261,9 +324,10 @@ def run():
                     if notional < MIN_NOTIONAL_USDT:
                         log(f"SKIP {sym}: notional {notional:.2f} < MIN_NOTIONAL_USDT {MIN_NOTIONAL_USDT}")
                         continue
-
-                    set_leverage_and_margin(ex, sym)
-                    cancel_reduce_only_orders(ex, sym)
+                    if not LEVERAGES.notional_allowed(ex, sym, notional, LEVERAGE):
+                        log(f"SKIP {sym}: notional {notional:.2f} above the {LEVERAGE}x leverage tier cap "
+                            f"{LEVERAGES.max_notional(ex, sym, LEVERAGE):.2f}")
+                        continue
 
                     side_ex = "buy" if side_sig == "long" else "sell"
                     # Global spread guard
@@ -278,10 +342,12 @@ def run():
                                 continue
                     except Exception:
                         pass
-                    try:
-                        # Prefer multi-target if provided by strategy
-                        if d.targets and d.splits:
-                            place_multi_target_orders(ex, sym, side_ex, qty, entry_price, d.initial_stop or stop, d.targets, d.splits)
+
+                    def _entered(intent, result, error, d=d, stop=stop, tp=tp, atr=atr):
+                        if error is not None:
+                            log("Order rejected:", intent.symbol, str(error))
+                            return
+                        if intent.targets:
                             try:
                                 from bot.state import STATE as _S
                                 base_meta = {
@@ -290,8 +356,8 @@ def run():
                                     "targets": [float(x) for x in (d.targets or [])],
                                     "splits": [float(x) for x in (d.splits or [])],
                                     "initial_stop": float(d.initial_stop or stop),
-                                    "entry": float(entry_price),
-                                    "qty": float(qty),
+                                    "entry": float(intent.entry_price),
+                                    "qty": float(intent.qty),
                                 }
                                 # Merge any strategy-provided meta hints
                                 if getattr(d, 'meta', None):
@@ -300,36 +366,43 @@ def run():
                                         base_meta.update(m)
                                     except Exception:
                                         pass
-                                _S.set_strategy_meta(sym, base_meta)
+                                _S.set_strategy_meta(intent.symbol, base_meta)
                             except Exception:
                                 pass
-                        else:
-                            place_bracket_orders(ex, sym, side_ex, qty, entry_price, stop, tp)
-                        # After entry, poll briefly so positions become visible ASAP for workers/UI
-                        wait_for_position_visible(ex, sym, timeout_seconds=6.0, poll_seconds=0.5)
                         write_trade({
-                            "time": datetime.now(UTC).astimezone(TZ).isoformat(),
-                            "symbol": sym,
-                            "side": side_sig,
+                            "time": datetime.fromtimestamp(clock.now(), UTC).astimezone(TZ).isoformat(),
+                            "symbol": intent.symbol,
+                            "side": d.side,
                             "strategy": d.strategy_id,
                             "confidence": round((d.confidence or 0.0), 4),
-                            "qty": qty,
-                            "entry": entry_price,
+                            "qty": intent.qty,
+                            "entry": intent.entry_price,
                             "stop": stop,
                             "take_profit": tp,
                             "atr": atr,
                             "equity_snapshot": equity,
                             "dry_run": DRY_RUN,
                         })
-                        placed += 1
-                    except ccxt.BaseError as e:
-                        log("Order rejected:", sym, str(e))
+
+                    # Prefer multi-target if provided by strategy; the engine holds the margin until the fill shows up
+                    multi = bool(d.targets and d.splits)
+                    intents.append(OrderIntent(
+                        symbol=sym, side=side_ex, qty=qty, entry_price=entry_price,
+                        stop=(d.initial_stop or stop) if multi else stop, take_profit=tp,
+                        targets=d.targets if multi else None, splits=d.splits if multi else None,
+                        leverage=LEVERAGE, margin_mode=MARGIN_MODE, source=d.strategy_id, on_done=_entered,
+                    ))
+                    placed += 1
+
+                # Every symbol's settings, exit cleanup and legs run side by side; a slow symbol holds up only itself.
+                # Filled entries show up as positions from their order responses; no polling until the exchange lists them
+                EXECUTION.run(ex, intents)
 
             # Phase 5: Manage open positions: breakeven / trailing, and flip exits
-            for sym, pos in get_open_positions(ex).items():
+            # Positions are re-read only if an order went out this tick; frames/indicators come from Phase 2
+            for sym, pos in ctx.positions().items():
                 try:
-                    ltf = fetch_ohlcv_df(ex, sym, TIMEFRAME, limit=200)
-                    ltf = add_indicators(ltf)
+                    ltf = ctx.indicators(sym, TIMEFRAME, 200)
                     last = ltf.iloc[-1]
                     prev = ltf.iloc[-2]
                     if not valid_row(prev):
@@ -344,29 +417,50 @@ def run():
                         log("Flip out of long — closing", sym)
                         if not DRY_RUN:
                             ex.create_order(sym, "market", "sell", pos["size"], params={"reduceOnly": True})
+                            POSITIONS.invalidate(ex)
                         else:
                             log("[DRY_RUN] close long", sym)
                     elif pos["side"] == "short" and tr == "up":
                         log("Flip out of short — closing", sym)
                         if not DRY_RUN:
                             ex.create_order(sym, "market", "buy", pos["size"], params={"reduceOnly": True})
+                            POSITIONS.invalidate(ex)
                         else:
                             log("[DRY_RUN] close short", sym)
                 except Exception as e:
                     log("manage fail", sym, str(e))
 
-            time.sleep(POLL_SECONDS)
+            ctx.publish()
+
+            # Pre-close warmup for the strategies whose bar closes next, PRECLOSE_WARMUP_SECONDS ahead of it
+            due, closing = bars.next_closing()
+            if NON_SCALP_ENABLED and PRECLOSE_WARMUP_SECONDS > 0 and due is not None and due != warmed_for:
+                lead = due - PRECLOSE_WARMUP_SECONDS - clock.now()
+                if lead <= POLL_SECONDS:
+                    clock.sleep(max(0.0, lead))
+                    _warmup(ex, [s for s in strategies if trigger_timeframe(s) in closing],
+                            scan_budget.plan(ranking[:UNIVERSE_SIZE], held=open_syms))
+                    warmed_for = due
+
+            # Until the next bar close (plus settle) or POLL_SECONDS, whichever comes first
+            bars.sleep(POLL_SECONDS)
 
         except KeyboardInterrupt:
             log("Stopping…")
             break
         except ccxt.RateLimitExceeded:
-            log("Rate limit; sleeping 10s")
-            time.sleep(10)
+            # With the request scheduler, further calls are already held until Retry-After
+            backoff = 1 if REQUEST_SCHEDULER_ENABLED else 10
+            log(f"Rate limit; sleeping {backoff}s")
+            clock.sleep(backoff)
+        except CircuitOpen as e:
+            # Market data is being shed while the exchange is degraded; the breaker probes again after its cooldown
+            log("Exchange degraded:", str(e))
+            clock.sleep(5)
         except Exception as e:
             log("Loop error:", str(e))
             traceback.print_exc()
-            time.sleep(5)
+            clock.sleep(5)
 
 
 if __name__ == "__main__":
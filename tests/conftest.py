@@ -0,0 +1,93 @@
+import os
+import sys
+
+import ccxt
+import numpy as np
+import pandas as pd
+import pytest
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot import clock
+from bot.clock import SimulatedClock
+from bot.mock_api import MockFuturesApi, point_ccxt_at
+from bot.sim_exchange import SimExchange
+
+SIM_SYMBOL = "BTC/USDT:USDT"
+SIM_START = int(pd.Timestamp("2026-01-01 05:00", tz="UTC").value // 10**6)
+
+
+def _candles(step: float, n: int = 600) -> pd.DataFrame:
+    close = 100.0 + np.arange(n) * step
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        "ts": pd.date_range("2026-01-01", periods=n, freq="1min", tz="UTC"),
+        "open": open_, "high": np.maximum(open_, close) + 0.02, "low": np.minimum(open_, close) - 0.02,
+        "close": close, "volume": 10.0,
+    })
+
+
+@pytest.fixture
+def sim_clock():
+    """Installs a SimulatedClock at `start` (seconds) as the module clock; the previous clock is restored
+    on teardown. Calling it again installs a fresh clock."""
+    prev = clock.get_clock()
+
+    def install(start: float) -> SimulatedClock:
+        c = SimulatedClock(start)
+        clock.set_clock(c)
+        return c
+
+    yield install
+    clock.set_clock(prev)
+
+
+@pytest.fixture
+def make_sim():
+    """SimExchange factory: 600 1m bars of BTC/USDT:USDT from 2026-01-01 00:00, starting at 100 and moving
+    `step` per bar, with the replay clock at 05:00 (about 300 bars of history either side), no spread or fees."""
+    def make(step: float = 0.01) -> SimExchange:
+        return SimExchange({SIM_SYMBOL: _candles(step)}, start_ms=SIM_START, spread_pct=0.0, fee_pct=0.0)
+    return make
+
+
+@pytest.fixture
+def sim(make_sim) -> SimExchange:
+    return make_sim()
+
+
+@pytest.fixture
+def mock_api():
+    """Factory starting a MockFuturesApi over a sim; every server started is stopped on teardown."""
+    started = []
+
+    def start(sim_ex: SimExchange, **kwargs) -> MockFuturesApi:
+        api = MockFuturesApi(sim_ex, **kwargs)
+        api.start()
+        started.append(api)
+        return api
+
+    yield start
+    for api in started:
+        api.stop()
+
+
+def _binance_client(api: MockFuturesApi, **config):
+    """A real ccxt binanceusdm client talking to `api` (markets not loaded)."""
+    return point_ccxt_at(ccxt.binanceusdm({"apiKey": "k", "secret": "s", "enableRateLimit": False, **config}), api.url)
+
+
+@pytest.fixture
+def binance(sim, mock_api):
+    """ccxt binanceusdm client over a mock API backed by the `sim` fixture, markets loaded."""
+    ex = _binance_client(mock_api(sim))
+    ex.load_markets()
+    return ex
+
+
+@pytest.fixture
+def make_binance_client():
+    """Factory for more clients (or differently configured ones) against a mock API."""
+    return _binance_client
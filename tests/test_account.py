@@ -0,0 +1,45 @@
+import os
+import sys
+
+import ccxt
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.account import AccountState
+from bot.config import ACCOUNT_EQUITY_USDT
+from bot.positions import POSITIONS
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_balance_is_cached_until_our_own_fill_and_reservations_reduce_free_margin(binance):
+    ex = binance
+    calls = []
+    fetch = ex.fetch_balance
+    ex.fetch_balance = lambda *a, **k: calls.append(1) or fetch(*a, **k)
+    acct = AccountState(ttl_seconds=60)
+    equity = acct.equity(ex)
+    free = acct.available_margin(ex)
+    assert len(calls) == 1 and free == equity and acct.snapshot(ex)["positions"] == {}
+
+    with acct.reserving(ex, 25.0):
+        assert acct.available_margin(ex) == free - 25.0
+        ex.create_order(SYM, "market", "buy", 1.0)
+        POSITIONS.invalidate(ex)
+    assert len(calls) == 1
+    view = acct.snapshot(ex)
+    assert len(calls) == 2 and view["reserved"] == 0.0
+    assert view["used"] > 0 and list(view["positions"]) == [SYM]
+    assert view["available"] == view["free"] < free
+
+
+def test_equity_falls_back_to_configured_value_when_balance_is_unavailable():
+    class Down:
+        def fetch_balance(self, params=None):
+            raise ccxt.NetworkError("down")
+
+    acct = AccountState()
+    assert acct.equity(Down()) == ACCOUNT_EQUITY_USDT
+    assert acct.available_margin(Down(), default=7.0) == 7.0
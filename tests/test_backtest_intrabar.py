@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pandas as pd
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from backtest.intrabar import ChildBarIndex
+from backtest.mtf_5m_high_conf_backtest import simulate_trade
+
+
+def _bars(rows, start, freq):
+    ts = pd.date_range(start, periods=len(rows), freq=freq, tz="UTC")
+    return pd.DataFrame({"ts": ts, "open": [r[0] for r in rows], "high": [r[1] for r in rows],
+                         "low": [r[2] for r in rows], "close": [r[3] for r in rows], "volume": 1.0})
+
+
+# Long from 100, stop 99, targets 101/102/103; bar 2 spans both 99 and 101
+PARENT = _bars([(100.0, 100.5, 99.5, 100.2), (100.2, 101.5, 98.5, 100.0), (100.0, 100.1, 99.9, 100.0)],
+               "2026-01-01 00:00", "5min")
+
+
+def test_ambiguous_bar_defaults_to_stop_first():
+    sim = simulate_trade(100.0, 99.0, [101.0, 102.0, 103.0], PARENT)
+    assert sim["outcome"] == "sl"
+
+
+def test_ambiguous_bar_resolved_from_child_bars():
+    # Within the ambiguous 5m bar, the 1m path reaches 101 before dipping to 98.5
+    child = _bars([(100.2, 100.6, 100.1, 100.5), (100.5, 101.5, 100.4, 101.2), (101.2, 101.3, 98.5, 99.0),
+                   (99.0, 99.8, 98.9, 99.5), (99.5, 100.1, 99.4, 100.0)], "2026-01-01 00:05", "1min")
+    sim = simulate_trade(100.0, 99.0, [101.0, 102.0, 103.0], PARENT, ChildBarIndex(child, "5m"))
+    assert sim["outcome"] == "tp1" and sim["resolved"] == "sub_bar"
+
+
+def test_missing_child_bars_fall_back_to_stop_first():
+    child = _bars([(100.0, 100.1, 99.9, 100.0)], "2026-01-01 00:00", "1min")  # only covers bar 1
+    sim = simulate_trade(100.0, 99.0, [101.0, 102.0, 103.0], PARENT, ChildBarIndex(child, "5m"))
+    assert sim["outcome"] == "sl" and sim["resolved"] == "stop_first"
@@ -0,0 +1,43 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot import clock
+from bot.bar_scheduler import BarScheduler, trigger_timeframe
+from bot.strategies import registry
+
+
+def test_wakes_at_each_close_plus_settle_on_server_time_and_reports_closed_timeframes(sim_clock):
+    start = 1_767_225_600.0 + 10   # 10 s after a 1h boundary
+    sim_clock(start)
+    # Our clock runs 0.5 s ahead of the exchange
+    bars = BarScheduler(["5m", "1m", "15m"], settle_seconds=2.0, offset=lambda: 0.5)
+    assert bars.closed() == ["1m", "5m", "15m"]   # first call: everything counts as just closed
+    assert bars.closed() == []
+    assert bars.next_due() == start - 10 + 60 + 2.0 + 0.5
+    bars.sleep(3600)
+    assert clock.now() == start - 10 + 62.5 and bars.closed() == ["1m"]
+    clock.sleep(4 * 60)
+    assert bars.closed() == ["1m", "5m"]
+    bars.sleep(5)   # capped by max_seconds
+    assert clock.now() == start - 10 + 302.5 + 5 and bars.closed() == []
+
+
+def test_base_tf_strategies_are_scanned_on_their_own_close(sim_clock, monkeypatch):
+    monkeypatch.setattr(registry, "ENABLED_STRATEGIES", ["all"])
+    by_id = {s.id: s for s in registry.load_strategies()}
+    tfs = {sid: trigger_timeframe(s) for sid, s in by_id.items()}
+    assert tfs["mtf_5m_high_conf"] == tfs["scalping"] == "5m"   # BASE_TF, not the 15m default
+    assert tfs["mtf_ema_rsi_adx"] == "15m" and tfs["scalp_1m_trail"] == "1m"
+
+    start = 1_767_225_600.0   # on a 1h boundary
+    sim_clock(start)
+    bars = BarScheduler({"15m", *tfs.values()}, settle_seconds=0.0, offset=lambda: 0.0)
+    bars.closed()
+    clock.sleep(5 * 60)
+    closed = bars.closed()
+    assert closed == ["1m", "5m"]
+    assert sorted(sid for sid, tf in tfs.items() if tf in closed) == ["mtf_5m_high_conf", "scalp_1m_trail", "scalping"]
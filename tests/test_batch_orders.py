@@ -0,0 +1,62 @@
+import os
+import sys
+
+import ccxt
+import pytest
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.batch_orders import cancel_orders, place_orders
+
+SYM = "BTC/USDT:USDT"
+
+
+@pytest.fixture
+def ex(binance):
+    binance.create_order(SYM, "market", "buy", 2.0)
+    return binance
+
+
+def _leg(type_, amount, **params):
+    price = params.pop("price", None)
+    return {"symbol": SYM, "type": type_, "side": "sell", "amount": amount, "price": price,
+            "params": {"reduceOnly": True, **params}}
+
+
+def test_each_leg_gets_its_own_result_or_error(ex):
+    results = place_orders(ex, [
+        _leg("STOP_MARKET", 1.0, stopPrice=98.0),
+        _leg("TAKE_PROFIT_MARKET", 1.0, stopPrice=99.0),   # already below the market: would trigger now
+        _leg("limit", 0.5, price=110.0),
+        _leg("limit", 0.5, price=111.0),
+    ])
+    (sl, sl_err), (_, tp_err), (l1, l1_err), (l2, l2_err) = results
+    assert sl_err is None and l1_err is None and l2_err is None
+    assert isinstance(tp_err, ccxt.OrderImmediatelyFillable)
+    assert {l1["price"], l2["price"]} == {110.0, 111.0}
+    assert len(ex.fetch_open_orders(SYM)) == 2 and len(ex.fetch_open_orders(SYM, params={"trigger": True})) == 1
+
+
+def test_cancel_uses_batch_and_cancel_all_endpoints(ex):
+    placed = [o for o, _ in place_orders(ex, [_leg("STOP_MARKET", 1.0, stopPrice=98.0),
+                                             _leg("limit", 0.5, price=110.0), _leg("limit", 0.5, price=111.0)])]
+    gone = cancel_orders(ex, SYM, [placed[0], placed[1]])
+    assert [err for _, err in gone] == [None, None]
+    assert [o["id"] for o in ex.fetch_open_orders(SYM)] == [placed[2]["id"]]
+    more = [o for o, _ in place_orders(ex, [_leg("STOP_MARKET", 1.0, stopPrice=97.0)])]
+    everything = ex.fetch_open_orders(SYM) + more
+    assert all(err is None for _, err in cancel_orders(ex, SYM, everything, all_open=True))
+    assert ex.fetch_open_orders(SYM) == [] and ex.fetch_open_orders(SYM, params={"trigger": True}) == []
+
+
+def test_clearing_exits_spares_orders_the_index_has_not_seen_yet(ex):
+    from bot.open_orders import OPEN_ORDERS
+    from bot.orders import cancel_reduce_only_orders
+    place_orders(ex, [_leg("STOP_MARKET", 1.0, stopPrice=98.0), _leg("limit", 0.5, price=110.0)])
+    OPEN_ORDERS.orders(ex)   # index now lists only our two exits
+    manual = ex.create_order(SYM, "limit", "buy", 0.1, 90.0)
+    cancel_reduce_only_orders(ex, SYM)
+    assert [o["id"] for o in ex.fetch_open_orders(SYM)] == [manual["id"]]
+    assert ex.fetch_open_orders(SYM, params={"trigger": True}) == []
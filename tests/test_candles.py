@@ -0,0 +1,33 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.candles import CandleCache
+from bot.market_data import fetch_ohlcv_df
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_warm_history_is_extended_with_tail_fetches_and_matches_a_full_fetch(sim):
+    ex = sim
+    ex.advance(150 * 60)
+    cache = CandleCache()
+    calls = []
+    fetch = ex.fetch_ohlcv
+    ex.fetch_ohlcv = lambda *a, **k: calls.append(k.get("limit")) or fetch(*a, **k)
+
+    out = cache.frames(ex, [(SYM, "5m", 40), (SYM, "1m", 100)])
+    assert calls == [40, 100] and cache.stats["full"] == 2
+
+    ex.advance(7 * 60 + 20)   # one 5m bar closes, a new one is forming
+    calls.clear()
+    df = cache.frame(ex, SYM, "5m", 40)
+    assert calls == [3] and cache.stats["tail"] == 1
+    ex.fetch_ohlcv = fetch
+    fresh = fetch_ohlcv_df(ex, SYM, "5m", limit=40)
+    assert df["ts"].tolist() == fresh["ts"].tolist()
+    assert df[["open", "high", "low", "close"]].round(8).equals(fresh[["open", "high", "low", "close"]].round(8))
+    assert out[(SYM, "1m")] is not None and len(out[(SYM, "1m")]) == 100
@@ -0,0 +1,37 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot import clock
+from bot.clock import SimulatedClock
+
+
+def _replay():
+    c = SimulatedClock(start=1000.0, end=1060.0)
+    seen = []
+
+    def worker(name, every):
+        while True:
+            seen.append((c.now(), name))
+            c.sleep(every)
+
+    c.start_thread(worker, args=("fast", 7))
+    c.start_thread(worker, args=("slow", 20))
+    c.run(worker, args=("main", 30))
+    return seen
+
+
+def test_simulated_clock_interleaves_threads_deterministically():
+    seen = _replay()
+    assert seen == _replay()
+    assert [t for t, n in seen if n == "slow"] == [1000.0, 1020.0, 1040.0, 1060.0]
+    assert max(t for t, _ in seen) <= 1060.0
+    assert seen[:3] == [(1000.0, "fast"), (1000.0, "slow"), (1000.0, "main")]
+
+
+def test_module_clock_is_swappable(sim_clock):
+    sim_clock(5.0)
+    assert clock.now() == 5.0
@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot import orders
+from bot.execution import ExecutionEngine, OrderIntent
+from bot.positions import POSITIONS
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_symbols_place_concurrently_and_in_order_per_symbol():
+    engine = ExecutionEngine(max_workers=4)
+    release = threading.Event()
+    events = []
+
+    def slow(ex, intent):
+        # Blocks until the other symbol has been placed: proves it is not queued behind this one
+        assert release.wait(2)
+        events.append(("slow", intent.meta["n"]))
+        return intent.meta["n"]
+
+    def fast(ex, intent):
+        events.append(("fast", intent.meta["n"]))
+        release.set()
+        return intent.meta["n"]
+
+    mk = lambda sym, fn, n: OrderIntent(sym, "buy", 1.0, 10.0, cancel_exits=False, place=fn, meta={"n": n})
+    out = engine.run(type("Ex", (), {})(), [mk("A", slow, 1), mk("A", slow, 2), mk("B", fast, 3)])
+    assert [r for _, r, e in out] == [1, 2, 3] and all(e is None for _, _, e in out)
+    assert events == [("fast", 3), ("slow", 1), ("slow", 2)]
+    snap = engine.snapshot()
+    assert snap["placed"] == 3 and snap["queued"] == 0 and len(snap["recent"]) == 3
+
+
+def test_default_placement_brackets_the_entry_and_reports_errors_per_intent(sim, monkeypatch):
+    monkeypatch.setattr(orders, "DRY_RUN", False)
+    ex = sim
+    engine = ExecutionEngine()
+    done = []
+    ok = OrderIntent(SYM, "buy", 0.5, 100.0, stop=98.0, take_profit=103.0, leverage=5, margin_mode="cross",
+                     on_done=lambda i, r, e: done.append(e))
+    bad = OrderIntent("NOPE/USDT:USDT", "buy", 0.5, 100.0, stop=98.0, take_profit=103.0, cancel_exits=False)
+    (_, _, e1), (_, _, e2) = engine.run(ex, [ok, bad])
+    assert e1 is None and done == [None] and e2 is not None
+    assert ex.fetch_positions()[0]["side"] == "long"
+    kinds = sorted(o["type"] for o in ex.fetch_open_orders(SYM))
+    assert len(kinds) == 2
+    assert engine.snapshot()["failed"] == 1
+
+
+def test_filled_entry_shows_at_once_and_is_confirmed_by_a_later_positions_read(sim, monkeypatch):
+    monkeypatch.setattr(orders, "DRY_RUN", False)
+    ex = sim
+    lagging = {"on": True}
+    fetch = ex.fetch_positions
+    # The exchange lists the position only some time after the fill
+    ex.fetch_positions = lambda *a, **k: [] if lagging["on"] else fetch(*a, **k)
+    before = dict(POSITIONS.stats)
+
+    ExecutionEngine().execute(ex, OrderIntent(SYM, "buy", 0.5, 100.0, stop=98.0, take_profit=103.0))
+    pos = POSITIONS.snapshot(ex, max_age=0)[SYM]
+    assert pos["optimistic"] and pos["side"] == "long" and pos["size"] == 0.5 and pos["entryPrice"] > 0
+    assert POSITIONS.stats["confirmed"] == before["confirmed"]
+
+    lagging["on"] = False
+    pos = POSITIONS.snapshot(ex, max_age=0)[SYM]
+    assert "optimistic" not in pos and POSITIONS.assumed(ex) == {}
+    assert POSITIONS.stats["confirmed"] == before["confirmed"] + 1
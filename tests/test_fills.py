@@ -0,0 +1,59 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot import orders
+from bot.fills import MANUAL, TP1, TP2, FillTracker
+from bot.positions import POSITIONS
+from bot.state import STATE
+
+SYM = "BTC/USDT:USDT"
+
+
+def _positions(ex):
+    return POSITIONS.snapshot(ex, max_age=0)
+
+
+def test_tp_fills_are_typed_by_target_and_pulled_only_when_the_size_changes(sim, monkeypatch, tmp_path, sim_clock):
+    monkeypatch.setattr(orders, "DRY_RUN", False)
+    sim_clock(sim.now_ms() / 1000.0)
+    try:
+        entry = sim.fetch_ticker(SYM)["last"]
+        targets = [entry + 0.3, entry + 0.6, entry + 5.0]
+        orders.place_multi_target_orders(sim, SYM, "buy", 1.0, entry, entry - 2.0, targets, [0.5, 0.3, 0.2])
+        STATE.set_strategy_meta(SYM, {"targets": targets, "initial_stop": entry - 2.0, "entry": entry})
+        tracker = FillTracker(str(tmp_path / "cursors.json"))
+        fetch = sim.fetch_my_trades
+        calls = []
+        sim.fetch_my_trades = lambda *a, **k: calls.append(a) or fetch(*a, **k)
+
+        assert tracker.poll(sim, _positions(sim)) == [] and calls == []   # first look: cursor only
+        sim.advance(40 * 60)
+        [ev] = tracker.poll(sim, _positions(sim))
+        assert ev.kind == TP1 and ev.tp_stage == 1 and ev.qty == 0.5 and ev.realized_pnl > 0
+        assert tracker.poll(sim, _positions(sim)) == [] and len(calls) == 1   # unchanged size: no request
+
+        # A restart re-reads from the persisted cursor once and does not repeat the fill
+        restarted = FillTracker(str(tmp_path / "cursors.json"))
+        assert restarted.poll(sim, _positions(sim)) == [] and len(calls) == 2
+        sim.advance(30 * 60)
+        [ev2] = restarted.poll(sim, _positions(sim))
+        assert ev2.kind == TP2 and ev2.tp_stage == 2
+        assert restarted.snapshot()["realized_total"] > 0
+    finally:
+        STATE.set_strategy_meta(SYM, {})
+
+
+def test_untracked_close_is_manual_and_drops_the_cursor(sim, tmp_path, sim_clock):
+    sim_clock(sim.now_ms() / 1000.0)
+    sim.create_order(SYM, "market", "sell", 2.0)
+    tracker = FillTracker(str(tmp_path / "cursors.json"))
+    tracker.poll(sim, _positions(sim))
+    sim.advance(60)
+    sim.create_order(SYM, "market", "buy", 2.0, params={"reduceOnly": True})
+    [ev] = tracker.poll(sim, _positions(sim))
+    assert ev.kind == MANUAL and ev.qty == 2.0 and ev.realized_pnl < 0   # price rose against the short
+    assert tracker.snapshot()["tracked"] == 0
@@ -0,0 +1,39 @@
+import os
+import sys
+import threading
+import time
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.gateway import ExchangeGateway
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_threads_get_own_sessions_sharing_markets_and_requests_overlap(sim, mock_api, make_binance_client):
+    api = mock_api(sim, latency_ms=200)
+    gw = ExchangeGateway(lambda: make_binance_client(api, options={"adjustForTimeDifference": True}))
+    gw.enableRateLimit = False
+    gw.load_markets()
+    sessions = []
+
+    def work():
+        sessions.append(gw.session())
+        gw.fetch_ticker(SYM)
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    assert len({id(s) for s in sessions}) == 3 and gw.master not in sessions
+    assert all(s.markets is not None and s.enableRateLimit is False for s in sessions)
+    assert all(s.options["timeDifference"] == gw.master.options["timeDifference"] for s in sessions)
+    assert api.calls[("GET", "/fapi/v1/exchangeInfo")] == 1
+    assert elapsed < 0.5   # three 200 ms round trips in parallel, not in series
+    stats = gw.snapshot()
+    assert stats["fetch_ticker"]["calls"] == 3 and stats["sessions"] == 3
@@ -0,0 +1,45 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot import clock
+from bot.jobs import JobScheduler, SharedData, fetch_quotes
+from bot.workers import pnl_worker
+from bot.state import STATE
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_jobs_run_on_their_cadence_and_share_one_fetch_per_data_window(sim, sim_clock):
+    ex = sim
+    sim_clock(1_767_225_600.0)
+    fetches = []
+    shared = SharedData()
+    shared.register("positions", lambda ex, _: fetches.append("positions") or {}, 1.0)
+    shared.register("quotes", lambda ex, _: fetches.append("quotes") or {"X": 1}, 5.0)
+    seen = []
+    sched = JobScheduler(shared)
+    sched.add("fast", lambda ex, data: seen.append(("fast", sorted(data))), 2, needs=("positions", "quotes"))
+    sched.add("slow", lambda ex, data: seen.append(("slow", sorted(data))), 10, needs=("positions",))
+    sched.add("plain", lambda ex, data: seen.append(("plain", sorted(data))), 10)
+    assert sched.run_due(ex) == ["fast", "slow", "plain"]
+    assert fetches == ["positions", "quotes"]   # three jobs, one fetch per source
+    assert seen == [("fast", ["positions", "quotes"]), ("slow", ["positions"]), ("plain", [])]
+    assert sched.run_due(ex) == []
+    clock.sleep(2)
+    assert sched.run_due(ex) == ["fast"]
+    assert fetches == ["positions", "quotes", "positions"]   # quotes still within their 5 s window
+    assert sched.snapshot()["fast"]["runs"] == 2 and sched.next_due() == clock.now() + 2
+
+
+def test_pnl_job_prices_positions_from_the_shared_book_ticker(sim):
+    ex = sim
+    ex.create_order(SYM, "market", "buy", 1.0)
+    data = {"positions": {SYM: {"side": "long", "size": 1.0, "entryPrice": 99.0}}, "quotes": fetch_quotes(ex)}
+    pnl_worker.tick(ex, data)
+    snap = STATE.snapshot()
+    assert snap["prices"][SYM] == data["quotes"][SYM]["mid"]
+    assert abs(snap["pnl"][SYM] - (data["quotes"][SYM]["mid"] - 99.0)) < 1e-9
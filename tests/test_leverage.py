@@ -0,0 +1,39 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.leverage import LeverageCache
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_bulk_loaded_settings_skip_redundant_calls_and_tiers_cap_notional(sim, mock_api, make_binance_client):
+    sim.set_leverage(20, SYM)
+    ex = make_binance_client(mock_api(sim))
+    ex.load_markets()
+    cache = LeverageCache()
+    cache.load(ex)
+    assert cache.settings(ex, SYM)["leverage"] == 20
+    assert cache.settings(ex, SYM)["margin_mode"] == "cross"
+
+    calls = []
+    for name in ("set_leverage", "set_margin_mode"):
+        fn = getattr(ex, name)
+        setattr(ex, name, lambda *a, _n=name, _f=fn, **k: calls.append(_n) or _f(*a, **k))
+    cache.ensure(ex, SYM, 20, "cross")
+    assert calls == []
+    cache.ensure(ex, SYM, 20, "isolated")
+    cache.ensure(ex, SYM, 20, "isolated")
+    assert calls == ["set_margin_mode"]
+    reloaded = LeverageCache()
+    reloaded.load(ex)
+    assert reloaded.settings(ex, SYM)["margin_mode"] == "isolated"   # the exchange has it too
+
+    # Mock tiers: 125x up to 50k, 100x up to 250k, ..., 20x up to 10M
+    assert cache.max_notional(ex, SYM) == 10_000_000
+    assert cache.max_notional(ex, SYM, 100) == 250_000
+    assert not cache.notional_allowed(ex, SYM, 300_000, 100)
+    assert cache.notional_allowed(ex, SYM, 300_000, 50)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import ccxt
+import pytest
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+
+SYM = "BTC/USDT:USDT"
+
+
+@pytest.fixture
+def api(sim, mock_api):
+    return mock_api(sim)
+
+
+@pytest.fixture
+def client(api, make_binance_client):
+    return make_binance_client(api, options={"defaultType": "future", "adjustForTimeDifference": True})
+
+
+def test_ccxt_order_flow_through_mock_api(client):
+    ex = client
+    ex.load_markets()
+    ex.create_order(SYM, "market", "buy", 1.0)
+    sl = ex.create_order(SYM, "STOP_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 100.0})
+    pos = ex.fetch_positions([SYM])
+    assert pos[0]["side"] == "long" and pos[0]["contracts"] == 1.0
+    assert [o["id"] for o in ex.fetch_open_orders(SYM, params={"trigger": True})] == [sl["id"]]
+    with pytest.raises(ccxt.OrderImmediatelyFillable):
+        ex.create_order(SYM, "TAKE_PROFIT_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 100.0})
+    assert int(ex.last_response_headers["X-MBX-USED-WEIGHT-1M"]) > 0
+
+
+def test_weight_limit_returns_429_then_418_ban(api, client):
+    ex = client
+    ex.fetch_time()
+    api.weight_limit, api.ban_after = 0, 2
+    for _ in range(2):
+        with pytest.raises(ccxt.DDoSProtection, match="429"):
+            ex.fetch_time()
+    with pytest.raises(ccxt.DDoSProtection, match="418"):
+        ex.fetch_time()
+    assert api.stats["429"] == 2 and api.stats["418"] == 1
@@ -0,0 +1,38 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.open_orders import OpenOrdersIndex, order_kinds
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_one_account_wide_fetch_serves_every_symbol_until_invalidated(sim):
+    ex = sim
+    calls = []
+    fetch = ex.fetch_open_orders
+    ex.fetch_open_orders = lambda *a, **k: calls.append(a) or fetch(*a, **k)
+    ex.create_order(SYM, "market", "buy", 1.0)
+    sl = ex.create_order(SYM, "STOP_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 98.0})
+    tp = ex.create_order(SYM, "TAKE_PROFIT_MARKET", "sell", 1.0, params={"reduceOnly": True, "stopPrice": 110.0})
+    index = OpenOrdersIndex(ttl_seconds=60)
+    assert [index.orders(ex, f"S{i}/USDT:USDT") for i in range(200)] == [[]] * 200
+    assert [o["id"] for o in index.orders(ex, SYM, kind="sl")] == [sl["id"]]
+    assert [o["id"] for o in index.orders(ex, SYM, kind="tp")] == [tp["id"]]
+    assert len(index.orders(ex, SYM, kind="reduce_only")) == 2 and calls == [()]
+    index.note_cancelled(ex, SYM, tp["id"])
+    assert index.symbols(ex) == {SYM} and len(index.orders(ex, SYM)) == 1
+    index.invalidate(ex)
+    assert len(index.orders(ex, SYM)) == 2 and len(calls) == 2
+
+
+def test_binance_conditional_orders_are_indexed_from_the_algo_book(binance):
+    ex = binance
+    ex.create_order(SYM, "market", "buy", 1.0)
+    sl = ex.create_order(SYM, "STOP_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 98.0})
+    orders = OpenOrdersIndex().orders(ex)
+    assert [o["id"] for o in orders] == [sl["id"]]
+    assert order_kinds(orders[0]) == {"sl", "close_position", "reduce_only"}
@@ -0,0 +1,55 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot import clock
+from bot.jobs import fetch_quotes
+from bot.open_orders import OPEN_ORDERS
+from bot.pacing import ACTIVE, HOT, IDLE, Pacer
+from bot.positions import POSITIONS
+from bot.request_scheduler import ORDER, RequestScheduler, ScheduledExchange
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_intervals_follow_exposure_and_stop_distance_and_stretch_near_the_weight_limit(sim, sim_clock):
+    sim_clock(sim.now_ms() / 1000.0)
+    sched = RequestScheduler(weight_limit=1000, time_fn=clock.now)
+    ex = ScheduledExchange(sim, sched)
+    pacer = Pacer(fast_factor=0.5, slow_factor=3, near_stop_pct=0.5, budget_share=0.7)
+
+    pacer.observe(ex, {"quotes": fetch_quotes(ex), "positions": {}})
+    assert pacer.level == IDLE and pacer.interval(2) == 6
+
+    sim.create_order(SYM, "market", "buy", 1)
+    pacer.observe(ex, {"quotes": fetch_quotes(ex), "positions": POSITIONS.snapshot(ex, max_age=0)})
+    assert pacer.level == ACTIVE and pacer.interval(2) == 2
+
+    mid = fetch_quotes(ex)[SYM]["mid"]
+    sim.create_order(SYM, "STOP_MARKET", "sell", None, params={"closePosition": True, "stopPrice": mid * 0.998})
+    OPEN_ORDERS.invalidate(ex)   # as our own placements do
+    pacer.observe(ex, {"quotes": fetch_quotes(ex), "positions": POSITIONS.snapshot(ex, max_age=0)})
+    assert pacer.level == HOT and pacer.symbol_level(SYM) == HOT and pacer.interval(2) == 1
+    assert pacer.due("trail", SYM, 3) and pacer.due("trail", SYM, 3)   # hot symbols: every call
+
+    # 800 of 1000 weight used: intervals stretch by 0.8 / 0.7, never past the slow pace
+    positions = POSITIONS.snapshot(ex, max_age=0)
+    sched.call(ORDER, 800 - sched.snapshot()["used_weight"], lambda: None)
+    pacer.observe(ex, {"quotes": {}, "positions": positions})
+    assert abs(pacer.interval(2) - 0.8 / 0.7) < 1e-9 and pacer.interval(10) <= 30
+
+
+def test_due_keeps_pace_with_a_job_polling_at_the_same_jittered_interval(sim_clock):
+    pacer = Pacer()
+    # A 3s job whose runs start a little late or early
+    runs = [0.0, 3.05, 5.98, 9.02, 11.96, 15.01]
+    due = []
+    for t in runs:
+        sim_clock(1_000.0 + t)
+        due.append(pacer.due("trail", SYM, 3))
+    assert due == [True] * len(runs)
+    sim_clock(1_016.0)
+    assert not pacer.due("trail", SYM, 3)   # well inside the period
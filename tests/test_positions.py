@@ -0,0 +1,35 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.positions import PositionBook, parse_position
+
+
+class CountingEx:
+    def __init__(self, positions):
+        self.positions = positions
+        self.calls = 0
+
+    def fetch_positions(self):
+        self.calls += 1
+        return list(self.positions)
+
+
+def test_scan_shares_one_request_until_invalidated():
+    book = PositionBook(ttl_seconds=60)
+    ex = CountingEx([{"symbol": "BTC/USDT:USDT", "contracts": 0.5, "side": "short", "entryPrice": 100.0}])
+    hits = [s for s in (f"S{i}/USDT:USDT" for i in range(200)) if s in book.snapshot(ex)]
+    assert hits == [] and ex.calls == 1
+    ex.positions.append({"symbol": "ETH/USDT:USDT", "contracts": 2.0, "side": "long"})
+    assert "ETH/USDT:USDT" not in book.snapshot(ex)
+    book.invalidate(ex)
+    assert book.get(ex, "ETH/USDT:USDT")["size"] == 2.0 and ex.calls == 2
+
+
+def test_parse_uses_explicit_side_for_unsigned_contracts():
+    assert parse_position({"contracts": 3.0, "side": "short"})["side"] == "short"
+    assert parse_position({"info": {"positionAmt": "-1.5"}}) == {"side": "short", "size": 1.5, "entryPrice": None}
+    assert parse_position({"contracts": 0, "side": "long"}) is None
@@ -0,0 +1,52 @@
+import os
+import sys
+import threading
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.request_scheduler import MARKET, UI, RequestScheduler, ScheduledExchange, priority
+
+
+class FakeEx:
+    def __init__(self):
+        self.calls = []
+        self.markets = {}
+        self.last_response_headers = {}
+
+    def fetch_ticker(self, symbol):
+        self.calls.append(("fetch_ticker", symbol))
+        self.last_response_headers = {"X-MBX-USED-WEIGHT-1M": "7"}
+        return {"symbol": symbol}
+
+    def create_order(self, symbol, type, side, amount=None, price=None, params=None):
+        self.calls.append(("create_order", symbol))
+        return {"id": "1"}
+
+
+def test_orders_keep_headroom_when_market_data_is_throttled():
+    now = [0.0]
+    sched = RequestScheduler(weight_limit=10, headroom=1.0, time_fn=lambda: now[0])
+    ex = ScheduledExchange(FakeEx(), sched)
+    sched.call(MARKET, 8, lambda: None)   # market data has used its 80% share
+    blocked = threading.Thread(target=ex.fetch_ticker, args=("BTC/USDT",))
+    blocked.start()
+    blocked.join(0.3)
+    assert blocked.is_alive()
+    assert ex.create_order("BTC/USDT", "market", "buy", 1) == {"id": "1"}
+    now[0] = 60.0   # next minute frees the budget
+    blocked.join(2)
+    assert not blocked.is_alive()
+    assert [c[0] for c in ex.calls] == ["create_order", "fetch_ticker"]
+
+
+def test_server_reported_weight_and_ui_priority():
+    sched = RequestScheduler(weight_limit=100, headroom=1.0, time_fn=lambda: 0.0)
+    ex = ScheduledExchange(FakeEx(), sched)
+    with priority(UI):
+        ex.fetch_ticker("ETH/USDT")
+    snap = sched.snapshot()
+    assert snap["used_weight"] == 7 and snap["server_used"] == 7
+    assert snap["ui_requests"] == 1 and snap["market_requests"] == 0
+    assert ex.markets == {}
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import ccxt
+import pytest
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.resilience import CircuitOpen, ResilientExchange
+
+
+class FlakyEx:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    def fetch_ticker(self, symbol):
+        self.calls.append("fetch_ticker")
+        if self.failures > 0:
+            self.failures -= 1
+            raise ccxt.RequestTimeout("timeout")
+        return {"symbol": symbol}
+
+    def create_order(self, symbol, type, side, amount=None, price=None, params=None):
+        self.calls.append("create_order")
+        if self.failures > 0:
+            raise ccxt.NetworkError("reset")
+        return {"id": "1"}
+
+
+def test_reads_are_retried_with_backoff_but_orders_are_not():
+    sleeps = []
+    ex = ResilientExchange(FlakyEx(2), max_attempts=3, base_delay=0.1, sleep=sleeps.append, time_fn=lambda: 0.0)
+    assert ex.fetch_ticker("BTC/USDT") == {"symbol": "BTC/USDT"}
+    assert len(sleeps) == 2 and all(0.0 <= s <= 0.4 for s in sleeps)
+    ex.inner.failures = 1
+    with pytest.raises(ccxt.NetworkError):
+        ex.create_order("BTC/USDT", "market", "buy", 1)
+    assert ex.inner.calls.count("create_order") == 1
+    snap = ex.snapshot()
+    assert snap["fetch_ticker"]["retries"] == 2 and snap["fetch_ticker"]["errors"] == {"RequestTimeout": 2}
+    assert sum(snap["fetch_ticker"]["latency_ms"].values()) == 3
+
+
+def test_open_breaker_sheds_market_data_lets_orders_through_and_recovers_after_a_probe():
+    now = [0.0]
+    ex = ResilientExchange(FlakyEx(10), max_attempts=1, failures=3, cooldown=30, sleep=lambda s: None,
+                           time_fn=lambda: now[0])
+    for _ in range(3):
+        with pytest.raises(ccxt.RequestTimeout):
+            ex.fetch_ticker("BTC/USDT")
+    assert ex.breaker("fetch_ticker").state == "open"
+    with pytest.raises(CircuitOpen):
+        ex.fetch_ticker("BTC/USDT")
+    assert ex.inner.calls.count("fetch_ticker") == 3 and ex.snapshot()["fetch_ticker"]["shed"] == 1
+    ex.inner.failures = 0
+    assert ex.create_order("BTC/USDT", "market", "buy", 1) == {"id": "1"}
+    now[0] = 31.0
+    assert ex.fetch_ticker("BTC/USDT") == {"symbol": "BTC/USDT"}
+    assert ex.breaker("fetch_ticker").state == "closed"
+
+
+def test_time_queued_in_a_saturated_scheduler_does_not_count_as_slow():
+    import time
+    from bot.request_scheduler import RequestScheduler, ScheduledExchange
+    t0 = time.time()
+    # One request per minute and a minute every 0.15s: every call after the first queues for the next window
+    sched = RequestScheduler(weight_limit=1, headroom=1.0, time_fn=lambda: (time.time() - t0) * 400.0)
+    ex = ResilientExchange(ScheduledExchange(FlakyEx(0), sched), max_attempts=1, failures=2, slow_ms=100,
+                           sleep=lambda s: None, time_fn=lambda: 0.0)
+    for _ in range(4):
+        assert ex.fetch_ticker("BTC/USDT") == {"symbol": "BTC/USDT"}
+    assert sched.stats["waited_s"] > 0.1
+    assert ex.breaker("fetch_ticker").state == "closed"
+    assert ex.snapshot()["fetch_ticker"]["latency_ms"]["le_25"] == 4
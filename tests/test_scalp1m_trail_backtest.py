@@ -0,0 +1,70 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.strategies.scalp_1m_trail import rules
+from backtest.scalp_1m_trail_backtest import Universe, Scalp1mReplay
+
+
+LEVELS = [
+    {"pnl_pct": 0.5, "sl_pct": -0.3},
+    {"pnl_pct": 0.8, "sl_pct": 0.0},
+    {"pnl_pct": 1.2, "sl_pct": 0.4},
+]
+
+
+def _frame(close, start="2026-01-01"):
+    close = np.asarray(close, dtype=float)
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        "ts": pd.date_range(start, periods=len(close), freq="1min", tz="UTC"),
+        "open": open_,
+        "high": np.maximum(open_, close) * 1.0001,
+        "low": np.minimum(open_, close) * 0.9999,
+        "close": close,
+        "volume": np.full(len(close), 10.0),
+    })
+
+
+def _cfg(**kw):
+    cfg = {"LOOKBACK": 300, "EMA_FAST": 9, "EMA_SLOW": 21, "ATR_LEN": 14, "SL_INIT_PCT": 2.0,
+           "TTL_SECONDS": 300, "TTL_MIN_PROFIT_PCT": 1.0, "TRAIL_LEVELS": LEVELS}
+    cfg.update(kw)
+    return cfg
+
+
+def test_vectorized_ladder_matches_scalar_rule():
+    pnl = np.array([-1.0, 0.4, 0.5, 0.9, 1.3, 0.6])
+    vec = rules.ladder_sl_pct_vec(pnl, LEVELS)
+    for p, v in zip(pnl, vec):
+        s = rules.ladder_sl_pct(p, LEVELS)
+        assert (s is None and np.isnan(v)) or s == v
+
+
+def test_ttl_close_blacklists_symbol():
+    # Slow uptrend: long entries that never reach TTL_MIN_PROFIT_PCT -> TTL close + blacklist
+    close = 100.0 * (1.0 + np.arange(700) * 0.00002)
+    uni = Universe({"AAA/USDT:USDT": _frame(close)})
+    trades = Scalp1mReplay(uni, cfg=_cfg(), max_positions=1, blacklist_hours=24).run(start_idx=300)
+    assert len(trades) == 1  # blacklisted for the rest of the replay
+    tr = trades.iloc[0]
+    assert tr["side"] == "long" and tr["reason"] == "ttl"
+    assert (tr["exit_time"] - tr["entry_time"]) == pd.Timedelta(minutes=5)
+
+
+def test_ladder_trails_stop_then_exits():
+    # Rally +1.5% after entry, then dump: the ladder stop at +0.4% should take the exit
+    base = 100.0 * (1.0 + np.arange(320) * 0.00002)
+    rally = base[-1] * np.linspace(1.0, 1.015, 6)[1:]
+    dump = np.full(20, base[-1] * 0.99)
+    uni = Universe({"AAA/USDT:USDT": _frame(np.r_[base, rally, dump])})
+    trades = Scalp1mReplay(uni, cfg=_cfg(TTL_SECONDS=3600), max_positions=1).run(start_idx=319, end_idx=321)
+    tr = trades.iloc[0]
+    assert tr["reason"] == "trail_sl"
+    assert abs(tr["exit_price"] - rules.ladder_stop_price("long", tr["entry_ref"], 0.4)) < 1e-6
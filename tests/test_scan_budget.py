@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot import clock
+from bot.scan_budget import ScanBudget
+
+
+def test_scan_orders_by_priority_stops_at_the_deadline_and_adapts_the_universe(sim_clock):
+    sim_clock(1_767_225_600.0)
+    universe = [f"S{i}" for i in range(20)]
+    budget = ScanBudget("t", budget_seconds=10, max_size=20, min_size=2)
+    budget.set_candidates(["S15", "S3", "NOT_LISTED"])
+    plan = budget.plan(universe, held=["HELD"])
+    assert plan[:4] == ["HELD", "S15", "S3", "S0"] and len(plan) == 21
+
+    seen = []
+
+    def scan(batch):
+        seen.extend(batch)
+        clock.sleep(0.5 * len(batch))   # 0.5 s per symbol
+
+    done = budget.run(plan, scan, batch=4)
+    # Five batches end exactly at the 10 s deadline; the last symbol would not fit and is deferred
+    assert done == seen and len(done) == 20 and budget.deferred == plan[20:]
+    snap = budget.snapshot()
+    assert snap["overruns"] == 0 and snap["coverage"] == round(20 / 21, 4)
+    # 0.5 s per symbol in a 10 s budget with 20% headroom: 16 symbols next time
+    assert budget.size == 16
+    nxt = budget.plan(universe)
+    assert nxt[:3] == ["S15", "S3", "S19"] and len(nxt) == 17   # S0..S15 plus the deferred S19
+
+
+def test_pipelined_pass_fetches_the_next_batch_while_the_current_one_is_computed():
+    budget = ScanBudget("p", budget_seconds=30, max_size=10)
+    started = set()
+    results = []
+
+    def fetch(batch):
+        started.add(batch[0])
+        return [s.lower() for s in batch]
+
+    def compute(batch, data):
+        if batch[0] == "A":
+            # Only possible if the fetch of the second batch is already in flight
+            deadline = time.time() + 2
+            while "C" not in started and time.time() < deadline:
+                time.sleep(0.005)
+        results.append((batch, data, "C" in started))
+
+    done = budget.run(["A", "B", "C", "D", "E"], compute, batch=2, fetch=fetch)
+    assert done == ["A", "B", "C", "D", "E"]
+    assert results[0] == (["A", "B"], ["a", "b"], True)
+    assert [r[1] for r in results] == [["a", "b"], ["c", "d"], ["e"]]
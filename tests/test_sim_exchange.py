@@ -0,0 +1,54 @@
+import os
+import sys
+
+import ccxt
+import pytest
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.workers.scalp1m_worker import Scalp1mWorker
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_market_entry_opens_position_and_take_profit_closes_it(sim):
+    ex = sim
+    ex.create_order(SYM, "market", "buy", 0.5)
+    tp = ex.create_order(SYM, "TAKE_PROFIT_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 103.5})
+    assert ex.fetch_positions()[0]["side"] == "long"
+    ex.advance(3600)  # price climbs 0.6 over the hour
+    assert ex.fetch_positions() == []
+    assert ex.fetch_order(tp["id"])["status"] == "closed"
+    assert ex.fetch_balance()["total"]["USDT"] > 1000.0
+
+
+def test_reduce_only_take_profit_fills_and_sibling_stays_open(make_sim):
+    ex = make_sim(step=-0.01)
+    ex.create_order(SYM, "market", "sell", 1.0)
+    sl = ex.create_order(SYM, "STOP_MARKET", "buy", 1.0, params={"reduceOnly": True, "stopPrice": 98.0})
+    tp = ex.create_order(SYM, "TAKE_PROFIT_MARKET", "buy", 1.0, params={"reduceOnly": True, "stopPrice": 96.6})
+    ex.advance(3600)  # price falls 97.0 -> 96.4
+    assert ex.fetch_order(tp["id"])["status"] == "closed"
+    # Exchange does not cancel the sibling exit; it stays open as an orphan
+    assert [o["id"] for o in ex.fetch_open_orders(SYM)] == [sl["id"]]
+
+
+def test_rejects_immediately_triggering_stop_and_duplicate_close_position(sim):
+    ex = sim
+    ex.create_order(SYM, "market", "buy", 0.5)
+    with pytest.raises(ccxt.OrderImmediatelyFillable):
+        ex.create_order(SYM, "STOP_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 104.0})
+    ex.create_order(SYM, "STOP_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 100.0})
+    with pytest.raises(ccxt.InvalidOrder):
+        ex.create_order(SYM, "STOP_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 101.0})
+
+
+def test_scalp_worker_runs_against_sim(sim):
+    ex = sim
+    w = Scalp1mWorker(ex)
+    w._place_entry(SYM)
+    stops = [o for o in ex.fetch_open_orders(SYM) if o["type"] == "stop_market"]
+    assert ex.fetch_positions()[0]["side"] == "long"
+    assert len(stops) == 1 and stops[0]["info"]["closePosition"]
@@ -0,0 +1,50 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.stops import STATS, move_stop
+
+SYM = "BTC/USDT:USDT"
+
+
+def _recording(ex):
+    calls = []
+    create, cancel = ex.create_order, ex.cancel_order
+    ex.create_order = lambda *a, **k: calls.append("create") or create(*a, **k)
+    ex.cancel_order = lambda *a, **k: calls.append("cancel") or cancel(*a, **k)
+    return calls
+
+
+def _stops(ex):
+    return [(o["side"], o["stopPrice"], o["info"]["closePosition"]) for o in ex.fetch_open_orders(SYM)]
+
+
+def test_new_stop_is_placed_before_the_old_one_goes_and_small_moves_are_skipped(sim):
+    ex = sim
+    ex.create_order(SYM, "market", "buy", 1.0)
+    ex.create_order(SYM, "STOP_MARKET", "sell", 1.0, params={"reduceOnly": True, "stopPrice": 98.0})
+    calls = _recording(ex)
+    assert move_stop(ex, SYM, "sell", 99.0, {"reduceOnly": True}, amount=1.0) is not None
+    assert calls == ["create", "cancel"] and _stops(ex) == [("sell", 99.0, False)]
+    skipped = STATS["skipped"]
+    assert move_stop(ex, SYM, "sell", 99.01, {"reduceOnly": True}, amount=1.0) is None
+    assert STATS["skipped"] == skipped + 1 and calls == ["create", "cancel"]
+
+
+def test_close_position_stop_is_swapped_without_a_gap_or_recreated_when_size_unknown(sim):
+    ex = sim
+    ex.create_order(SYM, "market", "buy", 1.0)
+    ex.create_order(SYM, "STOP_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 98.0})
+    calls = _recording(ex)
+    move_stop(ex, SYM, "sell", 99.0, {"closePosition": True}, amount=1.0)
+    assert calls == ["create", "cancel"] and _stops(ex) == [("sell", 99.0, False)]
+    ex.create_order(SYM, "STOP_MARKET", "sell", None, params={"closePosition": True, "stopPrice": 99.5})
+    calls.clear()
+    existing = [o for o in ex.fetch_open_orders(SYM) if o["info"]["closePosition"]]
+    move_stop(ex, SYM, "sell", 100.0, {"closePosition": True}, existing=existing)
+    # The sim, like Binance, refuses a second closePosition stop (-4130): free the slot, then place
+    assert calls == ["create", "cancel", "create"]
+    assert sorted(_stops(ex)) == [("sell", 99.0, False), ("sell", 100.0, True)]
@@ -0,0 +1,36 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.positions import POSITIONS
+from bot.tick_context import TickContext
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_repeated_reads_within_a_tick_hit_the_memo_until_an_order_goes_out(sim):
+    ex = sim
+    ex.advance(150 * 60)
+    calls = []
+    for name in ("fetch_ohlcv", "fetch_positions"):
+        fn = getattr(ex, name)
+        setattr(ex, name, lambda *a, _n=name, _f=fn, **k: calls.append(_n) or _f(*a, **k))
+
+    ctx = TickContext(ex, {"1m": 120})
+    short = ctx.candles(SYM, "1m", 60)                   # Phase 2: fetches the scan's full lookback
+    scan = ctx.frames([(SYM, "1m", 120)])[(SYM, "1m")]    # scan: served from the memo
+    assert len(short) == 60 and len(scan) == 120 and short["ts"].tolist() == scan["ts"].tolist()[-60:]
+    ind = ctx.indicators(SYM, "1m", 60)
+    assert ctx.indicators(SYM, "1m", 60) is ind and "atr" in ind
+    assert calls.count("fetch_ohlcv") == 1
+
+    ctx.positions()
+    ctx.positions()
+    assert calls.count("fetch_positions") == 1
+    ex.create_order(SYM, "market", "buy", 1)
+    POSITIONS.invalidate(ex)   # as order placement does
+    assert SYM in ctx.positions() and calls.count("fetch_positions") == 2
+    assert ctx.stats["absorbed"] == 4   # frames, candles inside indicators, indicators, positions
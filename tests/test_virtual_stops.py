@@ -0,0 +1,65 @@
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(__file__))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from bot.positions import POSITIONS
+from bot.virtual_stops import VirtualStopEngine
+
+SYM = "BTC/USDT:USDT"
+
+
+def test_level_ratchets_locally_and_breach_sends_reduce_only_exit(sim, tmp_path):
+    ex = sim
+    ex.create_order(SYM, "market", "buy", 1.0)
+    engine = VirtualStopEngine(str(tmp_path / "vs.json"), disaster_pct=3.0)
+    engine.track(ex, SYM, "long", 99.0, amount=1.0)
+    [disaster] = ex.fetch_open_orders(SYM)
+    assert disaster["stopPrice"] == 96.03 and disaster["info"]["closePosition"]
+    assert engine.track(ex, SYM, "long", 101.0) == 101.0
+    assert engine.track(ex, SYM, "long", 100.0) == 101.0   # never loosened
+    assert [o["id"] for o in ex.fetch_open_orders(SYM)] == [disaster["id"]]   # no exchange churn
+    assert engine.check(ex, {SYM: 102.0}) == 0
+    assert engine.check(ex, {SYM: 100.9}) == 1
+    assert ex.fetch_positions() == [] and ex.fetch_open_orders(SYM) == []
+    assert engine.get(SYM) is None
+
+
+def test_levels_survive_restart_and_are_dropped_once_the_position_is_gone(sim, tmp_path):
+    path = str(tmp_path / "vs.json")
+    ex = sim
+    ex.create_order(SYM, "market", "sell", 1.0)
+    VirtualStopEngine(path).track(ex, SYM, "short", 106.0, amount=1.0)
+    restarted = VirtualStopEngine(path)
+    restarted.sync(ex)
+    assert restarted.get(SYM)["level"] == 106.0 and restarted.get(SYM)["side"] == "short"
+    ex.create_order(SYM, "market", "buy", 1.0, params={"reduceOnly": True})
+    POSITIONS.invalidate(ex)
+    restarted.sync(ex)
+    assert restarted.get(SYM) is None and VirtualStopEngine(path).symbols() == []
+
+
+def test_worker_acts_only_on_quotes_it_fetched_and_never_on_published_prices(sim, monkeypatch, tmp_path):
+    import ccxt
+    from bot.state import STATE
+    from bot.workers import virtual_stop_worker
+    ex = sim
+    ex.create_order(SYM, "market", "buy", 1.0)
+    engine = VirtualStopEngine(str(tmp_path / "vs.json"))
+    monkeypatch.setattr(virtual_stop_worker, "VIRTUAL_STOPS", engine)
+    price = ex.fetch_ticker(SYM)["last"]
+    engine.track(ex, SYM, "long", price + 1.0, amount=1.0)   # already breached
+    STATE.set_price(SYM, price - 5.0)
+    fetch = ex.fetch_bids_asks
+
+    def down(*a, **k):
+        raise ccxt.RequestTimeout("timeout")
+
+    ex.fetch_bids_asks = down
+    virtual_stop_worker.tick(ex, {})
+    assert ex.fetch_positions() != []   # no quotes: the disaster stop covers
+    ex.fetch_bids_asks = fetch
+    virtual_stop_worker.tick(ex, {})
+    assert ex.fetch_positions() == []